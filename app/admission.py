@@ -0,0 +1,142 @@
+"""
+Cost-aware admission control for the extract endpoints.
+
+Each request is priced before any work starts, in estimated CPU seconds : images x the per-image
+cost of its method / tier ( `COST_SECONDS`, measured on one core at ~1 MP ) x a mild size factor.
+A per-process `WorkBudget` admits requests while the cost in flight fits its capacity; the others
+wait in a FIFO queue for at most `admission_max_wait_s`, then get a 503 with `Retry-After`.
+
+A single request is charged at most `admission_max_request_share` of the capacity, so one bulk
+batch can hold at most that share and small requests keep flowing next to it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import UploadFile
+
+from . import metrics
+from .config import settings
+
+
+# Estimated CPU seconds per ~1 MP image : k-means, then the model method per tier ( GWO dominates )
+COST_SECONDS = {"kmeans": 0.1, "fast": 2.0, "balanced": 10.0, "quality": 30.0}
+_REFERENCE_BYTES = 1024 * 1024
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Server busy, retry in {retry_after}s.")
+        self.retry_after = retry_after
+
+
+def estimate_cost(uploads: list[UploadFile], method: str, tier: str) -> float:
+    """Estimated CPU seconds of an extract request. Extraction samples pixels, so size weighs in sub-linearly."""
+    per_image = COST_SECONDS["kmeans"] if method == "kmeans" else COST_SECONDS.get(tier, COST_SECONDS["balanced"])
+    total = 0.0
+    for upload in uploads:
+        size = upload.size if upload.size is not None else _REFERENCE_BYTES
+        total += per_image * min(4.0, max(0.5, math.sqrt(size / _REFERENCE_BYTES)))
+    return total
+
+
+class WorkBudget:
+    """Cost units in flight, admitted in FIFO order. Event-loop only ( one instance per worker process )."""
+
+    def __init__(self, capacity: float, *, cpus: int, max_request_share: float, max_queued: int) -> None:
+        self.capacity = capacity
+        self.cpus = max(1, cpus)
+        self.max_charge = capacity * max_request_share
+        self.max_queued = max_queued
+        self.in_use = 0.0
+        self._waiters: deque[tuple[float, asyncio.Future]] = deque()
+
+    def _retry_after(self, charge: float) -> int:
+        # Time for the work ahead to drain at one cost unit per CPU-second
+        backlog = self.in_use + sum(cost for cost, _ in self._waiters) + charge - self.capacity
+        return max(1, min(120, math.ceil(backlog / self.cpus)))
+
+    def _observe(self) -> None:
+        metrics.ADMISSION_IN_USE.set(self.in_use)
+        metrics.ADMISSION_QUEUED.set(len(self._waiters))
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_use + self._waiters[0][0] <= self.capacity:
+            charge, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.in_use += charge
+            future.set_result(None)
+        self._observe()
+
+    async def acquire(self, cost: float, *, max_wait: float) -> float:
+        """Returns the charged cost ( pass it to `release` ). Raises Overloaded when not admitted within `max_wait` seconds."""
+        charge = min(cost, self.max_charge)
+        if not self._waiters and self.in_use + charge <= self.capacity:
+            self.in_use += charge
+            self._observe()
+            return charge
+        if max_wait <= 0 or len(self._waiters) >= self.max_queued:
+            metrics.ADMISSION_REJECTED.inc()
+            raise Overloaded(self._retry_after(charge))
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (charge, future)
+        self._waiters.append(entry)
+        self._observe()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if future.done() and not future.cancelled():
+                # Admitted at the last moment
+                if isinstance(exc, asyncio.TimeoutError):
+                    return charge
+                self.release(charge)
+                raise
+            future.cancel()
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+            self._wake()
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            metrics.ADMISSION_REJECTED.inc()
+            raise Overloaded(self._retry_after(charge)) from None
+        return charge
+
+    def release(self, charge: float) -> None:
+        self.in_use = max(0.0, self.in_use - charge)
+        self._wake()
+
+    @asynccontextmanager
+    async def admit(self, cost: float, *, max_wait: float | None = None) -> AsyncIterator[float]:
+        wait = settings.admission_max_wait_s if max_wait is None else max_wait
+        charge = await self.acquire(cost, max_wait=wait)
+        try:
+            yield charge
+        finally:
+            self.release(charge)
+
+
+_work_budget: WorkBudget | None = None
+
+
+def work_budget() -> WorkBudget:
+    """The process's budget, sized on first use from `admission_budget_seconds` or the thread budget."""
+    global _work_budget
+    if _work_budget is None:
+        from .thread_budget import current_budget
+
+        cpus = current_budget().cpus
+        capacity = settings.admission_budget_seconds or cpus * settings.admission_backlog_seconds
+        _work_budget = WorkBudget(
+            capacity,
+            cpus=cpus,
+            max_request_share=settings.admission_max_request_share,
+            max_queued=settings.admission_max_queued,
+        )
+    return _work_budget
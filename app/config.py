@@ -9,7 +9,66 @@ class Settings(BaseSettings):
     max_batch_images: int = 1000
     upload_chunk_size: int = 1024 * 1024
     history_limit: int = 20
+    # Bulk history export ( app.services.export_service ) : results read and encoded per batch ( a Parquet row group )
+    export_batch_rows: int = 5000
+    # WebP thumbnails written at ingest for the history ( longest side in px )
+    thumbnail_size: int = 256
+    derivative_webp_quality: int = 80
+    # Larger stills are scanned in strips ( core.tiling ) : extractors get a proxy of at most this many pixels
+    max_extract_pixels: int = 16_000_000
+    tile_pixels: int = 1 << 20
+    tile_workers: int = 0  # 0 = extract_native_threads
+    # CPU thread budget ( app.thread_budget ) : 0 = the cgroup CPU quota, capped by the affinity mask.
+    # CPU-bound extraction runs on `extract_workers` threads ( 0 = budget // native threads ), each
+    # pinning BLAS / OpenMP / torch to `extract_native_threads`
+    thread_budget: int = 0
+    extract_workers: int = 0
+    extract_native_threads: int = 1
+    # Independent extractors of one image run concurrently on this many single-threaded workers, taken out of the
+    # budget ( 0 = half of it, 1 = sequentially; at least `extract_native_threads` CPUs are left to `extract_workers` )
+    extract_stage_workers: int = 0
+    # Animated images / videos : frames sampled for color statistics, frames read at most, scene-change distance
+    animation_max_frames: int = 48
+    animation_max_decoded_frames: int = 3000
+    animation_scene_threshold: float = 0.35
     model_similarity_threshold: float = 0.03
+    # Model registry ( app.model_registry ) : seconds between manifest checks ( 0 = no hot reload ),
+    # and the token for `POST /api/admin/models/activate` ( empty = endpoint disabled )
+    model_watch_interval_s: float = 5.0
+    admin_token: str = ""
+    # Admission control ( app.admission ) on the extract endpoints, in estimated CPU seconds in flight per
+    # worker : capacity ( 0 = CPUs x admission_backlog_seconds ), share one request may hold, and how
+    # long / how many over-budget requests queue before getting a 503
+    admission_enabled: bool = True
+    admission_budget_seconds: float = 0.0
+    admission_backlog_seconds: float = 60.0
+    admission_max_request_share: float = 0.5
+    admission_max_wait_s: float = 5.0
+    admission_max_queued: int = 32
+    # Startup warmup ( app.services.warmup_service ) : `/readyz` answers 503 until it has run.
+    # Comma separated methods ( kmeans, model ) and model tiers ( empty : extraction_tier only )
+    warmup_enabled: bool = True
+    warmup_methods: str = "kmeans,model"
+    warmup_tiers: str = ""
+    # Default speed / quality tier of the model method ( core.ai.tiers : fast, balanced, quality )
+    extraction_tier: str = "balanced"
+    # GWO refinement of the k-means seed in the gwo extractor ( off : the k-means seed, the features the scorer was
+    # trained on ). Turning it on changes the scorer's input features and makes extraction several times slower
+    gwo_refine: bool = False
+    # Float precision of pixel sampling, OKLab conversion and clustering ( core.colors.precision : float64, float32 ).
+    # Check the palette deviation with `python -m scripts.validate_precision` before switching
+    compute_precision: str = "float64"
+    # `/api/v1` JSON bodies : compressed ( br if installed, else gzip ) above this size when the client accepts it
+    api_compress_min_bytes: int = 1024
+    api_gzip_level: int = 6
+    api_brotli_quality: int = 5
+    # Prometheus `/metrics` endpoint + request / stage instrumentation
+    metrics_enabled: bool = True
+    # Per-stage timing : Server-Timing header + structured log line per request
+    timing_enabled: bool = False
+    # cProfile / tracemalloc capture, for requests sent with `X-Iris-Profile: 1` or sampled at this rate
+    profile_enabled: bool = False
+    profile_sample_rate: float = 0.0
 
     @property
     def data_dir(self) -> Path:
@@ -23,6 +82,14 @@ class Settings(BaseSettings):
     def db_path(self) -> Path:
         return self.data_dir / "app.db"
 
+    @property
+    def profile_dir(self) -> Path:
+        return self.data_dir / "profiles"
+
+    @property
+    def models_dir(self) -> Path:
+        return self.repo_root / "models"
+
     @property
     def model_path(self) -> Path:
         primary_path = self.repo_root / "models" / "palette_scorer.pth"
@@ -0,0 +1,190 @@
+"""
+Palette extraction for animated images and short videos.
+
+Frames are streamed ( `core.frames` ) and sampled adaptively : a frame is kept when its coarse
+color histogram moved far enough from the last kept one ( a scene change, which also starts a
+new timeline segment ), or when the sampling stride has elapsed. The stride doubles while the
+footage stays still and resets on motion, within the `max_frames` budget.
+
+Each kept frame is reduced to a 16 x 16 x 16 RGB histogram ( pixel share and color sum per bin )
+weighted by the screen time it stands for. The histograms are summed, and the palette comes from
+one weighted k-means over the occupied bins ( at most 4096 points ) instead of over every
+frame's pixels.
+"""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import Any
+
+import cv2
+import numpy as np
+from sklearn.cluster import KMeans
+
+from core.frames import frame_count, iter_frames
+from core.timing import span
+
+from .extract_colors import palette_from_centers
+
+
+BINS = 16
+PROBE_SIDE = 64  # scene-change histograms
+STATS_SIDE = 256  # color statistics
+
+
+def _downscale(image_bgr: np.ndarray, max_side: int) -> np.ndarray:
+    h, w = image_bgr.shape[:2]
+    if max(h, w) <= max_side:
+        return image_bgr
+    scale = max_side / max(h, w)
+    return cv2.resize(image_bgr, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def _probe_histogram(image_bgr: np.ndarray) -> np.ndarray:
+    small = _downscale(image_bgr, PROBE_SIDE)
+    hist = cv2.calcHist([small], [0, 1, 2], None, [8, 8, 8], [0, 256, 0, 256, 0, 256]).ravel()
+    return hist / max(float(hist.sum()), 1.0)
+
+
+class _ColorStats:
+    """Per-bin pixel share and RGB sum, accumulated over weighted frames."""
+
+    def __init__(self) -> None:
+        self.counts = np.zeros(BINS**3, dtype=np.float64)
+        self.sums = np.zeros((BINS**3, 3), dtype=np.float64)
+        self.seconds = 0.0
+        self.frames = 0
+
+    @staticmethod
+    def of_frame(image_bgr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        rgb = cv2.cvtColor(_downscale(image_bgr, STATS_SIDE), cv2.COLOR_BGR2RGB).reshape(-1, 3)
+        q = (rgb >> 4).astype(np.int32)
+        keys = (q[:, 0] * BINS + q[:, 1]) * BINS + q[:, 2]
+        counts = np.bincount(keys, minlength=BINS**3).astype(np.float64)
+        sums = np.stack(
+            [np.bincount(keys, weights=rgb[:, ch], minlength=BINS**3) for ch in range(3)],
+            axis=1,
+        )
+        # Pixel shares, so frame size does not weigh in
+        return counts / len(rgb), sums / len(rgb)
+
+    def add(self, frame_stats: tuple[np.ndarray, np.ndarray], seconds: float) -> None:
+        counts, sums = frame_stats
+        self.counts += counts * seconds
+        self.sums += sums * seconds
+        self.seconds += seconds
+        self.frames += 1
+
+    def palette(self, n_colors: int) -> list[dict[str, object]]:
+        occupied = np.flatnonzero(self.counts > 0)
+        if occupied.size == 0:
+            return []
+        weights = self.counts[occupied]
+        means = self.sums[occupied] / weights[:, None]
+        k = min(n_colors, occupied.size)
+        kmeans = KMeans(n_clusters=k, n_init="auto", random_state=42)
+        labels = kmeans.fit_predict(means, sample_weight=weights)
+        return palette_from_centers(kmeans.cluster_centers_, np.bincount(labels, weights=weights, minlength=k))
+
+
+def extract_animated_palette(
+    path: str | Path,
+    n_colors: int,
+    *,
+    timeline: bool = False,
+    max_frames: int = 48,
+    max_decoded: int = 3000,
+    scene_threshold: float = 0.35,
+) -> tuple[dict[str, Any], np.ndarray | None]:
+    """
+    Args :
+        path : animated image or video file.
+        n_colors : palette size, for the whole clip and for each timeline segment.
+        timeline : also return one palette per scene segment.
+        max_frames : frames whose colors are sampled at most.
+        max_decoded : frames read at most ( bounds the time spent on long clips ).
+        scene_threshold : half L1 distance ( 0..1 ) between 8x8x8 histograms that counts as a scene change.
+
+    Returns :
+        ( result, poster ) : result holds `palette`, `frames` ( total / decoded / sampled / duration_s )
+        and, with `timeline=True`, `timeline` segments ( start_s / end_s / frames_sampled / palette );
+        poster is the first frame ( BGR ), for thumbnails.
+    """
+    total = frame_count(path)
+    known_total = min(total, max_decoded) if total > 0 else max_decoded
+    # Look at ~4 frames per sampled one : enough to catch cuts without decoding everything to pixels
+    base_stride = max(1, math.ceil(known_total / max_frames))
+    probe_stride = max(1, base_stride // 4)
+    max_stride = base_stride * 8
+
+    overall = _ColorStats()
+    segments: list[dict[str, Any]] = []
+    segment_stats: _ColorStats | None = None
+    poster: np.ndarray | None = None
+
+    pending: tuple[np.ndarray, np.ndarray] | None = None
+    pending_seconds = 0.0
+    last_hist: np.ndarray | None = None
+    stride = base_stride
+    since_sample = 0
+    decoded = 0
+    end_s = 0.0
+
+    def flush() -> None:
+        if pending is not None:
+            overall.add(pending, pending_seconds)
+            if segment_stats is not None:
+                segment_stats.add(pending, pending_seconds)
+
+    with span("frames"):
+        for frame in iter_frames(path, probe_stride=probe_stride, max_decoded=max_decoded):
+            decoded += 1
+            end_s = frame.start_s + frame.duration_s
+            since_sample += 1
+            if frame.image is None or overall.frames + (pending is not None) >= max_frames:
+                pending_seconds += frame.duration_s
+                continue
+
+            if poster is None:
+                poster = frame.image.copy()
+            hist = _probe_histogram(frame.image)
+            distance = 1.0 if last_hist is None else 0.5 * float(np.abs(hist - last_hist).sum())
+            scene_change = distance >= scene_threshold
+            if not (scene_change or since_sample >= stride):
+                pending_seconds += frame.duration_s
+                continue
+
+            flush()
+            if scene_change:
+                segment_stats = _ColorStats()
+                segments.append({"start_s": frame.start_s, "stats": segment_stats})
+            # Still footage : sample less often; any motion brings the stride back
+            stride = min(stride * 2, max_stride) if distance < scene_threshold / 4 else base_stride
+            pending = _ColorStats.of_frame(frame.image)
+            pending_seconds = frame.duration_s
+            last_hist = hist
+            since_sample = 0
+        flush()
+
+    if poster is None:
+        raise ValueError(f"No decodable frames in {Path(path).name}")
+
+    result: dict[str, Any] = {
+        "palette": overall.palette(n_colors),
+        "frames": {
+            "total": total or decoded,
+            "decoded": decoded,
+            "sampled": overall.frames,
+            "duration_s": round(end_s, 3),
+        },
+    }
+    if timeline:
+        for idx, segment in enumerate(segments):
+            stats = segment.pop("stats")
+            segment["end_s"] = round(segments[idx + 1]["start_s"] if idx + 1 < len(segments) else end_s, 3)
+            segment["start_s"] = round(segment["start_s"], 3)
+            segment["frames_sampled"] = stats.frames
+            segment["palette"] = stats.palette(n_colors)
+        result["timeline"] = segments
+    return result, poster
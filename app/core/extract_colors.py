@@ -1,12 +1,15 @@
 import argparse
 import json
-from pathlib import Path
 
 import cv2
 import numpy as np
 from sklearn.cluster import KMeans
 
 from core.colors.color_oklch import hex_to_oklch
+from core.colors.precision import compute_dtype
+from core.image_io import ImageInput, read_bgr
+from core.tiling import TiledScan
+from core.timing import span
 
 
 def _resize_for_speed(image_bgr: np.ndarray) -> np.ndarray:
@@ -23,9 +26,8 @@ def _resize_for_speed(image_bgr: np.ndarray) -> np.ndarray:
     return cv2.resize(image_bgr, (target_width, target_height), interpolation=cv2.INTER_AREA)
 
 
-def extract_dominant_colors(image_path: str, n_colors: int = 3) -> list[dict[str, object]]:
-    image_bytes = np.fromfile(Path(image_path), dtype=np.uint8)
-    image_bgr = cv2.imdecode(image_bytes, cv2.IMREAD_COLOR)
+def extract_dominant_colors(image_path: ImageInput, n_colors: int = 3) -> list[dict[str, object]]:
+    image_bgr = read_bgr(image_path)
     if image_bgr is None:
         raise ValueError(f"Invalid or corrupted image format: {image_path}")
 
@@ -33,12 +35,31 @@ def extract_dominant_colors(image_path: str, n_colors: int = 3) -> list[dict[str
     image_rgb = cv2.cvtColor(small_bgr, cv2.COLOR_BGR2RGB)
 
     pixels = image_rgb.reshape(-1, 3)
-    kmeans = KMeans(n_clusters=n_colors, n_init="auto", random_state=42)
-    labels = kmeans.fit_predict(pixels)
+    with span("kmeans"):
+        kmeans = KMeans(n_clusters=n_colors, n_init="auto", random_state=42)
+        labels = kmeans.fit_predict(pixels.astype(compute_dtype()))
 
     counts = np.bincount(labels, minlength=n_colors)
-    centers = np.rint(kmeans.cluster_centers_).astype(np.uint8)
-    sorted_indices = np.argsort(counts)[::-1]
+    return palette_from_centers(kmeans.cluster_centers_, counts)
+
+
+def extract_dominant_colors_tiled(scan: TiledScan, n_colors: int = 3) -> list[dict[str, object]]:
+    """k-means on the scan's reservoir of original pixels; cluster shares from its whole-image histogram."""
+    with span("kmeans"):
+        kmeans = KMeans(n_clusters=n_colors, n_init="auto", random_state=42)
+        kmeans.fit(scan.sample.astype(compute_dtype()))
+
+    occupied = np.flatnonzero(scan.hist_counts)
+    bin_means = scan.hist_sums[occupied] / scan.hist_counts[occupied, None]
+    labels = kmeans.predict(bin_means.astype(kmeans.cluster_centers_.dtype))
+    weights = np.bincount(labels, weights=scan.hist_counts[occupied], minlength=n_colors)
+    return palette_from_centers(kmeans.cluster_centers_, weights)
+
+
+def palette_from_centers(centers_rgb: np.ndarray, weights: np.ndarray) -> list[dict[str, object]]:
+    """RGB cluster centers to palette entries, heaviest cluster first."""
+    centers = np.rint(np.clip(centers_rgb, 0, 255)).astype(np.uint8)
+    sorted_indices = np.argsort(weights)[::-1]
 
     results: list[dict[str, object]] = []
     for idx in sorted_indices:
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from concurrent.futures import Executor
 from pathlib import Path
 from typing import Any
 
@@ -7,6 +8,7 @@ import numpy as np
 import torch
 
 from core.ai import (
+    compute_saliency_weights,
     extract_top10_gwo,
     extract_top10_saliency,
     extract_top10_kmeans,
@@ -14,27 +16,39 @@ from core.ai import (
     extract_top10_chroma_saliency_oklab,
     extract_top10_lightness_ratio_oklab,
     extract_top10_similar_area_oklab,
+    get_tier,
 )
 from core.ai.train.model import AestheticScorerMLP, apply_nms, load_model
 from core.colors.color_oklab import oklab_to_hex
 from core.colors.color_oklch import _rgb_to_oklab_vectorized, hex_to_oklch
+from core.image_io import ImageInput, read_bgr
+from core.task_graph import Stage, run_graph
+from core.timing import span
 
+from ..metrics import GWO_EVALUATIONS, MODEL_CACHE
 
-_MODEL_CACHE: dict[Path, AestheticScorerMLP] = {}
+
+# Path-based loading ( CLIs, benchmarks ); the app goes through `app.model_registry`.
+# Keyed on the file's mtime too, so a model replaced in place is reloaded
+_MODEL_CACHE: dict[tuple[Path, int], AestheticScorerMLP] = {}
 
 
 def _load_scorer(model_path: Path) -> AestheticScorerMLP:
     resolved = model_path.resolve()
-    cached = _MODEL_CACHE.get(resolved)
-    if cached is not None:
-        return cached
-
     if not resolved.exists():
         raise FileNotFoundError(f"Model file not found: {resolved}")
+    key = (resolved, resolved.stat().st_mtime_ns)
+    cached = _MODEL_CACHE.get(key)
+    if cached is not None:
+        MODEL_CACHE.labels("hit").inc()
+        return cached
+    MODEL_CACHE.labels("miss").inc()
 
     model = AestheticScorerMLP(input_dim=19)
     model = load_model(model, str(resolved))
-    _MODEL_CACHE[resolved] = model
+    for stale in [k for k in _MODEL_CACHE if k[0] == resolved]:
+        del _MODEL_CACHE[stale]
+    _MODEL_CACHE[key] = model
     return model
 
 
@@ -96,15 +110,87 @@ def _build_visual_rankings(area_data: dict[str, Any]) -> dict[str, list[dict[str
     }
 
 
-def _build_feature_matrix(image_path: str | Path) -> tuple[np.ndarray, list[dict[str, Any]]]:
-    gwo_colors = extract_top10_gwo(image_path, 10)
-    kmeans_colors = extract_top10_kmeans(image_path, 10)
-    saliency_colors = extract_top10_saliency(image_path, 10)
+# Stage names match `core.ai.train.records.RECORD_EXTRACTORS` ( and the tier kwargs ); "saliency_map"
+# is an intermediate. A model version may list stages it ignores ( `unused_extractors` in the registry ).
+FEATURE_STAGES_ORDER = ("gwo", "kmeans", "saliency", "area", "similar", "chroma", "lightness")
+_SPAN_NAMES = {"area": "area_ratio", "similar": "similar_area", "chroma": "chroma_saliency", "lightness": "lightness_ratio"}
+
+
+def _empty_colors() -> np.ndarray:
+    return np.empty((0, 3), dtype=np.int32)
+
+
+def _empty_dimension() -> dict[str, Any]:
+    return {"top_colors": []}
+
+
+def _feature_stages(budget) -> list[Stage]:
+    def timed(name: str, fn):
+        def run(*args):
+            with span(_SPAN_NAMES.get(name, name)):
+                return fn(*args)
+
+        return run
+
+    def gwo(image):
+        colors, stats = extract_top10_gwo(image, 10, return_stats=True, **budget.kwargs_for("gwo"))
+        if stats["refined"]:
+            GWO_EVALUATIONS.labels(budget.name).observe(stats["evals"])
+        return colors
+
+    return [
+        Stage("gwo", timed("gwo", gwo), ("image",), _empty_colors),
+        Stage("kmeans", timed("kmeans", lambda image: extract_top10_kmeans(image, 10, **budget.kwargs_for("kmeans"))), ("image",), _empty_colors),
+        Stage("saliency_map", timed("saliency_map", compute_saliency_weights), ("image",)),
+        Stage(
+            "saliency",
+            timed("saliency", lambda image, weights: extract_top10_saliency(image, 10, weights=weights, **budget.kwargs_for("saliency"))),
+            ("image", "saliency_map"),
+            _empty_colors,
+        ),
+        Stage("area", timed("area", lambda image: extract_top10_area_ratio_oklab(image, 10, **budget.kwargs_for("area"))), ("image",), _empty_dimension),
+        Stage("similar", timed("similar", lambda image: extract_top10_similar_area_oklab(image, 10, **budget.kwargs_for("similar"))), ("image",), _empty_dimension),
+        Stage("chroma", timed("chroma", lambda image: extract_top10_chroma_saliency_oklab(image, 10, **budget.kwargs_for("chroma"))), ("image",), _empty_dimension),
+        Stage(
+            "lightness",
+            timed("lightness", lambda image: extract_top10_lightness_ratio_oklab(image, 10, **budget.kwargs_for("lightness"))),
+            ("image",),
+            _empty_dimension,
+        ),
+    ]
+
 
-    area_data = extract_top10_area_ratio_oklab(image_path, 10)
-    similar_data = extract_top10_similar_area_oklab(image_path, 10)
-    chroma_data = extract_top10_chroma_saliency_oklab(image_path, 10)
-    lightness_data = extract_top10_lightness_ratio_oklab(image_path, 10)
+def _build_feature_matrix(
+    image_path: ImageInput,
+    tier: str | None = None,
+    *,
+    executor: Executor | None = None,
+    skip: frozenset[str] = frozenset(),
+) -> tuple[np.ndarray, list[dict[str, Any]]]:
+    """
+    The seven extractors as a task graph : independent ones run concurrently on `executor`
+    ( sequentially without one ), stages in `skip` are not run and contribute no features.
+    """
+    budget = get_tier(tier)
+    # Decoded once, every extractor works on the same pixels
+    image = read_bgr(image_path)
+    if image is None:
+        raise ValueError("Failed to decode image from path.")
+    values = run_graph(_feature_stages(budget), {"image": image}, FEATURE_STAGES_ORDER, executor=executor, skip=skip)
+
+    with span("featurize"):
+        return _featurize(*(values[name] for name in FEATURE_STAGES_ORDER))
+
+
+def _featurize(
+    gwo_colors: np.ndarray,
+    kmeans_colors: np.ndarray,
+    saliency_colors: np.ndarray,
+    area_data: dict[str, Any],
+    similar_data: dict[str, Any],
+    chroma_data: dict[str, Any],
+    lightness_data: dict[str, Any],
+) -> tuple[np.ndarray, list[dict[str, Any]]]:
     visual_rankings = _build_visual_rankings(area_data)
 
     sources = [
@@ -214,25 +300,37 @@ def _build_feature_matrix(image_path: str | Path) -> tuple[np.ndarray, list[dict
 
 
 def extract_dominant_colors_with_model(
-    image_path: str,
+    image_path: ImageInput,
     n_colors: int,
     *,
-    model_path: str | Path,
+    model_path: str | Path | None = None,
+    scorer: AestheticScorerMLP | None = None,
     similarity_threshold: float = 0.02,
+    tier: str | None = None,
+    executor: Executor | None = None,
+    skip_stages: frozenset[str] = frozenset(),
 ) -> list[dict[str, Any]]:
-    feature_matrix, candidates = _build_feature_matrix(image_path)
+    """
+    `scorer` : an already loaded model ( the registry's active one ), else loaded from `model_path`.
+    `executor` / `skip_stages` : see `_build_feature_matrix`.
+    """
+    if scorer is None and model_path is None:
+        raise ValueError("Pass either scorer or model_path.")
+    feature_matrix, candidates = _build_feature_matrix(image_path, tier, executor=executor, skip=skip_stages)
     if feature_matrix.size == 0:
         return []
 
-    model = _load_scorer(Path(model_path))
-    features = torch.from_numpy(feature_matrix).unsqueeze(0)
-    scores = model.predict_proba(features).cpu().numpy().flatten()
-    selected = apply_nms(
-        candidates,
-        scores,
-        max_colors=max(1, int(n_colors)),
-        similarity_threshold=float(similarity_threshold),
-    )
+    with span("score"):
+        model = scorer if scorer is not None else _load_scorer(Path(model_path))
+        features = torch.from_numpy(feature_matrix).unsqueeze(0)
+        scores = model.predict_proba(features).cpu().numpy().flatten()
+    with span("nms"):
+        selected = apply_nms(
+            candidates,
+            scores,
+            max_colors=max(1, int(n_colors)),
+            similarity_threshold=float(similarity_threshold),
+        )
 
     palette: list[dict[str, Any]] = []
     for color in selected:
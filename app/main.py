@@ -1,29 +1,48 @@
-from contextlib import asynccontextmanager
+import asyncio
+import secrets
+from contextlib import asynccontextmanager, nullcontext, suppress
 from html import escape
 from pathlib import Path
 
-from fastapi import FastAPI, File, Form, Request, UploadFile
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, File, Form, Header, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
+from core.ai import set_gwo_refinement
+from core.colors.precision import set_default_precision
+
+from . import metrics, thread_budget
+from .admission import Overloaded, estimate_cost, work_budget
+from .model_registry import model_registry, watch as watch_models
 from .config import settings
-from .services.format_service import format_result_for_template
+from .middleware import TimingMiddleware
+from .responses import json_response
+from .static_files import FINGERPRINTED_NAME, STATIC_DIR, UPLOAD_NAME, CachedStaticFiles, asset_url
+from .services.format_service import format_result_for_template, palettes_api_payload
 from .services.palette_service import (
     clamp_n_colors,
     clear_history_records,
     extract_batch_palettes,
+    extract_palettes,
     load_history,
     load_result,
     normalize_method,
+    normalize_tier,
 )
+from .services import color_search_service, similarity_service
+from .services.export_service import EXPORT_FORMATS, open_export
+from .services.color_search_service import parse_query_color, search_by_color
+from .services.similarity_service import find_similar
+from .services.warmup_service import warm_up, warmup_state
 from .storage import init_db
 
 
 templates = Jinja2Templates(directory=str(Path(__file__).resolve().parent / "templates"))
+templates.env.globals["asset_url"] = asset_url
 MAX_BATCH_UPLOADS = 1000
 limiter = Limiter(key_func=get_remote_address)
 
@@ -31,15 +50,52 @@ limiter = Limiter(key_func=get_remote_address)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db(settings.db_path)
+    await similarity_service.load_index(settings.db_path)
+    await color_search_service.load_index(settings.db_path)
     settings.upload_dir.mkdir(parents=True, exist_ok=True)
+    set_default_precision(settings.compute_precision)
+    set_gwo_refinement(settings.gwo_refine)
+    # In the background : the worker accepts connections ( /healthz ) while /readyz still says 503
+    thread_budget.configure()
+    warmup_task = asyncio.create_task(thread_budget.run_cpu_bound(warm_up)) if settings.warmup_enabled else None
+    if warmup_task is None:
+        warmup_state.ready = warmup_state.finished = True
+        metrics.READY.set(1)
+    watch_task = (
+        asyncio.create_task(watch_models(model_registry, settings.model_watch_interval_s))
+        if settings.model_watch_interval_s > 0
+        else None
+    )
     yield
+    if watch_task is not None:
+        watch_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await watch_task
+    thread_budget.shutdown()
+    metrics.mark_process_dead()
 
 
 app = FastAPI(title="Iris Img to Palette", lifespan=lifespan)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.mount("/uploads", StaticFiles(directory=str(settings.upload_dir), check_dir=False), name="uploads")
-app.mount("/static", StaticFiles(directory=str(Path(__file__).resolve().parent / "static")), name="static")
+app.add_middleware(TimingMiddleware)
+app.mount(
+    "/uploads",
+    CachedStaticFiles(directory=str(settings.upload_dir), check_dir=False, immutable_pattern=UPLOAD_NAME),
+    name="uploads",
+)
+app.mount(
+    "/static",
+    CachedStaticFiles(directory=str(STATIC_DIR), immutable_pattern=FINGERPRINTED_NAME, precompressed=True),
+    name="static",
+)
+
+
+def _admit(images: list[UploadFile], method: str, tier: str):
+    """Admission for an extract request ( raises Overloaded ), a no-op when admission control is off."""
+    if not settings.admission_enabled:
+        return nullcontext()
+    return work_budget().admit(estimate_cost(images, method, tier))
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -58,6 +114,30 @@ def index(request: Request) -> HTMLResponse:
     )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    if not settings.metrics_enabled:
+        return Response(status_code=404)
+    metrics.observe_threadpool()
+    # The multiprocess collector reads every worker's files, keep that off the event loop
+    payload, content_type = await run_in_threadpool(metrics.render_latest)
+    return Response(payload, media_type=content_type)
+
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz(request: Request) -> Response:
+    return json_response(request, {"status": "ok"})
+
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz(request: Request) -> Response:
+    if not warmup_state.finished:
+        return json_response(request, {"status": "warming_up"}, status_code=503)
+    if not warmup_state.ready:
+        return json_response(request, {"status": "failed", "warmup": warmup_state.as_dict()}, status_code=503)
+    return json_response(request, {"status": "ready", "warmup": warmup_state.as_dict()})
+
+
 @app.get("/history", response_class=HTMLResponse)
 async def history(request: Request) -> HTMLResponse:
     history_rows = await load_history(settings.db_path, limit=settings.history_limit)
@@ -106,6 +186,7 @@ async def api_extract(
     n_colors: int = Form(10),
     current_index: int = Form(0),
     method: str = Form("model"),
+    tier: str | None = Form(None),
 ) -> HTMLResponse:
     if len(images) > MAX_BATCH_UPLOADS:
         return HTMLResponse(
@@ -114,17 +195,25 @@ async def api_extract(
         )
 
     try:
-        result = await extract_batch_palettes(
-            images,
-            clamp_n_colors(int(n_colors)),
-            db_path=settings.db_path,
-            upload_dir=settings.upload_dir,
-            method=normalize_method(method),
-        )
+        async with _admit(images, normalize_method(method), normalize_tier(tier)):
+            result = await extract_batch_palettes(
+                images,
+                clamp_n_colors(int(n_colors)),
+                db_path=settings.db_path,
+                upload_dir=settings.upload_dir,
+                method=normalize_method(method),
+                tier=tier,
+            )
         palettes = result.get("palettes") or []
         if palettes:
             idx = max(0, min(int(current_index), len(palettes) - 1))
             result["palette"] = palettes[idx]
+    except Overloaded as exc:
+        return HTMLResponse(
+            f"<div class='panel'>{escape(str(exc))}</div>",
+            status_code=503,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
     except ValueError as exc:
         return HTMLResponse(f"<div class='panel'>{escape(str(exc))}</div>", status_code=400)
 
@@ -135,3 +224,140 @@ async def api_extract(
             "result": result,
         },
     )
+
+
+@app.post("/api/v1/extract")
+@limiter.limit("5/10seconds")
+async def api_v1_extract(
+    request: Request,
+    images: list[UploadFile] = File(...),
+    n_colors: int = Form(10),
+    method: str = Form("model"),
+    tier: str | None = Form(None),
+    include_hex: bool = Form(False),
+    timeline: bool = Form(False),
+) -> Response:
+    if len(images) > MAX_BATCH_UPLOADS:
+        return json_response(
+            request,
+            {"detail": f"Too many images uploaded. Maximum is {MAX_BATCH_UPLOADS}."},
+            status_code=400,
+        )
+
+    n = clamp_n_colors(int(n_colors))
+    method = normalize_method(method)
+    try:
+        tier = normalize_tier(tier)
+        async with _admit(images, method, tier):
+            extracted = await extract_palettes(
+                images,
+                n,
+                db_path=settings.db_path,
+                upload_dir=settings.upload_dir,
+                method=method,
+                tier=tier,
+                timeline=timeline,
+            )
+    except Overloaded as exc:
+        response = json_response(request, {"detail": str(exc)}, status_code=503)
+        response.headers["Retry-After"] = str(exc.retry_after)
+        return response
+    except ValueError as exc:
+        return json_response(request, {"detail": str(exc)}, status_code=400)
+
+    payload = palettes_api_payload(
+        extracted,
+        n_colors=n,
+        method=method,
+        tier=tier,
+        include_hex=include_hex,
+    )
+    return json_response(request, payload)
+
+
+@app.get("/api/v1/models")
+async def api_v1_models(request: Request) -> Response:
+    try:
+        payload = await run_in_threadpool(model_registry.describe)
+    except ValueError as exc:
+        return json_response(request, {"detail": str(exc)}, status_code=500)
+    return json_response(request, payload)
+
+
+@app.post("/api/admin/models/activate", include_in_schema=False)
+async def api_admin_activate_model(
+    request: Request,
+    version: str = Form(...),
+    x_admin_token: str | None = Header(None),
+) -> Response:
+    if not settings.admin_token:
+        return json_response(request, {"detail": "Not Found"}, status_code=404)
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        return json_response(request, {"detail": "Invalid admin token."}, status_code=403)
+    try:
+        # Loaded and verified before the swap : requests keep running on the previous model meanwhile
+        active = await run_in_threadpool(model_registry.activate, version)
+    except LookupError as exc:
+        return json_response(request, {"detail": str(exc)}, status_code=404)
+    except (ValueError, FileNotFoundError) as exc:
+        return json_response(request, {"detail": str(exc)}, status_code=400)
+    return json_response(request, {"active": active.version, "sha256": active.info.sha256})
+
+
+@app.get("/api/v1/export")
+async def api_v1_export(
+    request: Request,
+    format: str = Query("csv", description=f"One of {', '.join(EXPORT_FORMATS)}"),
+    since: str | None = Query(None, description="ISO date or datetime, inclusive ( UTC when no offset )"),
+    until: str | None = Query(None, description="ISO date or datetime, exclusive"),
+    after_id: int = Query(0, description="Only results with a larger id"),
+) -> Response:
+    try:
+        export = await open_export(settings.db_path, format, since=since, until=until, after_id=after_id)
+    except ValueError as exc:
+        return json_response(request, {"detail": str(exc)}, status_code=400)
+    return StreamingResponse(
+        export.chunks,
+        media_type=export.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export.filename}"'},
+    )
+
+
+@app.get("/api/v1/similar")
+async def api_v1_similar(
+    request: Request,
+    result_id: int | None = None,
+    colors: str | None = Query(None, description="Comma separated hex colors, used when result_id is not given"),
+    k: int = 10,
+) -> Response:
+    try:
+        results = await find_similar(
+            settings.db_path,
+            result_id=result_id,
+            colors=colors.split(",") if colors else None,
+            k=k,
+        )
+    except LookupError as exc:
+        return json_response(request, {"detail": str(exc)}, status_code=404)
+    except ValueError as exc:
+        return json_response(request, {"detail": str(exc)}, status_code=400)
+    return json_response(request, {"k": k, "results": results})
+
+
+@app.get("/api/v1/search/color")
+async def api_v1_search_color(
+    request: Request,
+    hex: str | None = Query(None, description="Query color as hex"),
+    oklab: str | None = Query(None, description="Query color as L,a,b, used when hex is not given"),
+    delta_e: float = Query(0.05, description="Maximum OKLab distance ( ~0.02 is just noticeable )"),
+    limit: int = 50,
+) -> Response:
+    try:
+        query = parse_query_color(hex_color=hex, oklab=oklab)
+        results = await search_by_color(settings.db_path, query, delta_e=delta_e, limit=limit)
+    except ValueError as exc:
+        return json_response(request, {"detail": str(exc)}, status_code=400)
+    return json_response(
+        request,
+        {"query": {"oklab": [round(float(v), 4) for v in query]}, "delta_e": delta_e, "results": results},
+    )
@@ -0,0 +1,96 @@
+"""
+Prometheus metrics.
+
+Single process : the default registry is served as is.
+Several uvicorn workers : set `PROMETHEUS_MULTIPROC_DIR` to an empty, writable directory ( wiped
+before each start ) in every worker's environment; each process then writes its samples there and
+`/metrics` aggregates all of them, whichever worker answers the scrape.
+"""
+
+import os
+
+from anyio import to_thread
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from core.timing import StageTimings
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+REQUEST_SECONDS = Histogram(
+    "iris_request_duration_seconds",
+    "HTTP request latency",
+    ["route", "http_method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "iris_stage_duration_seconds",
+    "Time spent per pipeline stage ( core.timing spans ), by extraction method",
+    ["method", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+IMAGES_PROCESSED = Counter("iris_images_processed_total", "Images whose palette was extracted", ["method"])
+BATCH_SIZE = Histogram("iris_batch_size", "Images per extract request", ["method"], buckets=BATCH_BUCKETS)
+IN_FLIGHT = Gauge("iris_requests_in_flight", "HTTP requests being served", multiprocess_mode="livesum")
+THREADPOOL_BUSY = Gauge("iris_threadpool_busy", "Worker threads in use", multiprocess_mode="livesum")
+THREADPOOL_SIZE = Gauge("iris_threadpool_size", "Worker thread capacity", multiprocess_mode="livesum")
+THREADPOOL_WAITING = Gauge("iris_threadpool_queue_depth", "Tasks waiting for a worker thread", multiprocess_mode="livesum")
+ADMISSION_IN_USE = Gauge(
+    "iris_admission_cost_in_flight",
+    "Estimated CPU seconds of admitted extract requests",
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUED = Gauge("iris_admission_queued", "Extract requests waiting for admission", multiprocess_mode="livesum")
+ADMISSION_REJECTED = Counter("iris_admission_rejected_total", "Extract requests shed with a 503")
+READY = Gauge("iris_ready", "1 once the worker finished its startup warmup", multiprocess_mode="livemin")
+MODEL_CACHE = Counter("iris_model_cache_requests_total", "Scorer model cache lookups", ["result"])
+GWO_EVALUATIONS = Histogram(
+    "iris_gwo_evaluations",
+    "Fitness evaluations GWO used before converging or exhausting its budget",
+    ["tier"],
+    buckets=(250, 500, 1000, 2000, 3000, 5000, 10000, 20000, 40000),
+)
+DB_WRITE_SECONDS = Histogram(
+    "iris_db_write_duration_seconds",
+    "SQLite write latency",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def observe_threadpool() -> None:
+    """Sample the anyio thread limiter behind `run_in_threadpool`. Must run on the event loop."""
+    stats = to_thread.current_default_thread_limiter().statistics()
+    THREADPOOL_BUSY.set(stats.borrowed_tokens)
+    THREADPOOL_SIZE.set(stats.total_tokens)
+    THREADPOOL_WAITING.set(stats.tasks_waiting)
+
+
+def observe_stages(timings: StageTimings) -> None:
+    method = timings.tags.get("method", "none")
+    for name, duration_ms in timings.spans:
+        if name != "total":
+            STAGE_SECONDS.labels(method, name).observe(duration_ms / 1000.0)
+
+
+def render_latest() -> tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    # Drops this worker's live gauges from the aggregate once it exits
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,117 @@
+import json
+import logging
+import pstats
+import random
+import time
+import uuid
+from typing import Any
+
+from core.timing import StageTimings, start_timings, stop_timings
+
+from . import metrics
+from .config import settings
+
+
+timing_logger = logging.getLogger("iris.timing")
+PROFILE_HEADER = b"x-iris-profile"
+
+
+def _wants_profile(scope: dict[str, Any]) -> bool:
+    if not settings.profile_enabled:
+        return False
+    for name, value in scope.get("headers") or []:
+        if name == PROFILE_HEADER and value.strip() in {b"1", b"true", b"yes"}:
+            return True
+    return settings.profile_sample_rate > 0 and random.random() < settings.profile_sample_rate
+
+
+def _dump_profiles(timings: StageTimings, request_id: str) -> str | None:
+    if not timings.profiles:
+        return None
+    settings.profile_dir.mkdir(parents=True, exist_ok=True)
+    path = settings.profile_dir / f"{request_id}.prof"
+    # Merge the per-call profilers ( one per threadpool extraction ) into one file for snakeviz / pstats
+    stats = pstats.Stats(timings.profiles[0])
+    for profiler in timings.profiles[1:]:
+        stats.add(profiler)
+    stats.dump_stats(str(path))
+    return str(path)
+
+
+def _route_label(scope: dict[str, Any]) -> str:
+    # Route templates ( or the mount prefix ) rather than raw paths, to keep label cardinality bounded
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    return scope.get("root_path") or "unmatched"
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware : collects `core.timing` spans for the request and feeds the Prometheus
+    metrics. With timing on it also adds a `total` span, sends the spans back as a `Server-Timing`
+    header and logs one JSON line on `iris.timing`. Passes straight through when everything is off.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = _wants_profile(scope)
+        if not (settings.timing_enabled or settings.metrics_enabled or profile):
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = start_timings(profile=profile)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.timing_enabled:
+                    # Headers go out before the body, so `total` here is time-to-first-byte
+                    timings.record("total", (time.perf_counter() - start) * 1000.0)
+                    headers = list(message.get("headers") or [])
+                    headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        if settings.metrics_enabled:
+            metrics.IN_FLIGHT.inc()
+            metrics.observe_threadpool()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop_timings(token)
+            duration_s = time.perf_counter() - start
+            if settings.metrics_enabled:
+                metrics.IN_FLIGHT.dec()
+                metrics.observe_threadpool()
+                metrics.REQUEST_SECONDS.labels(_route_label(scope), scope.get("method", ""), str(status_code)).observe(duration_s)
+                metrics.observe_stages(timings)
+
+            if settings.timing_enabled or profile:
+                request_id = uuid.uuid4().hex
+                entry: dict[str, Any] = {
+                    "request_id": request_id,
+                    "method": scope.get("method"),
+                    "path": scope.get("path"),
+                    "status": status_code,
+                    "duration_ms": round(duration_s * 1000.0, 3),
+                    "stages": {
+                        name: {"ms": round(value["ms"], 3), "count": int(value["count"])}
+                        for name, value in timings.totals().items()
+                        if name != "total"
+                    },
+                    "tags": timings.tags,
+                }
+                if profile:
+                    entry["profile_path"] = _dump_profiles(timings, request_id)
+                    entry["memory"] = timings.memory
+                timing_logger.info(json.dumps(entry))
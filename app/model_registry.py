@@ -0,0 +1,255 @@
+"""
+Versioned scorer models with hot swap.
+
+`models/registry.json` lists the model artifacts and which one is active :
+
+    {
+      "active": "2.0",
+      "versions": {
+        "1.0": {"file": "Iris1.0.pth", "sha256": "...", "registered_at": "..."},
+        "2.0": {"file": "palette_scorer-2.0.pth", "sha256": "...", "registered_at": "...",
+                "unused_extractors": ["similar"]}
+      }
+    }
+
+( `python -m scripts.register_model` maintains it ). A version is only activated once its file
+matches the recorded checksum and loads; the swap is then a single reference assignment, so
+in-flight requests finish on the model they started with. Workers follow the manifest by
+polling its mtime ( `watch` ), so activating on one worker ( admin endpoint ) or editing the
+manifest switches every worker. Without a manifest the legacy `settings.model_path` is served,
+versioned by its file name. `unused_extractors` ( optional ) names extractor stages a version
+was trained without : they are skipped and their features left at zero.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from fastapi.concurrency import run_in_threadpool
+
+from core.ai.train.model import AestheticScorerMLP, load_model
+
+from .config import settings
+
+
+logger = logging.getLogger("iris.models")
+MANIFEST_NAME = "registry.json"
+EXTRACTOR_STAGES = frozenset({"gwo", "kmeans", "saliency", "area", "similar", "chroma", "lightness"})
+# Candidate colors come from these : a version must keep at least one
+_COLOR_SOURCES = frozenset({"gwo", "kmeans", "saliency"})
+
+
+@dataclass(frozen=True)
+class ModelVersion:
+    version: str
+    path: Path
+    sha256: str | None  # None : legacy model without a manifest, not verified
+    skip_stages: frozenset[str] = frozenset()  # extractors whose features this version ignores, not run
+
+
+@dataclass(frozen=True)
+class ActiveModel:
+    info: ModelVersion
+    scorer: AestheticScorerMLP
+
+    @property
+    def version(self) -> str:
+        return self.info.version
+
+
+def _skip_stages(version: str, entry: dict[str, Any]) -> frozenset[str]:
+    skip = frozenset(entry.get("unused_extractors") or ())
+    unknown = skip - EXTRACTOR_STAGES
+    if unknown:
+        raise ValueError(f"Model version {version}: unknown extractors {sorted(unknown)}")
+    if _COLOR_SOURCES <= skip:
+        raise ValueError(f"Model version {version}: gwo, kmeans and saliency cannot all be unused")
+    return skip
+
+
+def file_sha256(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def read_manifest(models_dir: Path) -> dict[str, Any] | None:
+    path = models_dir / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("versions"), dict):
+        raise ValueError(f"{path} must hold a 'versions' object")
+    return manifest
+
+
+def write_manifest(models_dir: Path, manifest: dict[str, Any]) -> None:
+    # Write then rename : readers ( other workers ) never see a partial file
+    path = models_dir / MANIFEST_NAME
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def register_version(models_dir: Path, version: str, file_name: str, *, activate: bool = False) -> ModelVersion:
+    """Record an artifact already copied into `models_dir`, with its checksum."""
+    path = models_dir / file_name
+    if not path.is_file():
+        raise FileNotFoundError(f"Model file not found: {path}")
+    manifest = read_manifest(models_dir) or {"active": None, "versions": {}}
+    if version in manifest["versions"]:
+        raise ValueError(f"Model version {version} is already registered.")
+    sha256 = file_sha256(path)
+    manifest["versions"][version] = {
+        "file": file_name,
+        "sha256": sha256,
+        "registered_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if activate or not manifest.get("active"):
+        manifest["active"] = version
+    write_manifest(models_dir, manifest)
+    return ModelVersion(version, path, sha256)
+
+
+class ModelRegistry:
+    def __init__(self, models_dir: Path, legacy_path: Path) -> None:
+        self.models_dir = models_dir
+        self.legacy_path = legacy_path
+        self._active: ActiveModel | None = None
+        self._load_lock = threading.Lock()
+        self._manifest_mtime: int | None = None
+
+    def versions(self) -> tuple[dict[str, ModelVersion], str]:
+        """( every known version, active version name )."""
+        manifest = read_manifest(self.models_dir)
+        if manifest is None:
+            version = self.legacy_path.stem
+            return {version: ModelVersion(version, self.legacy_path, None)}, version
+        versions = {
+            name: ModelVersion(name, self.models_dir / entry["file"], entry.get("sha256"), _skip_stages(name, entry))
+            for name, entry in manifest["versions"].items()
+        }
+        active = manifest.get("active")
+        if active not in versions:
+            raise ValueError(f"Active model version {active!r} is not registered.")
+        return versions, active
+
+    def _load(self, info: ModelVersion) -> ActiveModel:
+        if not info.path.exists():
+            raise FileNotFoundError(f"Model file not found: {info.path}")
+        if info.sha256 is not None and file_sha256(info.path) != info.sha256:
+            raise ValueError(f"Checksum mismatch for model {info.version} ( {info.path.name} )")
+        scorer = load_model(AestheticScorerMLP(input_dim=19), str(info.path))
+        return ActiveModel(info, scorer)
+
+    def _manifest_stamp(self) -> int | None:
+        try:
+            return (self.models_dir / MANIFEST_NAME).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def active(self) -> ActiveModel:
+        """The model to score with. Loads on first use; blocking, call it off the event loop."""
+        current = self._active
+        if current is not None:
+            return current
+        self.reload()
+        return self._active
+
+    def reload(self) -> bool:
+        """
+        Swap to the manifest's active version when it changed. Returns True on a swap; on failure the
+        old model stays and the manifest still counts as changed, so `watch` retries.
+        """
+        with self._load_lock:
+            stamp = self._manifest_stamp()
+            versions, name = self.versions()
+            info = versions[name]
+            current = self._active
+            if current is not None and current.info == info:
+                self._manifest_mtime = stamp
+                return False
+            self._active = self._load(info)
+            # Only recorded once loaded : an artifact still being copied, or failing its checksum, is retried
+            self._manifest_mtime = stamp
+        logger.info("model %s active ( %s )", info.version, info.path.name)
+        return True
+
+    def activate(self, version: str) -> ActiveModel:
+        """Load and verify `version`, make it active here and in the manifest ( other workers follow )."""
+        with self._load_lock:
+            manifest = read_manifest(self.models_dir)
+            if manifest is None:
+                raise ValueError("No model registry manifest : register a version first.")
+            versions, _ = self.versions()
+            if version not in versions:
+                raise LookupError(f"Model version {version} is not registered.")
+            loaded = self._load(versions[version])
+            manifest["active"] = version
+            write_manifest(self.models_dir, manifest)
+            self._manifest_mtime = self._manifest_stamp()
+            self._active = loaded
+        logger.info("model %s activated", version)
+        return loaded
+
+    def changed_on_disk(self) -> bool:
+        return self._manifest_stamp() != self._manifest_mtime
+
+    def describe(self) -> dict[str, Any]:
+        versions, active = self.versions()
+        loaded = self._active.version if self._active is not None else None
+        return {
+            "active": active,
+            "loaded": loaded,
+            "versions": [
+                {
+                    "version": info.version,
+                    "file": info.path.name,
+                    "sha256": info.sha256,
+                    "unused_extractors": sorted(info.skip_stages),
+                }
+                for info in versions.values()
+            ],
+        }
+
+
+model_registry = ModelRegistry(settings.models_dir, settings.model_path)
+
+
+async def watch(registry: ModelRegistry, interval_s: float, max_backoff_s: float = 300.0) -> None:
+    """
+    Lifespan task : reload when the manifest changes. Errors are logged and the current model kept;
+    the reload is retried, with the delay doubling up to `max_backoff_s` while it keeps failing.
+    """
+    delay = interval_s
+    while True:
+        await asyncio.sleep(delay)
+        if not registry.changed_on_disk():
+            delay = interval_s
+            continue
+        reload = asyncio.ensure_future(run_in_threadpool(registry.reload))
+        try:
+            try:
+                await asyncio.shield(reload)
+            except asyncio.CancelledError:
+                # Shutdown : the thread cannot be interrupted, let it finish before the threadpool goes away
+                with contextlib.suppress(Exception):
+                    await reload
+                raise
+            delay = interval_s
+        except Exception as exc:
+            delay = min(delay * 2, max(max_backoff_s, interval_s))
+            logger.warning("model reload failed, keeping the current model, retrying in %.0fs: %s", delay, exc)
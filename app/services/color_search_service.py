@@ -0,0 +1,190 @@
+"""
+"Which images contain this color" over the palette history.
+
+Every stored palette color is an OKLab point in the `palette_colors` table, written with the
+result itself. Each process keeps them in a `scipy.spatial.cKDTree` plus a small brute-force
+buffer of points added since the last build; the tree is rebuilt once the buffer outgrows
+`REBUILD_FRACTION` of it, so inserts stay O(1) amortized and a query is one ball lookup plus a
+scan of at most a few thousand points. The index follows the table like the similarity index
+( rows above its highest result id, full reload on a new history generation ).
+
+Distances are ΔE in OKLab ( Euclidean, L in 0..1 ) : ~0.02 is a just noticeable difference.
+"""
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from scipy.spatial import cKDTree
+
+from core.colors import hex_to_oklab
+from core.colors.palette_embedding import palette_to_oklab
+
+from ..storage import (
+    get_results_by_ids,
+    list_palette_colors,
+    list_palettes_without_colors,
+    palette_colors_watermark,
+    save_palette_colors,
+)
+from .format_service import to_derivative_urls
+
+
+REBUILD_FRACTION = 0.1
+MIN_REBUILD = 2048
+MAX_DELTA_E = 0.5
+
+
+class ColorIndex:
+    """KD-tree over ( result id, rank, OKLab ) points, with an append buffer for recent inserts."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tree: cKDTree | None = None
+            self._keys = np.empty((0, 2), dtype=np.int64)  # ( result id, rank ) per tree point
+            self._delta_keys = np.empty((0, 2), dtype=np.int64)
+            self._delta_points = np.empty((0, 3), dtype=np.float64)
+            self._max_id = 0
+
+    @property
+    def size(self) -> int:
+        return len(self._keys) + len(self._delta_keys)
+
+    @property
+    def max_id(self) -> int:
+        return self._max_id
+
+    def add(self, rows: list[tuple[int, int, float, float, float]]) -> None:
+        if not rows:
+            return
+        table = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        with self._lock:
+            self._delta_keys = np.concatenate([self._delta_keys, table[:, :2].astype(np.int64)])
+            self._delta_points = np.concatenate([self._delta_points, table[:, 2:]])
+            self._max_id = max(self._max_id, int(self._delta_keys[-1, 0]))
+            if len(self._delta_keys) > max(MIN_REBUILD, REBUILD_FRACTION * len(self._keys)):
+                self._rebuild()
+
+    def _rebuild(self) -> None:
+        points = self._delta_points
+        if self._tree is not None:
+            points = np.concatenate([self._tree.data, points])
+        self._keys = np.concatenate([self._keys, self._delta_keys])
+        self._tree = cKDTree(points)
+        self._delta_keys = np.empty((0, 2), dtype=np.int64)
+        self._delta_points = np.empty((0, 3), dtype=np.float64)
+
+    def search(self, query: np.ndarray, radius: float) -> dict[int, tuple[float, int]]:
+        """Per result id : ( distance, rank ) of its palette color closest to `query`, within `radius`."""
+        with self._lock:
+            tree, keys = self._tree, self._keys
+            delta_keys, delta_points = self._delta_keys, self._delta_points
+
+        hit_keys = [delta_keys]
+        hit_dist = [np.linalg.norm(delta_points - query, axis=1)]
+        if tree is not None:
+            idx = np.asarray(tree.query_ball_point(query, radius), dtype=np.int64)
+            hit_keys.append(keys[idx])
+            hit_dist.append(np.linalg.norm(tree.data[idx] - query, axis=1))
+        all_keys = np.concatenate(hit_keys)
+        all_dist = np.concatenate(hit_dist)
+        within = all_dist <= radius
+
+        best: dict[int, tuple[float, int]] = {}
+        for (result_id, rank), dist in zip(all_keys[within].tolist(), all_dist[within].tolist()):
+            if result_id not in best or dist < best[result_id][0]:
+                best[result_id] = (dist, rank)
+        return best
+
+
+color_index = ColorIndex()
+_index_generation = 0
+_sync_lock = asyncio.Lock()
+
+
+def oklab_rows(palette: list[dict[str, Any]]) -> list[tuple[float, float, float]]:
+    """Palette colors as OKLab triples, in palette order, for `storage.save_result`."""
+    return [tuple(row) for row in palette_to_oklab(palette).tolist()]
+
+
+async def sync_index(db_path: Path) -> None:
+    global _index_generation
+    async with _sync_lock:
+        max_id, generation = await palette_colors_watermark(db_path)
+        if generation != _index_generation or max_id < color_index.max_id:
+            color_index.clear()
+            _index_generation = generation
+        if max_id > color_index.max_id:
+            rows = await list_palette_colors(db_path, after_id=color_index.max_id)
+            await run_in_threadpool(color_index.add, rows)
+
+
+async def load_index(db_path: Path) -> None:
+    """Startup : index the colors of results stored before `palette_colors` existed, then load everything."""
+    missing = await list_palettes_without_colors(db_path)
+    if missing:
+        rows = [
+            (result_id, rank, L, a, b)
+            for result_id, palette in missing
+            for rank, (L, a, b) in enumerate(oklab_rows(palette))
+        ]
+        await save_palette_colors(db_path, rows)
+    color_index.clear()
+    await sync_index(db_path)
+
+
+def parse_query_color(*, hex_color: str | None = None, oklab: str | None = None) -> np.ndarray:
+    if hex_color:
+        return np.array(hex_to_oklab(hex_color), dtype=np.float64)
+    if oklab:
+        try:
+            values = [float(part) for part in oklab.split(",")]
+        except ValueError:
+            values = []
+        if len(values) != 3:
+            raise ValueError("oklab must be three comma separated numbers : L,a,b")
+        return np.array(values, dtype=np.float64)
+    raise ValueError("Pass either hex or oklab.")
+
+
+async def search_by_color(
+    db_path: Path,
+    query: np.ndarray,
+    *,
+    delta_e: float = 0.05,
+    limit: int = 50,
+) -> list[dict[str, Any]]:
+    """Stored results with a palette color within `delta_e` ( OKLab ) of `query`, closest first."""
+    if not 0.0 < delta_e <= MAX_DELTA_E:
+        raise ValueError(f"delta_e must be in (0, {MAX_DELTA_E}].")
+    await sync_index(db_path)
+    best = await run_in_threadpool(color_index.search, query, float(delta_e))
+    hits = sorted(best.items(), key=lambda item: (item[1][0], -item[0]))[: max(1, min(int(limit), 500))]
+
+    rows = await get_results_by_ids(db_path, [hit_id for hit_id, _ in hits])
+    out: list[dict[str, Any]] = []
+    for hit_id, (dist, rank) in hits:
+        row = rows.get(hit_id)
+        if row is None:
+            continue
+        matched = row.palette[rank] if rank < len(row.palette) else {}
+        out.append(
+            {
+                "id": row.id,
+                "filename": row.filename,
+                "delta_e": round(dist, 4),
+                "matched": {"rank": rank, "hex": str(matched.get("hex", ""))},
+                "n_colors": row.n_colors,
+                "created_at": row.created_at,
+                "hex": [str(color.get("hex", "")) for color in row.palette],
+                **to_derivative_urls(row.image_path),
+            }
+        )
+    return out
@@ -0,0 +1,249 @@
+"""
+Bulk export of the palette history.
+
+Results are read in id order, `export_batch_rows` at a time ( `storage.iter_results` ), and each
+batch is encoded and handed to the caller before the next one is read, so memory stays flat
+whatever the history size. The export is a snapshot : results stored after it was opened are
+left out, so the columns sized at open time fit every row. Every format has one row per result, with the palette flattened
+into columns : `color_1_hex`, `color_1_L`, `color_1_c`, `color_1_h`, ... up to the largest
+palette of the exported range ( empty when a palette is shorter ).
+
+- `csv` / `jsonl` : text, always available.
+- `parquet` ( one row group per batch ) / `arrow` ( Arrow IPC stream ) : columnar, need the
+  optional `pyarrow` package ( `uv add pyarrow` ).
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import orjson
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..storage import PaletteResult, export_snapshot, iter_results
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional : `uv add pyarrow` for the parquet / arrow formats
+    pyarrow = None
+
+
+# format -> ( media type, file extension )
+EXPORT_FORMATS: dict[str, tuple[str, str]] = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+BASE_COLUMNS = ("id", "filename", "sha256", "n_colors", "image_path", "created_at", "model_version")
+COLOR_FIELDS = ("hex", "L", "c", "h")
+
+
+def color_columns(n_colors: int) -> list[str]:
+    return [f"color_{rank}_{field}" for rank in range(1, n_colors + 1) for field in COLOR_FIELDS]
+
+
+def flatten_result(result: PaletteResult, n_colors: int) -> tuple[Any, ...]:
+    """One export row, values in `BASE_COLUMNS` + `color_columns(n_colors)` order ( None when missing )."""
+    row: list[Any] = [
+        result.id,
+        result.filename,
+        result.sha256,
+        result.n_colors,
+        result.image_path,
+        result.created_at,
+        result.model_version,
+    ]
+    for color in result.palette[:n_colors]:
+        oklch = color.get("oklch") or {}
+        row += (color.get("hex"), oklch.get("L"), oklch.get("c"), oklch.get("h"))
+    row += [None] * (len(BASE_COLUMNS) + len(COLOR_FIELDS) * n_colors - len(row))
+    return tuple(row)
+
+
+def parse_bound(value: str | None, name: str) -> str | None:
+    """ISO date / datetime to the `created_at` format ( UTC isoformat ); naive values are UTC."""
+    if value is None or not value.strip():
+        return None
+    try:
+        moment = datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date or datetime, got {value!r}.") from None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat()
+
+
+class _TextEncoder:
+    def __init__(self, columns: list[str], fmt: str) -> None:
+        self.columns = columns
+        self.fmt = fmt
+        self._header_written = False
+
+    def encode(self, rows: list[tuple[Any, ...]]) -> bytes:
+        if self.fmt == "jsonl":
+            columns = self.columns
+            return b"".join(orjson.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if not self._header_written:
+            writer.writerow(self.columns)
+            self._header_written = True
+        # None is written as an empty field
+        writer.writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def close(self) -> bytes:
+        # An empty export still gets its CSV header
+        return self.encode([]) if self.fmt == "csv" and not self._header_written else b""
+
+
+class _Drain:
+    """Write-only file object for pyarrow writers : bytes written since the last `drain` are handed out."""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        view = memoryview(data)
+        self._buffer += view
+        self._position += view.nbytes
+        return view.nbytes
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class _ColumnarEncoder:
+    def __init__(self, columns: list[str], fmt: str) -> None:
+        fields = [
+            pyarrow.field("id", pyarrow.int64()),
+            pyarrow.field("filename", pyarrow.string()),
+            pyarrow.field("sha256", pyarrow.string()),
+            pyarrow.field("n_colors", pyarrow.int32()),
+            pyarrow.field("image_path", pyarrow.string()),
+            pyarrow.field("created_at", pyarrow.timestamp("us", tz="UTC")),
+            pyarrow.field("model_version", pyarrow.string()),
+        ]
+        for column in columns[len(BASE_COLUMNS) :]:
+            fields.append(pyarrow.field(column, pyarrow.string() if column.endswith("_hex") else pyarrow.float64()))
+        self.schema = pyarrow.schema(fields)
+        self._sink = _Drain()
+        if fmt == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(self._sink, self.schema, compression="zstd")
+        else:
+            self._writer = pyarrow.ipc.new_stream(self._sink, self.schema)
+
+    def encode(self, rows: list[tuple[Any, ...]]) -> bytes:
+        if not rows:
+            return b""
+        columns = [list(values) for values in zip(*rows)]
+        created_at = BASE_COLUMNS.index("created_at")
+        columns[created_at] = [datetime.fromisoformat(value) for value in columns[created_at]]
+        arrays = [pyarrow.array(values, type=field.type) for values, field in zip(columns, self.schema)]
+        self._writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        # Parquet footer / Arrow end-of-stream marker
+        self._writer.close()
+        return self._sink.drain()
+
+
+@dataclass(frozen=True)
+class Export:
+    media_type: str
+    filename: str
+    chunks: AsyncIterator[bytes]
+
+
+async def _export_chunks(
+    db_path: Path,
+    fmt: str,
+    *,
+    since: str | None,
+    until: str | None,
+    after_id: int,
+    max_id: int,
+    n_colors: int,
+    batch_rows: int,
+) -> AsyncIterator[bytes]:
+    columns = [*BASE_COLUMNS, *color_columns(n_colors)]
+    encoder = _TextEncoder(columns, fmt) if fmt in {"csv", "jsonl"} else _ColumnarEncoder(columns, fmt)
+    async for batch in iter_results(
+        db_path, since=since, until=until, after_id=after_id, max_id=max_id, batch_size=batch_rows
+    ):
+        rows = [flatten_result(result, n_colors) for result in batch]
+        chunk = await run_in_threadpool(encoder.encode, rows)
+        if chunk:
+            yield chunk
+    tail = await run_in_threadpool(encoder.close)
+    if tail:
+        yield tail
+
+
+async def open_export(
+    db_path: Path,
+    fmt: str,
+    *,
+    since: str | None = None,
+    until: str | None = None,
+    after_id: int = 0,
+) -> Export:
+    """
+    Validate the request, then fix the snapshot ( highest id ) and size the palette columns, before any byte is sent.
+
+    Args :
+        fmt : one of `EXPORT_FORMATS`.
+        since / until : ISO dates or datetimes, inclusive / exclusive bounds on `created_at`.
+        after_id : only results with a larger id ( resume an incremental export ).
+
+    Returns :
+        the media type, a download file name and the body chunks. Raises ValueError on bad arguments.
+    """
+    fmt = fmt.strip().lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}. Expected one of {', '.join(EXPORT_FORMATS)}.")
+    if fmt in {"parquet", "arrow"} and pyarrow is None:
+        raise ValueError(f"The {fmt} format needs the optional pyarrow package.")
+    if after_id < 0:
+        raise ValueError("after_id must be >= 0.")
+    since_bound = parse_bound(since, "since")
+    until_bound = parse_bound(until, "until")
+    max_id, n_colors = await export_snapshot(db_path, since=since_bound, until=until_bound, after_id=after_id)
+
+    media_type, extension = EXPORT_FORMATS[fmt]
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    chunks = _export_chunks(
+        db_path,
+        fmt,
+        since=since_bound,
+        until=until_bound,
+        after_id=after_id,
+        max_id=max_id,
+        n_colors=n_colors,
+        batch_rows=max(1, settings.export_batch_rows),
+    )
+    return Export(media_type=media_type, filename=f"palettes-{stamp}.{extension}", chunks=chunks)
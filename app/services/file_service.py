@@ -1,8 +1,11 @@
+import glob
 import hashlib
 import os
 from pathlib import Path
 
 import aiofiles
+import cv2
+import numpy as np
 from fastapi import HTTPException, UploadFile, status
 
 from ..config import settings
@@ -16,6 +19,11 @@ ALLOWED_IMAGE_EXTENSIONS = {
     ".bmp",
     ".webp",
     ".avif",
+    # Short clips, palettes come from sampled frames ( core.frames )
+    ".mp4",
+    ".m4v",
+    ".mov",
+    ".webm",
 }
 
 MAGIC_SIGS = [
@@ -25,6 +33,7 @@ MAGIC_SIGS = [
     (0, b"RIFF"),
     (0, b"BM"),
     (4, b"ftyp"),
+    (0, b"\x1a\x45\xdf\xa3"),
 ]
 
 
@@ -89,9 +98,40 @@ def finalize_upload(temp_path: Path, upload_dir: Path, file_hash: str, safe_name
     return final_path
 
 
+def derivative_paths(image_path: Path) -> dict[str, Path]:
+    # `{hash16}_{stem}.{size}.webp` next to the original; sanitized stems hold no dots, so these never clash with an upload
+    return {"thumbnail": image_path.with_name(f"{image_path.stem}.{settings.thumbnail_size}.webp")}
+
+
+def write_derivatives(image_bgr: np.ndarray, image_path: Path) -> dict[str, Path]:
+    """Downscale the decoded upload to the thumbnail size ( longest side, never upscaled ) as WebP."""
+    height, width = image_bgr.shape[:2]
+    sizes = {"thumbnail": settings.thumbnail_size}
+    written: dict[str, Path] = {}
+    for kind, path in derivative_paths(image_path).items():
+        scale = min(1.0, sizes[kind] / max(height, width, 1))
+        resized = image_bgr
+        if scale < 1.0:
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            resized = cv2.resize(image_bgr, size, interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".webp", resized, [cv2.IMWRITE_WEBP_QUALITY, settings.derivative_webp_quality])
+        if not ok:
+            raise ValueError(f"Could not encode the {kind} of '{image_path.name}'.")
+        encoded.tofile(path)
+        written[kind] = path
+    return written
+
+
 def safe_unlink(path: Path) -> None:
     path.unlink(missing_ok=True)
 
 
+def unlink_with_derivatives(path: Path) -> None:
+    safe_unlink(path)
+    # Every `{stem}.{size}.webp`, including those written under another size ( or the former 1024 px previews )
+    for derivative in path.parent.glob(f"{glob.escape(path.stem)}.*.webp"):
+        safe_unlink(derivative)
+
+
 def is_within_upload_dir(path: Path, upload_root: Path) -> bool:
     return upload_root in path.resolve().parents
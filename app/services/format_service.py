@@ -2,13 +2,24 @@ import json
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
 from ..storage import PaletteResult
+from .file_service import derivative_paths
 
 
 def to_upload_url(image_path: str) -> str:
     return f"/uploads/{Path(image_path).name}"
 
 
+def to_derivative_urls(image_path: str) -> dict[str, str]:
+    # Rows stored before derivatives existed fall back to the original upload
+    return {
+        f"{kind}_url": to_upload_url(str(path)) if path.exists() else to_upload_url(image_path)
+        for kind, path in derivative_paths(Path(image_path)).items()
+    }
+
+
 def _palette_json_pretty(palette: list[dict[str, Any]]) -> str:
     return json.dumps(palette, ensure_ascii=False, indent=2)
 
@@ -48,6 +59,7 @@ def format_result_for_template(result: PaletteResult) -> dict[str, Any]:
         "palette": result.palette,
         "palette_json_pretty": _palette_json_pretty(result.palette),
         "image_url": to_upload_url(result.image_path),
+        **to_derivative_urls(result.image_path),
     }
 
 
@@ -62,3 +74,42 @@ def palettes_response_payload(palettes_raw: list[list[dict[str, Any]]], n_colors
         "total_images": len(palettes_raw),
     }
 
+
+def _compact_palette(palette: list[dict[str, Any]], include_hex: bool) -> dict[str, Any]:
+    oklch = np.array(_palette_to_oklch_triplets(palette), dtype=np.float64).reshape(-1, 3)
+    hue = np.radians(oklch[:, 2])
+    oklab = np.column_stack([oklch[:, 0], oklch[:, 1] * np.cos(hue), oklch[:, 1] * np.sin(hue)])
+    compact: dict[str, Any] = {"oklch": oklch.tolist(), "oklab": np.round(oklab, 4).tolist()}
+    if include_hex:
+        compact["hex"] = [str(color.get("hex", "")) for color in palette]
+    return compact
+
+
+def palettes_api_payload(
+    extracted: list[dict[str, Any]],
+    *,
+    n_colors: int,
+    method: str,
+    tier: str,
+    include_hex: bool = False,
+) -> dict[str, Any]:
+    """Compact `/api/v1/extract` body : per image, OKLCH and OKLab as `[L, c, h]` / `[L, a, b]` rows."""
+    images: list[dict[str, Any]] = []
+    for item in extracted:
+        entry: dict[str, Any] = {"filename": item["filename"], **_compact_palette(item["palette"], include_hex)}
+        if "model_version" in item:
+            entry["model_version"] = item["model_version"]
+        if "frames" in item:
+            entry["frames"] = item["frames"]
+        if "timeline" in item:
+            entry["timeline"] = [
+                {
+                    "start_s": segment["start_s"],
+                    "end_s": segment["end_s"],
+                    "frames_sampled": segment["frames_sampled"],
+                    **_compact_palette(segment["palette"], include_hex),
+                }
+                for segment in item["timeline"]
+            ]
+        images.append(entry)
+    return {"n_colors": n_colors, "method": method, "tier": tier, "images": images}
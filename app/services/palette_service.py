@@ -4,19 +4,34 @@ from typing import Any
 from fastapi import UploadFile
 from fastapi.concurrency import run_in_threadpool
 
+from core.ai.tiers import get_tier
+from core.frames import is_animated
+from core.image_io import read_bgr
+from core.tiling import needs_tiling, scan_tiled
+from core.timing import profile_call, span, tag
+
+from .. import metrics
 from ..config import settings
-from ..core.extract_colors import extract_dominant_colors
+from ..model_registry import model_registry
+from ..core.animated_extract_colors import extract_animated_palette
+from ..core.extract_colors import extract_dominant_colors, extract_dominant_colors_tiled
 from ..core.model_extract_colors import extract_dominant_colors_with_model
 from ..storage import PaletteResult, clear_results, get_result, list_image_paths, list_results, save_result
+from ..thread_budget import current_budget, run_cpu_bound, stage_executor
 from .file_service import (
     finalize_upload,
     is_within_upload_dir,
     safe_unlink,
     sanitize_filename,
+    unlink_with_derivatives,
     validate_image_magic,
+    write_derivatives,
     write_upload_to_temp,
 )
 from .format_service import palettes_response_payload
+from . import color_search_service, similarity_service
+from .color_search_service import oklab_rows
+from .similarity_service import embedding_row
 
 
 def clamp_n_colors(value: int) -> int:
@@ -28,6 +43,11 @@ def normalize_method(method: str | None) -> str:
     return "model" if value in {"model", "ai"} else "kmeans"
 
 
+def normalize_tier(tier: str | None) -> str:
+    # Raises ValueError on unknown names, which the endpoints turn into a 400
+    return get_tier((tier or "").strip() or settings.extraction_tier).name
+
+
 async def load_history(db_path: Path, *, limit: int = settings.history_limit) -> list[PaletteResult]:
     return await list_results(db_path, limit=limit)
 
@@ -38,22 +58,31 @@ async def load_result(db_path: Path, result_id: int) -> PaletteResult | None:
 
 async def clear_history_records(db_path: Path) -> None:
     paths = await list_image_paths(db_path)
-    await clear_results(db_path)
+    with metrics.DB_WRITE_SECONDS.labels("clear_results").time():
+        await clear_results(db_path)
+    similarity_service.palette_index.clear()
+    color_search_service.color_index.clear()
     upload_root = settings.upload_dir.resolve()
     for path in paths:
         file_path = Path(path)
         if is_within_upload_dir(file_path, upload_root):
-            safe_unlink(file_path.resolve())
+            unlink_with_derivatives(file_path.resolve())
 
 
-async def extract_batch_palettes(
+async def extract_palettes(
     uploads: list[UploadFile],
     n_colors: int,
     *,
     db_path: Path,
     upload_dir: Path,
     method: str = "kmeans",
-) -> dict[str, Any]:
+    tier: str | None = None,
+    timeline: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    Store, extract and record every upload, in order. Shared by the HTML and JSON endpoints.
+    Each item holds `filename` and `palette`; animated uploads add `frames` ( and `timeline` on request ).
+    """
     if not uploads:
         raise ValueError("Please upload at least one image.")
     if len(uploads) > settings.max_batch_images:
@@ -61,52 +90,140 @@ async def extract_batch_palettes(
 
     n = clamp_n_colors(n_colors)
     selected_method = normalize_method(method)
-    palettes_raw: list[list[dict[str, Any]]] = []
+    selected_tier = normalize_tier(tier)
+    extracted: list[dict[str, Any]] = []
+    tag("method", selected_method)
+    tag("tier", selected_tier)
+    metrics.BATCH_SIZE.labels(selected_method).observe(len(uploads))
 
     for upload in uploads:
         original_name = Path(upload.filename or "upload").name
         safe_name = sanitize_filename(original_name)
         content_type = (upload.content_type or "").lower()
-        if content_type and not content_type.startswith("image/"):
+        if content_type and not content_type.startswith(("image/", "video/")):
             raise ValueError(f"Unsupported file type: {original_name}")
 
         temp_path: Path | None = None
         final_path: Path | None = None
         try:
-            temp_path, file_hash = await write_upload_to_temp(upload, upload_dir, safe_name, original_name)
-            await run_in_threadpool(validate_image_magic, temp_path, original_name)
-            final_path = finalize_upload(temp_path, upload_dir, file_hash, safe_name)
+            with span("upload"):
+                temp_path, file_hash = await write_upload_to_temp(upload, upload_dir, safe_name, original_name)
+                await run_in_threadpool(validate_image_magic, temp_path, original_name)
+                final_path = finalize_upload(temp_path, upload_dir, file_hash, safe_name)
             temp_path = None
-
-            try:
-                if selected_method == "model":
-                    palette = await run_in_threadpool(
-                        extract_dominant_colors_with_model,
-                        str(final_path),
+            item: dict[str, Any] = {"filename": original_name}
+
+            if await run_in_threadpool(is_animated, final_path):
+                # Frame-sampled k-means whatever the method : the scorer model only knows still images
+                with span("extract"):
+                    animation, poster = await run_cpu_bound(
+                        profile_call,
+                        extract_animated_palette,
+                        final_path,
                         n,
-                        model_path=settings.model_path,
-                        similarity_threshold=settings.model_similarity_threshold,
+                        timeline=timeline,
+                        max_frames=settings.animation_max_frames,
+                        max_decoded=settings.animation_max_decoded_frames,
+                        scene_threshold=settings.animation_scene_threshold,
                     )
-                else:
-                    palette = await run_in_threadpool(extract_dominant_colors, str(final_path), n)
-            except FileNotFoundError as exc:
-                raise ValueError(str(exc)) from exc
-            palettes_raw.append(palette)
-            await save_result(
-                db_path=db_path,
-                filename=original_name,
-                sha256=file_hash,
-                n_colors=n,
-                palette=palette,
-                image_path=str(final_path),
-            )
+                with span("derivatives"):
+                    await run_cpu_bound(write_derivatives, poster, final_path)
+                del poster
+                palette = animation.pop("palette")
+                item.update(animation)
+            else:
+                palette, model_version = await _extract_still(final_path, original_name, n, selected_method, selected_tier)
+                if model_version is not None:
+                    item["model_version"] = model_version
+            item["palette"] = palette
+            extracted.append(item)
+            metrics.IMAGES_PROCESSED.labels(selected_method).inc()
+            with span("db_write"), metrics.DB_WRITE_SECONDS.labels("save_result").time():
+                await save_result(
+                    db_path=db_path,
+                    filename=original_name,
+                    sha256=file_hash,
+                    n_colors=n,
+                    palette=palette,
+                    image_path=str(final_path),
+                    embedding=embedding_row(palette),
+                    oklab_colors=oklab_rows(palette),
+                    model_version=item.get("model_version"),
+                )
+            await similarity_service.sync_index(db_path)
+            await color_search_service.sync_index(db_path)
             final_path = None
         finally:
             await upload.close()
             if temp_path is not None and temp_path.exists():
                 safe_unlink(temp_path)
             if final_path is not None and final_path.exists():
-                safe_unlink(final_path)
+                unlink_with_derivatives(final_path)
+
+    return extracted
+
+
+async def _extract_still(
+    final_path: Path, original_name: str, n: int, method: str, tier: str
+) -> tuple[list[dict[str, Any]], str | None]:
+    """( palette, scorer model version or None )."""
+    # Decoded once : the derivatives and every extractor share these pixels
+    scan = None
+    if await run_in_threadpool(needs_tiling, final_path, settings.max_extract_pixels):
+        # Huge scans : strip-wise pass, the extractors only ever see the bounded proxy
+        scan = await run_cpu_bound(
+            scan_tiled,
+            final_path,
+            max_pixels=settings.max_extract_pixels,
+            tile_pixels=settings.tile_pixels,
+            # Strips run in parallel only within this task's share of the thread budget
+            workers=settings.tile_workers or current_budget().native_threads,
+        )
+        image_bgr = scan.proxy if scan is not None else None
+    else:
+        image_bgr = await run_cpu_bound(read_bgr, final_path)
+    if image_bgr is None:
+        raise ValueError(f"'{original_name}' could not be decoded.")
+    with span("derivatives"):
+        await run_cpu_bound(write_derivatives, image_bgr, final_path)
+
+    with span("extract"):
+        if method == "model":
+            # Pinned for this image : a hot swap mid-request does not mix versions
+            active = await run_in_threadpool(model_registry.active)
+            # Not under `profile_call` : the stages run on other threads and are profiled there ( core.task_graph )
+            palette = await run_cpu_bound(
+                extract_dominant_colors_with_model,
+                image_bgr,
+                n,
+                scorer=active.scorer,
+                similarity_threshold=settings.model_similarity_threshold,
+                tier=tier,
+                executor=stage_executor(),
+                skip_stages=active.info.skip_stages,
+            )
+            return palette, active.version
+        if scan is not None:
+            return await run_cpu_bound(profile_call, extract_dominant_colors_tiled, scan, n), None
+        return await run_cpu_bound(profile_call, extract_dominant_colors, image_bgr, n), None
+
 
-    return palettes_response_payload(palettes_raw, n)
+async def extract_batch_palettes(
+    uploads: list[UploadFile],
+    n_colors: int,
+    *,
+    db_path: Path,
+    upload_dir: Path,
+    method: str = "kmeans",
+    tier: str | None = None,
+) -> dict[str, Any]:
+    extracted = await extract_palettes(
+        uploads,
+        n_colors,
+        db_path=db_path,
+        upload_dir=upload_dir,
+        method=method,
+        tier=tier,
+    )
+    return palettes_response_payload([item["palette"] for item in extracted], clamp_n_colors(n_colors))
 
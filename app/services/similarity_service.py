@@ -0,0 +1,175 @@
+"""
+"Find similar" over the palette history.
+
+Every stored palette has an embedding ( `core.colors.palette_embedding` ) in the
+`palette_embeddings` table, written with the result itself. Each process keeps them in a flat
+float32 matrix and answers top-k by one matrix-vector product ( exact cosine similarity, ~10 ms
+per 100k palettes on one core ). The index catches up incrementally from the table ( rows above
+its highest id ) after each insert and before each search, so several workers stay in sync; a
+new history generation ( bumped by `clear_results` ) triggers a full reload.
+"""
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from core.colors import hex_to_oklab
+from core.colors.palette_embedding import EMBEDDING_DIM, EMBEDDING_VERSION, embed_oklab, embed_palette
+
+from ..storage import (
+    embedding_watermark,
+    get_results_by_ids,
+    list_embeddings,
+    list_unembedded_palettes,
+    save_embeddings,
+)
+from .format_service import to_derivative_urls
+
+
+class PaletteIndex:
+    """Append-only flat vector index ( ids ascending ), with amortized O(1) growth."""
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def max_id(self) -> int:
+        return int(self._ids[self._size - 1]) if self._size else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids = np.empty(0, dtype=np.int64)
+            self._vectors = np.empty((0, self.dim), dtype=np.float32)
+            self._size = 0
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        if len(ids) == 0:
+            return
+        with self._lock:
+            needed = self._size + len(ids)
+            if needed > len(self._ids):
+                capacity = max(needed, 2 * len(self._ids), 1024)
+                grown_ids = np.empty(capacity, dtype=np.int64)
+                grown_vectors = np.empty((capacity, self.dim), dtype=np.float32)
+                grown_ids[: self._size] = self._ids[: self._size]
+                grown_vectors[: self._size] = self._vectors[: self._size]
+                self._ids, self._vectors = grown_ids, grown_vectors
+            self._ids[self._size : needed] = ids
+            self._vectors[self._size : needed] = vectors
+            self._size = needed
+
+    def vector_of(self, result_id: int) -> np.ndarray | None:
+        with self._lock:
+            pos = int(np.searchsorted(self._ids[: self._size], result_id))
+            if pos < self._size and self._ids[pos] == result_id:
+                return self._vectors[pos].copy()
+        return None
+
+    def search(self, query: np.ndarray, k: int, *, exclude: int | None = None) -> list[tuple[int, float]]:
+        with self._lock:
+            ids = self._ids[: self._size]
+            vectors = self._vectors[: self._size]
+        if len(ids) == 0:
+            return []
+        scores = vectors @ query.astype(np.float32)
+        if exclude is not None:
+            scores[ids == exclude] = -np.inf
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+
+palette_index = PaletteIndex(EMBEDDING_DIM)
+_index_generation = 0
+_sync_lock = asyncio.Lock()
+
+
+def embedding_row(palette: list[dict[str, Any]]) -> tuple[int, bytes]:
+    """( version, vector bytes ) for `storage.save_result`."""
+    return EMBEDDING_VERSION, embed_palette(palette).tobytes()
+
+
+async def sync_index(db_path: Path) -> None:
+    global _index_generation
+    async with _sync_lock:
+        max_id, generation = await embedding_watermark(db_path)
+        if generation != _index_generation or max_id < palette_index.max_id:
+            palette_index.clear()
+            _index_generation = generation
+        if max_id > palette_index.max_id:
+            rows = await list_embeddings(db_path, version=EMBEDDING_VERSION, after_id=palette_index.max_id)
+            if rows:
+                ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+                vectors = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+                palette_index.add(ids, vectors)
+
+
+async def load_index(db_path: Path) -> None:
+    """Startup : embed results stored before embeddings ( or with an older descriptor ), then load everything."""
+    missing = await list_unembedded_palettes(db_path, version=EMBEDDING_VERSION)
+    if missing:
+        rows = await run_in_threadpool(
+            lambda: [(result_id, EMBEDDING_VERSION, embed_palette(palette).tobytes()) for result_id, palette in missing]
+        )
+        await save_embeddings(db_path, rows)
+    palette_index.clear()
+    await sync_index(db_path)
+
+
+def _query_from_colors(colors: list[str]) -> np.ndarray:
+    labs = [hex_to_oklab(color) for color in colors if color.strip()]
+    if not labs:
+        raise ValueError("Give at least one hex color.")
+    return embed_oklab(np.array(labs))
+
+
+async def find_similar(
+    db_path: Path,
+    *,
+    result_id: int | None = None,
+    colors: list[str] | None = None,
+    k: int = 10,
+) -> list[dict[str, Any]]:
+    """Top-k stored results closest to a stored result's palette, or to a list of hex colors."""
+    await sync_index(db_path)
+    if result_id is not None:
+        query = palette_index.vector_of(int(result_id))
+        if query is None:
+            raise LookupError(f"Result {result_id} not found.")
+    elif colors:
+        query = _query_from_colors(colors)
+    else:
+        raise ValueError("Pass either result_id or colors.")
+
+    hits = await run_in_threadpool(palette_index.search, query, max(1, min(int(k), 100)), exclude=result_id)
+    rows = await get_results_by_ids(db_path, [hit_id for hit_id, _ in hits])
+    out: list[dict[str, Any]] = []
+    for hit_id, score in hits:
+        row = rows.get(hit_id)
+        if row is None:
+            continue
+        out.append(
+            {
+                "id": row.id,
+                "filename": row.filename,
+                "score": round(score, 4),
+                "n_colors": row.n_colors,
+                "created_at": row.created_at,
+                "hex": [str(color.get("hex", "")) for color in row.palette],
+                **to_derivative_urls(row.image_path),
+            }
+        )
+    return out
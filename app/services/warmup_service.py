@@ -0,0 +1,114 @@
+"""
+Startup warmup and readiness.
+
+A fresh worker pays for lazy initialization on its first request : the scorer's `torch.load`,
+the first torch forward pass, sklearn / OpenMP thread pools, niapy's GWO setup and OpenCV's
+codecs. `warm_up` pays it upfront by loading the model and running a small synthetic image
+through every enabled method and tier. It runs in the background from the lifespan, so the
+process answers `/healthz` right away, while `/readyz` only turns ready once it has finished.
+A failed model step keeps the worker not ready when `model` is a warmed-up method : every model
+request would fail the same way.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import cv2
+import numpy as np
+
+from .. import metrics
+from ..config import settings
+from ..core.extract_colors import extract_dominant_colors
+from ..core.model_extract_colors import extract_dominant_colors_with_model
+from ..model_registry import model_registry
+from ..thread_budget import stage_executor
+
+
+logger = logging.getLogger("iris.warmup")
+
+
+@dataclass
+class WarmupState:
+    ready: bool = False
+    finished: bool = False
+    started_at: float | None = None
+    seconds: float | None = None
+    steps: dict[str, float] = field(default_factory=dict)  # step -> seconds
+    errors: dict[str, str] = field(default_factory=dict)  # step -> error
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "finished": self.finished,
+            "seconds": self.seconds,
+            "steps": self.steps,
+            "errors": self.errors,
+        }
+
+
+warmup_state = WarmupState()
+
+
+def synthetic_image(size: int = 160) -> np.ndarray:
+    """Deterministic BGR test card : a hue / lightness gradient with a few flat blocks, so k-means has real clusters."""
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32)
+    hsv = np.stack([x / size * 179.0, np.full_like(x, 200.0), 80.0 + y / size * 175.0], axis=-1).astype(np.uint8)
+    image = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+    block = size // 4
+    image[:block, :block] = (40, 40, 200)
+    image[-block:, -block:] = (200, 160, 30)
+    return image
+
+
+def _enabled(value: str) -> list[str]:
+    return [item.strip().lower() for item in value.split(",") if item.strip()]
+
+
+def warm_up() -> WarmupState:
+    """Run every enabled warmup step once ( blocking ), then mark the worker ready unless a model step failed. Failures are logged, not raised."""
+    state = warmup_state
+    state.started_at = time.perf_counter()
+    image = synthetic_image()
+    methods = _enabled(settings.warmup_methods)
+    steps: list[tuple[str, Any]] = []
+    if "kmeans" in methods:
+        steps.append(("kmeans", lambda: extract_dominant_colors(image, 5)))
+    if "model" in methods:
+        steps.append(("model_load", model_registry.active))
+        for tier in _enabled(settings.warmup_tiers) or [settings.extraction_tier]:
+            steps.append(
+                (
+                    f"model_{tier}",
+                    lambda tier=tier: extract_dominant_colors_with_model(
+                        image,
+                        5,
+                        scorer=model_registry.active().scorer,
+                        similarity_threshold=settings.model_similarity_threshold,
+                        tier=tier,
+                        executor=stage_executor(),
+                    ),
+                )
+            )
+
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:
+            state.errors[name] = f"{type(exc).__name__}: {exc}"
+            logger.warning("warmup step %s failed: %s", name, exc)
+        state.steps[name] = round(time.perf_counter() - start, 4)
+
+    state.seconds = round(time.perf_counter() - state.started_at, 4)
+    # Only model steps gate readiness : they fail on a missing or corrupt scorer, which every model request would hit too
+    model_failed = "model" in methods and any(name.startswith("model_") for name in state.errors)
+    state.ready = not model_failed
+    state.finished = True
+    metrics.READY.set(1 if state.ready else 0)
+    if model_failed:
+        logger.error("warmup done in %.2fs, model steps failed, worker not ready: %s", state.seconds, state.errors)
+    else:
+        logger.info("warmup done in %.2fs %s", state.seconds, state.steps)
+    return state
@@ -0,0 +1,120 @@
+"""
+Static file serving with HTTP caching.
+
+`CachedStaticFiles` adds `Cache-Control` on top of the ETag / Last-Modified validators Starlette
+already sends : content-addressed names ( uploads are `{sha256[:16]}_{name}`, built assets carry a
+content fingerprint ) are cached for a year as `immutable`, everything else must be revalidated.
+With `precompressed=True` it serves the `.br` / `.gz` sibling written by `scripts.build_assets`
+when the client accepts it.
+
+`asset_url` is the template helper mapping a source path under `app/static` to its fingerprinted
+build ( `app/static/build/manifest.json` ), falling back to the source file when nothing is built.
+"""
+
+import json
+import mimetypes
+import os
+import re
+import stat
+from functools import lru_cache
+from pathlib import Path
+
+import anyio
+from jinja2 import pass_context
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+BUILD_DIR = STATIC_DIR / "build"
+MANIFEST_PATH = BUILD_DIR / "manifest.json"
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+UPLOAD_NAME = re.compile(r"^[0-9a-f]{16}_")
+FINGERPRINTED_NAME = re.compile(r"\.[0-9a-f]{10}\.[A-Za-z0-9]+$")
+# Preferred first
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _accepted_encodings(scope: Scope) -> set[str]:
+    accepted: set[str] = set()
+    for item in Headers(scope=scope).get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name and params.replace(" ", "") not in {"q=0", "q=0.0"}:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class CachedStaticFiles(StaticFiles):
+    def __init__(self, *args, immutable_pattern: re.Pattern[str], precompressed: bool = False, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.immutable_pattern = immutable_pattern
+        self.precompressed = precompressed
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if self.precompressed and scope["method"] in ("GET", "HEAD") and "range" not in Headers(scope=scope):
+            accepted = _accepted_encodings(scope)
+            for encoding, suffix in PRECOMPRESSED:
+                if encoding not in accepted:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+                if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                    return self._cached_response(full_path, stat_result, scope, source_name=path, encoding=encoding)
+        return await super().get_response(path, scope)
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        return self._cached_response(full_path, stat_result, scope, source_name=str(full_path), status_code=status_code)
+
+    def _cached_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        *,
+        source_name: str,
+        encoding: str | None = None,
+        status_code: int = 200,
+    ) -> Response:
+        name = Path(source_name).name
+        headers = {
+            "cache-control": IMMUTABLE_CACHE if self.immutable_pattern.search(name) else REVALIDATE_CACHE,
+        }
+        if self.precompressed:
+            headers["vary"] = "Accept-Encoding"
+        if encoding is not None:
+            headers["content-encoding"] = encoding
+
+        # The media type comes from the source name, not the `.br` / `.gz` sibling
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+@lru_cache(maxsize=1)
+def load_manifest() -> dict[str, str]:
+    # Read once per process : rebuild the assets, then restart the server
+    if not MANIFEST_PATH.exists():
+        return {}
+    return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+
+
+@pass_context
+def asset_url(context, path: str) -> str:
+    return str(context["request"].url_for("static", path=load_manifest().get(path, path)))
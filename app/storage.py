@@ -1,10 +1,12 @@
 import json
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 import aiosqlite
+import orjson
 
 
 @dataclass(frozen=True)
@@ -16,11 +18,12 @@ class PaletteResult:
     palette: list[dict[str, Any]]
     image_path: str
     created_at: str
+    model_version: str | None = None  # scorer model version, None for k-means / animated results
 
 
 def _load_palette(value: Any) -> list[dict[str, Any]]:
     if isinstance(value, str):
-        loaded = json.loads(value)
+        loaded = orjson.loads(value)
         if isinstance(loaded, list):
             return loaded
         return []
@@ -41,11 +44,50 @@ async def init_db(db_path: Path) -> None:
               n_colors INTEGER NOT NULL,
               palette_json TEXT NOT NULL,
               image_path TEXT NOT NULL,
-              created_at TEXT NOT NULL
+              created_at TEXT NOT NULL,
+              model_version TEXT
             )
             """
         )
+        # Databases created before model versions were recorded
+        cur = await conn.execute("PRAGMA table_info(palette_results)")
+        if "model_version" not in {row[1] for row in await cur.fetchall()}:
+            await conn.execute("ALTER TABLE palette_results ADD COLUMN model_version TEXT")
         await conn.execute("CREATE INDEX IF NOT EXISTS idx_palette_results_created_at ON palette_results(created_at)")
+        # Similarity search vectors ( core.colors.palette_embedding ), one per result
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS palette_embeddings (
+              result_id INTEGER PRIMARY KEY REFERENCES palette_results(id) ON DELETE CASCADE,
+              version INTEGER NOT NULL,
+              vector BLOB NOT NULL
+            )
+            """
+        )
+        # Counters shared by the workers : `generation` is bumped whenever results are deleted, so the
+        # in-memory indexes notice a cleared history without counting rows
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS history_meta (
+              key TEXT PRIMARY KEY,
+              value INTEGER NOT NULL
+            )
+            """
+        )
+        await conn.execute("INSERT OR IGNORE INTO history_meta (key, value) VALUES ('generation', 0)")
+        # Color search ( app.services.color_search_service ) : every palette color as an OKLab point
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS palette_colors (
+              result_id INTEGER NOT NULL REFERENCES palette_results(id) ON DELETE CASCADE,
+              rank INTEGER NOT NULL,
+              L REAL NOT NULL,
+              a REAL NOT NULL,
+              b REAL NOT NULL,
+              PRIMARY KEY (result_id, rank)
+            )
+            """
+        )
         await conn.commit()
 
 
@@ -57,19 +99,34 @@ async def save_result(
     n_colors: int,
     palette: list[dict[str, Any]],
     image_path: str,
+    embedding: tuple[int, bytes] | None = None,
+    oklab_colors: list[tuple[float, float, float]] | None = None,
+    model_version: str | None = None,
 ) -> int:
     created_at = datetime.now(timezone.utc).isoformat()
     palette_json = json.dumps(palette, ensure_ascii=False, separators=(",", ":"))
     async with aiosqlite.connect(db_path) as conn:
         cur = await conn.execute(
             """
-            INSERT INTO palette_results (filename, sha256, n_colors, palette_json, image_path, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT INTO palette_results (filename, sha256, n_colors, palette_json, image_path, created_at, model_version)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
             """,
-            (filename, sha256, int(n_colors), palette_json, image_path, created_at),
+            (filename, sha256, int(n_colors), palette_json, image_path, created_at, model_version),
         )
+        result_id = int(cur.lastrowid)
+        if embedding is not None:
+            # Same transaction : a stored result always has its ( version, vector ) row
+            await conn.execute(
+                "INSERT INTO palette_embeddings (result_id, version, vector) VALUES (?, ?, ?)",
+                (result_id, int(embedding[0]), embedding[1]),
+            )
+        if oklab_colors:
+            await conn.executemany(
+                "INSERT INTO palette_colors (result_id, rank, L, a, b) VALUES (?, ?, ?, ?, ?)",
+                [(result_id, rank, float(L), float(a), float(b)) for rank, (L, a, b) in enumerate(oklab_colors)],
+            )
         await conn.commit()
-        return int(cur.lastrowid)
+        return result_id
 
 
 async def get_result(db_path: Path, result_id: int) -> PaletteResult | None:
@@ -77,7 +134,7 @@ async def get_result(db_path: Path, result_id: int) -> PaletteResult | None:
         conn.row_factory = aiosqlite.Row
         cur = await conn.execute(
             """
-            SELECT id, filename, sha256, n_colors, palette_json, image_path, created_at
+            SELECT id, filename, sha256, n_colors, palette_json, image_path, created_at, model_version
             FROM palette_results
             WHERE id = ?
             """,
@@ -97,6 +154,7 @@ async def get_result(db_path: Path, result_id: int) -> PaletteResult | None:
         palette=palette,
         image_path=str(row["image_path"]),
         created_at=str(row["created_at"]),
+        model_version=row["model_version"],
     )
 
 
@@ -105,7 +163,7 @@ async def list_results(db_path: Path, *, limit: int = 20) -> list[PaletteResult]
         conn.row_factory = aiosqlite.Row
         cur = await conn.execute(
             """
-            SELECT id, filename, sha256, n_colors, palette_json, image_path, created_at
+            SELECT id, filename, sha256, n_colors, palette_json, image_path, created_at, model_version
             FROM palette_results
             ORDER BY id DESC
             LIMIT ?
@@ -125,6 +183,7 @@ async def list_results(db_path: Path, *, limit: int = 20) -> list[PaletteResult]
                 palette=_load_palette(row["palette_json"]),
                 image_path=str(row["image_path"]),
                 created_at=str(row["created_at"]),
+                model_version=row["model_version"],
             )
         )
     return out
@@ -132,7 +191,168 @@ async def list_results(db_path: Path, *, limit: int = 20) -> list[PaletteResult]
 
 async def clear_results(db_path: Path) -> None:
     async with aiosqlite.connect(db_path) as conn:
+        await conn.execute("DELETE FROM palette_embeddings")
+        await conn.execute("DELETE FROM palette_colors")
         await conn.execute("DELETE FROM palette_results")
+        await conn.execute("UPDATE history_meta SET value = value + 1 WHERE key = 'generation'")
+        await conn.commit()
+
+
+async def get_results_by_ids(db_path: Path, result_ids: list[int]) -> dict[int, PaletteResult]:
+    if not result_ids:
+        return {}
+    placeholders = ",".join("?" for _ in result_ids)
+    async with aiosqlite.connect(db_path) as conn:
+        conn.row_factory = aiosqlite.Row
+        cur = await conn.execute(
+            f"""
+            SELECT id, filename, sha256, n_colors, palette_json, image_path, created_at, model_version
+            FROM palette_results
+            WHERE id IN ({placeholders})
+            """,
+            [int(result_id) for result_id in result_ids],
+        )
+        rows = await cur.fetchall()
+
+    return {
+        int(row["id"]): PaletteResult(
+            id=int(row["id"]),
+            filename=str(row["filename"]),
+            sha256=str(row["sha256"]),
+            n_colors=int(row["n_colors"]),
+            palette=_load_palette(row["palette_json"]),
+            image_path=str(row["image_path"]),
+            created_at=str(row["created_at"]),
+            model_version=row["model_version"],
+        )
+        for row in rows
+    }
+
+
+def _range_filter(since: str | None, until: str | None, after_id: int, max_id: int | None = None) -> tuple[str, list[Any]]:
+    clauses, params = ["id > ?"], [int(after_id)]
+    if max_id is not None:
+        clauses.append("id <= ?")
+        params.append(int(max_id))
+    if since is not None:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("created_at < ?")
+        params.append(until)
+    return " AND ".join(clauses), params
+
+
+async def export_snapshot(
+    db_path: Path, *, since: str | None = None, until: str | None = None, after_id: int = 0
+) -> tuple[int, int]:
+    """( highest result id, largest palette size ) of the range, read together so they describe the same rows."""
+    where, params = _range_filter(since, until, after_id)
+    async with aiosqlite.connect(db_path) as conn:
+        cur = await conn.execute(
+            f"SELECT COALESCE(MAX(id), 0), COALESCE(MAX(n_colors), 0) FROM palette_results WHERE {where}", params
+        )
+        row = await cur.fetchone()
+    return int(row[0]), int(row[1])
+
+
+async def iter_results(
+    db_path: Path,
+    *,
+    since: str | None = None,
+    until: str | None = None,
+    after_id: int = 0,
+    max_id: int | None = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[list[PaletteResult]]:
+    """
+    Every result in id order, `batch_size` at a time ( keyset paging on id, so memory does not
+    grow with the history and no read transaction stays open between batches ).
+    `since` / `until` : ISO timestamps, inclusive / exclusive bounds on `created_at`.
+    `max_id` : ignore results stored after it ( a consistent snapshot while inserts go on ).
+    """
+    last_id = int(after_id)
+    while True:
+        where, params = _range_filter(since, until, last_id, max_id)
+        async with aiosqlite.connect(db_path) as conn:
+            cur = await conn.execute(
+                f"""
+                SELECT id, filename, sha256, n_colors, palette_json, image_path, created_at, model_version
+                FROM palette_results
+                WHERE {where}
+                ORDER BY id
+                LIMIT ?
+                """,
+                [*params, int(batch_size)],
+            )
+            rows = await cur.fetchall()
+        if not rows:
+            return
+        # Plain tuples : name lookups on aiosqlite.Row add up over a full history
+        yield [
+            PaletteResult(
+                id=int(row[0]),
+                filename=str(row[1]),
+                sha256=str(row[2]),
+                n_colors=int(row[3]),
+                palette=_load_palette(row[4]),
+                image_path=str(row[5]),
+                created_at=str(row[6]),
+                model_version=row[7],
+            )
+            for row in rows
+        ]
+        last_id = int(rows[-1][0])
+        if len(rows) < batch_size:
+            return
+
+
+# `SELECT MAX(result_id) FROM ...` alone is a single index seek; anything around it ( COALESCE, COUNT )
+# would scan the table
+_GENERATION = "COALESCE((SELECT value FROM history_meta WHERE key = 'generation'), 0)"
+
+
+async def embedding_watermark(db_path: Path) -> tuple[int, int]:
+    """( highest result id, history generation ) of `palette_embeddings`, to tell whether an in-memory index is stale."""
+    async with aiosqlite.connect(db_path) as conn:
+        cur = await conn.execute(f"SELECT COALESCE((SELECT MAX(result_id) FROM palette_embeddings), 0), {_GENERATION}")
+        row = await cur.fetchone()
+    return int(row[0]), int(row[1])
+
+
+async def list_embeddings(db_path: Path, *, version: int, after_id: int = 0) -> list[tuple[int, bytes]]:
+    async with aiosqlite.connect(db_path) as conn:
+        cur = await conn.execute(
+            "SELECT result_id, vector FROM palette_embeddings WHERE result_id > ? AND version = ? ORDER BY result_id",
+            (int(after_id), int(version)),
+        )
+        rows = await cur.fetchall()
+    return [(int(row[0]), bytes(row[1])) for row in rows]
+
+
+async def list_unembedded_palettes(db_path: Path, *, version: int) -> list[tuple[int, list[dict[str, Any]]]]:
+    """Results stored before embeddings existed, or embedded with another descriptor version."""
+    async with aiosqlite.connect(db_path) as conn:
+        cur = await conn.execute(
+            """
+            SELECT r.id, r.palette_json
+            FROM palette_results AS r
+            LEFT JOIN palette_embeddings AS e ON e.result_id = r.id
+            WHERE e.result_id IS NULL OR e.version != ?
+            ORDER BY r.id
+            """,
+            (int(version),),
+        )
+        rows = await cur.fetchall()
+    return [(int(row[0]), _load_palette(row[1])) for row in rows]
+
+
+async def save_embeddings(db_path: Path, rows: list[tuple[int, int, bytes]]) -> None:
+    async with aiosqlite.connect(db_path) as conn:
+        await conn.executemany(
+            "INSERT OR REPLACE INTO palette_embeddings (result_id, version, vector) VALUES (?, ?, ?)",
+            rows,
+        )
         await conn.commit()
 
 
@@ -142,3 +362,43 @@ async def list_image_paths(db_path: Path) -> list[str]:
         rows = await cur.fetchall()
     return [str(row[0]) for row in rows if row and row[0]]
 
+
+async def palette_colors_watermark(db_path: Path) -> tuple[int, int]:
+    """( highest result id, history generation ) of `palette_colors`."""
+    async with aiosqlite.connect(db_path) as conn:
+        cur = await conn.execute(f"SELECT COALESCE((SELECT MAX(result_id) FROM palette_colors), 0), {_GENERATION}")
+        row = await cur.fetchone()
+    return int(row[0]), int(row[1])
+
+
+async def list_palette_colors(db_path: Path, *, after_id: int = 0) -> list[tuple[int, int, float, float, float]]:
+    async with aiosqlite.connect(db_path) as conn:
+        cur = await conn.execute(
+            "SELECT result_id, rank, L, a, b FROM palette_colors WHERE result_id > ? ORDER BY result_id, rank",
+            (int(after_id),),
+        )
+        rows = await cur.fetchall()
+    return [(int(row[0]), int(row[1]), float(row[2]), float(row[3]), float(row[4])) for row in rows]
+
+
+async def list_palettes_without_colors(db_path: Path) -> list[tuple[int, list[dict[str, Any]]]]:
+    async with aiosqlite.connect(db_path) as conn:
+        cur = await conn.execute(
+            """
+            SELECT r.id, r.palette_json
+            FROM palette_results AS r
+            WHERE NOT EXISTS (SELECT 1 FROM palette_colors AS c WHERE c.result_id = r.id)
+            ORDER BY r.id
+            """
+        )
+        rows = await cur.fetchall()
+    return [(int(row[0]), _load_palette(row[1])) for row in rows]
+
+
+async def save_palette_colors(db_path: Path, rows: list[tuple[int, int, float, float, float]]) -> None:
+    async with aiosqlite.connect(db_path) as conn:
+        await conn.executemany(
+            "INSERT OR REPLACE INTO palette_colors (result_id, rank, L, a, b) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        await conn.commit()
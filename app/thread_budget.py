@@ -0,0 +1,196 @@
+"""
+CPU thread budget for extraction.
+
+Each extraction can fan out into native threads of its own ( sklearn KMeans and saliency through
+OpenMP, NumPy through BLAS, torch intra-op ), so N concurrent requests on the default threadpool
+ask for N x cores threads and spend the CPU on context switches. Instead :
+
+- the budget is the CPUs this process may actually use : the cgroup quota ( v2 `cpu.max` or v1
+  `cpu.cfs_quota_us` ), capped by the CPU affinity mask, unless `THREAD_BUDGET` is set;
+- CPU-heavy work runs on one dedicated executor of `budget // native_threads` threads
+  ( `run_cpu_bound` ), and every native pool is pinned to `native_threads` per task
+  ( threadpoolctl for BLAS / OpenMP, `torch.set_num_threads` ), so
+  executor threads x native threads never exceeds the budget.
+
+Light I/O-bound calls ( file checks, SQLite, index lookups ) stay on the default threadpool.
+Within one model extraction, the independent extractors run on a shared `stage_executor` of
+single-threaded tasks, so an image's latency is not the sum of its seven extractors. Its threads
+are taken out of the budget ( the CPU executor gets `( budget - stage threads ) // native_threads` ),
+and the task that submitted them only waits meanwhile.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from .config import settings
+
+
+logger = logging.getLogger("iris.threads")
+T = TypeVar("T")
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+@dataclass(frozen=True)
+class ThreadBudget:
+    cpus: int  # threads the process may keep busy
+    workers: int  # concurrent CPU-bound tasks ( executor size )
+    native_threads: int  # BLAS / OpenMP / torch threads per task
+    stage_workers: int  # single-threaded extractor stage threads, 0 = stages run sequentially
+    source: str  # where `cpus` came from : setting, cgroup or affinity
+
+
+def _own_cgroup_dirs() -> list[Path]:
+    """The process's own cgroup directories ( v2 unified entry or v1 cpu controller ), then the mount roots."""
+    dirs: list[Path] = []
+    try:
+        lines = Path("/proc/self/cgroup").read_text().splitlines()
+    except OSError:
+        lines = []
+    for line in lines:
+        _, controllers, rel = line.split(":", 2)
+        rel = rel.lstrip("/")
+        if controllers == "":
+            dirs.append(CGROUP_ROOT / rel)
+        elif "cpu" in controllers.split(","):
+            dirs.extend([CGROUP_ROOT / "cpu" / rel, CGROUP_ROOT / "cpu,cpuacct" / rel])
+    return dirs + [CGROUP_ROOT, CGROUP_ROOT / "cpu", CGROUP_ROOT / "cpu,cpuacct"]
+
+
+def cgroup_cpu_quota() -> float | None:
+    """CPUs allowed by the cgroup CFS quota, None when unlimited or not in a cgroup."""
+    for directory in _own_cgroup_dirs():
+        try:
+            quota, period = (directory / "cpu.max").read_text().split()[:2]
+            if quota == "max":
+                return None
+            return int(quota) / int(period)
+        except (OSError, ValueError):
+            pass
+        try:
+            quota_us = int((directory / "cpu.cfs_quota_us").read_text())
+            period_us = int((directory / "cpu.cfs_period_us").read_text())
+            return quota_us / period_us if quota_us > 0 and period_us > 0 else None
+        except (OSError, ValueError):
+            pass
+    return None
+
+
+def detect_cpus() -> tuple[int, str]:
+    """( usable CPUs, source ). A fractional quota rounds down : running over it only gets the process throttled."""
+    if settings.thread_budget > 0:
+        return settings.thread_budget, "setting"
+    try:
+        affinity = len(os.sched_getaffinity(0))
+    except AttributeError:
+        affinity = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    if quota is not None and quota < affinity:
+        return max(1, math.floor(quota)), "cgroup"
+    return max(1, affinity), "affinity"
+
+
+def _stage_workers(cpus: int, native: int) -> int:
+    requested = settings.extract_stage_workers or cpus // 2
+    # What is left must still run one CPU-bound task with its native threads
+    stage_workers = min(requested, cpus - native)
+    return stage_workers if stage_workers > 1 else 0
+
+
+def compute_budget() -> ThreadBudget:
+    cpus, source = detect_cpus()
+    native = max(1, min(settings.extract_native_threads, cpus))
+    stage_workers = _stage_workers(cpus, native)
+    workers = settings.extract_workers or max(1, (cpus - stage_workers) // native)
+    return ThreadBudget(cpus=cpus, workers=workers, native_threads=native, stage_workers=stage_workers, source=source)
+
+
+def _pin_native_threads(native_threads: int) -> None:
+    # Process-wide for BLAS and torch; the OpenMP thread count is per calling thread, hence
+    # also called in every executor thread
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(limits=native_threads)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(native_threads)
+
+
+def _pin_stage_thread() -> None:
+    # Only this thread's OpenMP pool : BLAS and torch limits are process-wide and belong to the CPU executor
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(limits=1, user_api="openmp")
+
+
+_budget: ThreadBudget | None = None
+_executor: ThreadPoolExecutor | None = None
+_stage_executor: ThreadPoolExecutor | None = None
+
+
+def configure() -> ThreadBudget:
+    """Size the CPU and stage executors and pin native thread pools. Called from the app lifespan; idempotent."""
+    global _budget, _executor, _stage_executor
+    if _budget is not None:
+        return _budget
+    budget = compute_budget()
+    _pin_native_threads(budget.native_threads)
+    _executor = ThreadPoolExecutor(
+        max_workers=budget.workers,
+        thread_name_prefix="iris-cpu",
+        initializer=_pin_native_threads,
+        initargs=(budget.native_threads,),
+    )
+    if budget.stage_workers:
+        _stage_executor = ThreadPoolExecutor(
+            max_workers=budget.stage_workers,
+            thread_name_prefix="iris-stage",
+            initializer=_pin_stage_thread,
+        )
+    _budget = budget
+    logger.info(
+        "thread budget : %d CPUs ( %s ), %d workers x %d native threads + %d stage threads",
+        budget.cpus,
+        budget.source,
+        budget.workers,
+        budget.native_threads,
+        budget.stage_workers,
+    )
+    return budget
+
+
+def current_budget() -> ThreadBudget:
+    return _budget or configure()
+
+
+def stage_executor() -> ThreadPoolExecutor | None:
+    """Executor for the extractor stages of one image ( `core.task_graph` ), None when the budget has no stage threads."""
+    current_budget()
+    return _stage_executor
+
+
+def shutdown() -> None:
+    global _budget, _executor, _stage_executor
+    for executor in (_executor, _stage_executor):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    _budget, _executor, _stage_executor = None, None, None
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """`run_in_threadpool` for CPU-heavy work : runs on the budgeted executor, with the caller's context ( timing spans )."""
+    current_budget()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_executor, call)
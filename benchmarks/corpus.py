@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+COMPLEXITIES = ("flat", "gradient", "noisy")
+DEFAULT_RESOLUTIONS = ((256, 256), (1024, 768), (2048, 1536))
+
+
+@dataclass(frozen=True)
+class CorpusImage:
+    name: str
+    path: Path
+    width: int
+    height: int
+    complexity: str
+
+
+def synth_image(width: int, height: int, complexity: str, seed: int = 0) -> np.ndarray:
+    """Deterministic BGR test image. `flat` = few solid regions, `gradient` = smooth ramps, `noisy` = photo-like."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    u = xx / max(width - 1, 1)
+    v = yy / max(height - 1, 1)
+
+    if complexity == "flat":
+        colors = rng.integers(0, 256, size=(6, 3))
+        region = (np.floor(u * 3).astype(np.int32) + 3 * (v > 0.5)).clip(0, 5)
+        return colors[region].astype(np.uint8)
+
+    if complexity == "gradient":
+        img = np.stack([255 * u, 255 * v, 255 * (1.0 - u) * (1.0 - v)], axis=-1)
+        return np.clip(img, 0, 255).astype(np.uint8)
+
+    if complexity == "noisy":
+        base = np.stack([180 * u + 40, 120 * v + 60, 200 * (1.0 - u * v)], axis=-1)
+        # A handful of saturated blobs on top of the ramps, then sensor-like noise
+        for _ in range(12):
+            cx, cy = rng.random(2)
+            radius = 0.05 + 0.15 * rng.random()
+            blob = ((u - cx) ** 2 + (v - cy) ** 2) < radius**2
+            base[blob] = rng.integers(0, 256, size=3)
+        base += rng.normal(0.0, 12.0, size=base.shape)
+        return np.clip(base, 0, 255).astype(np.uint8)
+
+    raise ValueError(f"Unknown complexity: {complexity}")
+
+
+def build_corpus(
+    directory: Path,
+    resolutions=DEFAULT_RESOLUTIONS,
+    complexities=COMPLEXITIES,
+    seed: int = 0,
+) -> list[CorpusImage]:
+    """Write ( or reuse ) the synthetic corpus as PNG files, since the extractors read from paths."""
+    directory.mkdir(parents=True, exist_ok=True)
+    images: list[CorpusImage] = []
+    for width, height in resolutions:
+        for complexity in complexities:
+            name = f"{complexity}_{width}x{height}"
+            path = directory / f"{name}_s{seed}.png"
+            if not path.exists():
+                cv2.imwrite(str(path), synth_image(width, height, complexity, seed))
+            images.append(CorpusImage(name=name, path=path, width=width, height=height, complexity=complexity))
+    return images
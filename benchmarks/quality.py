@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from core.colors.color_hex import hex_to_rgb
+from core.colors.color_oklch import _rgb_to_oklab_vectorized
+
+
+def hex_palette_to_oklab(hexes: list[str]) -> np.ndarray:
+    if not hexes:
+        return np.zeros((0, 3), dtype=np.float64)
+    rgb = np.array([hex_to_rgb(h) for h in hexes], dtype=np.float64) / 255.0
+    return _rgb_to_oklab_vectorized(rgb)
+
+
+def matched_delta_e(palette: np.ndarray, reference: np.ndarray) -> dict[str, float]:
+    """
+    Order-free palette distance : colors are paired by a Hungarian match on OKLab distance ( ΔE_ok ).
+    `mean` / `max` are over matched pairs; `unmatched` counts colors present in only one palette.
+    """
+    if len(palette) == 0 or len(reference) == 0:
+        return {"mean": float("nan"), "max": float("nan"), "unmatched": float(abs(len(palette) - len(reference)))}
+    cost = np.linalg.norm(palette[:, None, :] - reference[None, :, :], axis=-1)
+    rows, cols = linear_sum_assignment(cost)
+    matched = cost[rows, cols]
+    return {
+        "mean": float(matched.mean()),
+        "max": float(matched.max()),
+        "unmatched": float(abs(len(palette) - len(reference))),
+    }
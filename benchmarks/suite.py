@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import numpy as np
+
+from .corpus import CorpusImage
+
+
+def image_cases(model) -> dict[str, Callable[[str], Any]]:
+    """Per-image hot paths, each called with an image path. `model` : an `app.model_registry.ActiveModel`."""
+    from app.core.extract_colors import extract_dominant_colors
+    from app.core.model_extract_colors import extract_dominant_colors_with_model
+    from core.ai import (
+        extract_top10_area_ratio_oklab,
+        extract_top10_chroma_saliency_oklab,
+        extract_top10_gwo,
+        extract_top10_kmeans,
+        extract_top10_lightness_ratio_oklab,
+        extract_top10_saliency,
+        extract_top10_similar_area_oklab,
+    )
+
+    return {
+        "gwo": lambda path: extract_top10_gwo(path, 10),
+        "kmeans": lambda path: extract_top10_kmeans(path, 10),
+        "saliency": lambda path: extract_top10_saliency(path, 10),
+        "area_ratio": lambda path: extract_top10_area_ratio_oklab(path, 10),
+        "similar_area": lambda path: extract_top10_similar_area_oklab(path, 10),
+        "chroma_saliency": lambda path: extract_top10_chroma_saliency_oklab(path, 10),
+        "lightness_ratio": lambda path: extract_top10_lightness_ratio_oklab(path, 10),
+        "extract_dominant_colors": lambda path: extract_dominant_colors(path, 10),
+        "extract_dominant_colors_with_model": lambda path: extract_dominant_colors_with_model(
+            path, 10, scorer=model.scorer, skip_stages=model.info.skip_stages
+        ),
+    }
+
+
+def converter_cases(seed: int = 0) -> dict[str, Callable[[], Any]]:
+    """`core.colors` converters over fixed, deterministic inputs."""
+    from core.colors.color_oklab import oklab_to_hex
+    from core.colors.color_oklch import _rgb_to_oklab_vectorized, hex_to_oklch
+
+    rng = np.random.default_rng(seed)
+    rgb_unit = rng.random((1_000_000, 3))
+    hexes = ["#{:02x}{:02x}{:02x}".format(*c) for c in rng.integers(0, 256, size=(10_000, 3))]
+    labs = np.column_stack([rng.random(1_000), rng.uniform(-0.3, 0.3, 1_000), rng.uniform(-0.3, 0.3, 1_000)])
+
+    return {
+        "rgb_to_oklab_vectorized[1M px]": lambda: _rgb_to_oklab_vectorized(rgb_unit),
+        "hex_to_oklch[10k]": lambda: [hex_to_oklch(h) for h in hexes],
+        "oklab_to_hex[1k]": lambda: [oklab_to_hex(*lab) for lab in labs],
+    }
+
+
+def measure(fn: Callable[[], Any], *, repeat: int = 3, warmup: int = 1) -> dict[str, Any]:
+    """
+    Wall / CPU time over `repeat` runs plus peak traced memory of one extra run.
+    CPU time is process-wide, so it includes BLAS / OpenMP worker threads.
+    Memory is measured separately because tracemalloc slows the timed runs down.
+    """
+    for _ in range(warmup):
+        fn()
+
+    wall: list[float] = []
+    cpu: list[float] = []
+    for _ in range(max(1, repeat)):
+        c0 = time.process_time()
+        w0 = time.perf_counter()
+        fn()
+        wall.append(time.perf_counter() - w0)
+        cpu.append(time.process_time() - c0)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_s": statistics.median(wall),
+        "wall_min_s": min(wall),
+        "cpu_s": statistics.median(cpu),
+        "peak_mem_mb": peak / (1024 * 1024),
+        "runs": len(wall),
+    }
+
+
+def run_suite(
+    images: list[CorpusImage],
+    *,
+    model,
+    repeat: int = 3,
+    warmup: int = 1,
+    selected: Callable[[str], bool] = lambda name: True,
+    progress: Callable[[str, dict[str, Any]], None] | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Run every selected case. Keys are `function@image` ( or the converter name ). Failures are recorded, not raised."""
+    results: dict[str, dict[str, Any]] = {}
+
+    def _run(key: str, fn: Callable[[], Any]) -> None:
+        try:
+            result = measure(fn, repeat=repeat, warmup=warmup)
+        except Exception as exc:
+            result = {"error": f"{type(exc).__name__}: {exc}"}
+        results[key] = result
+        if progress is not None:
+            progress(key, result)
+
+    for name, fn in image_cases(model).items():
+        if not selected(name):
+            continue
+        for image in images:
+            _run(f"{name}@{image.name}", lambda fn=fn, path=str(image.path): fn(path))
+
+    for name, fn in converter_cases().items():
+        if selected(name):
+            _run(name, fn)
+
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    *,
+    time_threshold: float = 0.25,
+    memory_threshold: float = 0.25,
+) -> list[dict[str, Any]]:
+    """Cases whose median wall time or peak memory grew by more than the relative threshold."""
+    regressions: list[dict[str, Any]] = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base or "error" in base or "error" in current:
+            continue
+        for metric, threshold in (("wall_s", time_threshold), ("peak_mem_mb", memory_threshold)):
+            before = float(base[metric])
+            after = float(current[metric])
+            if before > 0 and after > before * (1.0 + threshold):
+                regressions.append(
+                    {
+                        "case": key,
+                        "metric": metric,
+                        "baseline": before,
+                        "current": after,
+                        "ratio": after / before,
+                    }
+                )
+    return regressions
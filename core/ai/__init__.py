@@ -1,7 +1,7 @@
 """AI-oriented color extraction modules."""
 
-from .main_extractors.gwo_extraction import extract_top10_gwo
-from .main_extractors.saliency_extraction import extract_top10_saliency
+from .main_extractors.gwo_extraction import extract_top10_gwo, set_gwo_refinement
+from .main_extractors.saliency_extraction import compute_saliency_weights, extract_top10_saliency
 from .main_extractors.k_means_extractor import extract_top10_kmeans
 
 from .feature_extractors.area_ratio_extraction import extract_top10_area_ratio_oklab
@@ -9,12 +9,19 @@ from .feature_extractors.chroma_saliency_extraction import extract_top10_chroma_
 from .feature_extractors.lightness_ratio_extraction import extract_top10_lightness_ratio_oklab
 from .feature_extractors.similar_area_extraction import extract_top10_similar_area_oklab
 
+from .tiers import TIERS, ExtractionTier, get_tier
+
 __all__ = [
     "extract_top10_gwo",
+    "set_gwo_refinement",
     "extract_top10_saliency",
+    "compute_saliency_weights",
     "extract_top10_kmeans",
     "extract_top10_area_ratio_oklab",
     "extract_top10_similar_area_oklab",
     "extract_top10_chroma_saliency_oklab",
     "extract_top10_lightness_ratio_oklab",
+    "ExtractionTier",
+    "TIERS",
+    "get_tier",
 ]
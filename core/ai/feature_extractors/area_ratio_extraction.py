@@ -1,12 +1,12 @@
 from __future__ import annotations
-from pathlib import Path
 import cv2
 import numpy as np
 
 from core.colors.color_oklch import _rgb_to_oklab_vectorized
+from core.image_io import ImageInput, read_bgr
 
 def extract_top10_area_ratio_oklab(
-    image_path: str | Path,
+    image_path: ImageInput,
     k: int = 10,
     bins_per_channel: int = 32,
 ) -> dict:
@@ -15,7 +15,7 @@ def extract_top10_area_ratio_oklab(
     if not (1 <= bins_per_channel <= 256):
         raise ValueError(f"bins_per_channel must be in [1, 256], got {bins_per_channel}")
 
-    img_bgr = cv2.imread(str(image_path))
+    img_bgr = read_bgr(image_path)
     if img_bgr is None:
         raise ValueError(f"Unable to read image: {image_path}")
 
@@ -1,10 +1,10 @@
 from __future__ import annotations
-from pathlib import Path
 import cv2
 import numpy as np
 from sklearn.cluster import KMeans
 
-from core.colors.color_oklch import _rgb_to_oklab_vectorized
+from core.colors.color_oklch import rgb8_to_oklab
+from core.image_io import ImageInput, read_bgr
 
 def _center_to_record(rank: int, center: np.ndarray, ratio: float, mean_chroma: float) -> dict:
     return {
@@ -16,14 +16,15 @@ def _center_to_record(rank: int, center: np.ndarray, ratio: float, mean_chroma:
     }
 
 def extract_top10_chroma_saliency_oklab(
-    image_path: str | Path,
+    image_path: ImageInput,
     k: int = 10,
     sample_ratio: float = 0.35,
     max_samples: int = 40000,
     random_state: int = 42,
     saliency_gain: float = 2.5,
+    n_init: int = 10,
 ) -> dict:
-    img_bgr = cv2.imread(str(image_path))
+    img_bgr = read_bgr(image_path)
     if img_bgr is None:
         raise ValueError(f"Unable to read image: {image_path}")
 
@@ -44,8 +45,7 @@ def extract_top10_chroma_saliency_oklab(
     sample_idx = rng.choice(n, sample_n, replace=False)
     sampled_rgb = pixels_rgb[sample_idx]
 
-    rgb_unit = np.clip(sampled_rgb.astype(np.float64) / 255.0, 0.0, 1.0)
-    sampled_oklab = _rgb_to_oklab_vectorized(rgb_unit)
+    sampled_oklab = rgb8_to_oklab(sampled_rgb)
 
     # Calculate chroma and weight
     chroma = np.sqrt(sampled_oklab[:, 1] ** 2 + sampled_oklab[:, 2] ** 2)
@@ -55,7 +55,7 @@ def extract_top10_chroma_saliency_oklab(
     weights = 1.0 + saliency_gain * chroma_norm
 
     # K-Means
-    kmeans = KMeans(n_clusters=effective_k, n_init=10, random_state=random_state)
+    kmeans = KMeans(n_clusters=effective_k, n_init=n_init, random_state=random_state)
     kmeans.fit(sampled_oklab, sample_weight=weights)
     
     labels = kmeans.labels_
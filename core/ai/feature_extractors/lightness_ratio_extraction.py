@@ -1,18 +1,19 @@
-from pathlib import Path
 import cv2
 import numpy as np
 from sklearn.cluster import KMeans
 from core.colors.color_oklch import _rgb_to_oklab_vectorized
+from core.image_io import ImageInput, read_bgr
 
 def extract_top10_lightness_ratio_oklab(
-    image_path: str | Path,
+    image_path: ImageInput,
     k: int = 10,
     max_samples: int = 40000,
     random_state: int = 42,
     contrast_gain: float = 2.0,
+    n_init: int = 3,
 ) -> dict:
     # Secure reading and basic defense
-    img_bgr = cv2.imread(str(image_path))
+    img_bgr = read_bgr(image_path)
     if img_bgr is None:
         raise ValueError(f"Unable to read image or file does not exist : {image_path}")
     
@@ -41,7 +42,7 @@ def extract_top10_lightness_ratio_oklab(
     edge_strength = np.abs(lightness - 0.5) * 2.0
     weights = 1.0 + contrast_gain * np.clip(edge_strength, 0.0, 1.0)
 
-    kmeans = KMeans(n_clusters=effective_k, n_init=3, init='k-means++', random_state=random_state)
+    kmeans = KMeans(n_clusters=effective_k, n_init=n_init, init='k-means++', random_state=random_state)
     labels = kmeans.fit_predict(sampled_oklab, sample_weight=weights)
     centers = kmeans.cluster_centers_
 
@@ -1,19 +1,19 @@
 from __future__ import annotations
-from pathlib import Path
 import cv2
 import numpy as np
 from sklearn.cluster import MiniBatchKMeans
 
-from core.colors.color_oklch import _rgb_to_oklab_vectorized
+from core.colors.color_oklch import rgb8_to_oklab
+from core.image_io import ImageInput, read_bgr
 
 def extract_top10_similar_area_oklab(
-    image_path: str | Path,
+    image_path: ImageInput,
     k: int = 10,
     max_samples: int = 40000,
     random_state: int = 42,
 ) -> dict:
     # 1. Securely read images
-    img_bgr = cv2.imread(str(image_path))
+    img_bgr = read_bgr(image_path)
     if img_bgr is None:
         raise ValueError(f"Could not open or find the image: {image_path}")
 
@@ -29,7 +29,7 @@ def extract_top10_similar_area_oklab(
     sampled_rgb = rng.choice(pixels, sample_n, axis=0, replace=False)
 
     # 3. Vectorized color conversion
-    sampled_oklab = _rgb_to_oklab_vectorized(sampled_rgb.astype(np.float64) / 255.0)
+    sampled_oklab = rgb8_to_oklab(sampled_rgb)
 
     # 4. Improve clustering speed using MiniBatchKMeans
     kmeans = MiniBatchKMeans(
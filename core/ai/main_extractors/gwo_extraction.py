@@ -5,6 +5,12 @@
 # 2) Diversity penalty: discourages very similar centers for a more distinct palette.
 # It returns 10 RGB colors. The final order is sorted by OKLab lightness (L) in
 # descending order, not by pixel-frequency dominance.
+# The run stops early once the best fitness stagnates ( no relative improvement
+# beyond `tol` for `patience` iterations ), since the k-means seed is often
+# already close to optimal.
+# The GWO refinement itself is off by default ( `set_gwo_refinement` ) : before the
+# niapy 2.x seeding fix it never ran, every palette was the k-means seed, and the
+# scorer model was trained on those features.
 
 import numpy as np
 import cv2
@@ -20,16 +26,57 @@ class KMeansSeededGWO(GreyWolfOptimizer):
         self._seed_pop = seed_population  # shape: (pop_size, dim)
 
     def init_population(self, task):
-        # Call the parent class to obtain the population in the standard format
-        pop, fpop, d = super().init_population(task)
-        # Replace the random initialization with k-means seeds
-        for i, individual in enumerate(pop):
-            individual.x = self._seed_pop[i].copy()
-            individual.f = task.eval(individual.x)
+        # niapy keeps the population as a plain ndarray and tracks alpha / beta / delta in the
+        # params dict, so evaluate the k-means seeds directly instead of a random population
+        pop = np.array(self._seed_pop[: self.population_size], dtype=np.float64)
+        fpop = np.array([task.eval(x) for x in pop], dtype=np.float64)
+        si = np.argsort(fpop)
+        d = {
+            'alpha': pop[si[0]].copy(),
+            'alpha_fitness': fpop[si[0]],
+            'beta': pop[si[1]].copy(),
+            'beta_fitness': fpop[si[1]],
+            'delta': pop[si[2]].copy(),
+            'delta_fitness': fpop[si[2]],
+        }
         return pop, fpop, d
 
-from core.colors.color_oklch import _linear_rgb_to_oklab, _srgb_channel_to_linear
+class StagnationTask(Task):
+    """Task that also stops when the best fitness has not improved by more than `tol` ( relative ) for `patience` iterations."""
+    def __init__(self, problem, patience=None, tol=1e-4, **kwargs):
+        super().__init__(problem, **kwargs)
+        self.patience = patience
+        self.tol = tol
+        self.stalled_iters = 0
+        self._stall_best = np.inf
+
+    def next_iter(self):
+        super().next_iter()
+        if self.patience is None:
+            return
+        if not np.isfinite(self._stall_best) or self.x_f < self._stall_best - self.tol * abs(self._stall_best):
+            self._stall_best = self.x_f
+            self.stalled_iters = 0
+        else:
+            self.stalled_iters += 1
+
+    @property
+    def stagnated(self):
+        return self.patience is not None and self.stalled_iters >= self.patience
+
+    def stopping_condition(self):
+        return self.stagnated or super().stopping_condition()
+
+from core.colors.color_oklch import _linear_rgb_to_oklab, _srgb_channel_to_linear, rgb8_to_oklab
 from core.colors.color_oklab import oklab_to_hex
+from core.image_io import read_bgr
+
+_REFINE = False
+
+def set_gwo_refinement(enabled: bool) -> None:
+    """Process default of `extract_top10_gwo(refine=None)` ( the app's `GWO_REFINE` )."""
+    global _REFINE
+    _REFINE = bool(enabled)
 
 def rgb_to_oklab_pixel(r, g, b):
     lr = _srgb_channel_to_linear(r)
@@ -41,19 +88,27 @@ class OklabColorQuant(Problem):
     def __init__(self, pixels, k=10):
         self.pixels = pixels
         self.k = k
+        # |p - c|^2 = |p|^2 - 2 p.c + |c|^2 : the |p|^2 term does not depend on the centers,
+        # so its mean is added once and each evaluation is a single (k, 3) x (3, n) product.
+        # Laid out (k, n), the nearest-center min reduces over contiguous rows ( several times
+        # faster than a min over the short rows of an (n, k) matrix )
+        self._neg2_pixels_t = np.ascontiguousarray(-2.0 * pixels.T)
+        self._mean_pixel_sq = float(np.mean(np.einsum("ij,ij->i", pixels, pixels)))
         lower = np.tile([0.0, -0.5, -0.5], k)
         upper = np.tile([1.0, 0.5, 0.5], k)
         super().__init__(dimension=k*3, lower=lower, upper=upper)
 
     def _evaluate(self, x):
-        centers = x.reshape(self.k, 3)
+        # niapy positions are float64 : evaluate in the pixels' dtype, float32 pixels stay float32
+        centers = x.reshape(self.k, 3).astype(self.pixels.dtype, copy=False)
 
         # Term 1: Mean Squared Error ( Reconstruction Error )
         # Computes the average squared distance between each pixel and its nearest cluster center.
         # This is equivalent to the k-means objective, ensuring that the palette faithfully
         # represents the true color distribution of the image.
-        dists = np.sum((self.pixels[:, None] - centers)**2, axis=-1)
-        mse = np.mean(np.min(dists, axis=1))
+        dists = centers @ self._neg2_pixels_t
+        dists += np.einsum("ij,ij->i", centers, centers)[:, None]
+        mse = np.mean(np.min(dists, axis=0)) + self._mean_pixel_sq
 
         # Term 2: Diversity Penalty ( Key advantage of GWO over k-means )
         # Background:
@@ -82,33 +137,12 @@ class OklabColorQuant(Problem):
         diversity_penalty = 1.0 / (min_pairwise_dist + 1e-8) # Avoid division by zero
 
         lam = 0.05 # Weight of the diversity penalty ( λ )
-        return mse + lam * diversity_penalty
-
-def extract_top10_gwo(image_path, k=10, sample_ratio=0.3, pop_size=60, max_evals=20000):
-    img_bytes = np.fromfile(image_path, dtype=np.uint8)
-    img = cv2.imdecode(img_bytes, cv2.IMREAD_COLOR)
-    if img is None:
-        raise ValueError("Failed to decode image from path.")
-    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB) / 255.0
-
-    # Flatten and sample pixels: increase sampling ratio to 30%,
-    # with an upper limit of 30,000 pixels to avoid excessive computation
-    pixels_rgb = img.reshape(-1, 3)
-    n = len(pixels_rgb)
-    sample_n = min(int(n * sample_ratio), 30000)
-    idx = np.random.choice(n, sample_n, replace=False)
-    sampled_rgb = pixels_rgb[idx]
-
-    # Convert sampled pixels to OKLab color space
-    pixels_oklab = np.array([rgb_to_oklab_pixel(*p) for p in sampled_rgb], dtype=np.float64)
-
-    # Use k-means++ to obtain a strong initialization, then refine with GWO
-    kmeans = KMeans(n_clusters=k, init="k-means++", n_init=3, random_state=42)
-    kmeans.fit(pixels_oklab)
-    km_centers = kmeans.cluster_centers_.flatten()  # shape: (k*3,)
+        return float(mse + lam * diversity_penalty)
 
+def _refine_with_gwo(pixels_oklab, km_centers, k, pop_size, max_evals, patience, tol):
+    """( centers (k, 3), stats ) of a GWO run seeded with the k-means centers."""
     problem = OklabColorQuant(pixels_oklab, k=k)
-    task = Task(problem, max_evals=max_evals)
+    task = StagnationTask(problem, patience=patience, tol=tol, max_evals=max_evals)
 
     # Build initial population:
     # First individual = k-means solution
@@ -121,14 +155,70 @@ def extract_top10_gwo(image_path, k=10, sample_ratio=0.3, pop_size=60, max_evals
     )
     init_pop[0] = np.clip(km_centers, problem.lower, problem.upper)
 
-    algo = KMeansSeededGWO(seed_population=init_pop, population_size=pop_size)
+    algo = KMeansSeededGWO(seed_population=init_pop, population_size=pop_size, seed=42)
     best_solution, best_mse = algo.run(task)
 
     # If GWO fails and returns None, fall back to k-means result to ensure robustness
+    stats = {
+        "evals": int(task.evals),
+        "max_evals": int(max_evals),
+        "iters": int(task.iters),
+        "stopped_early": bool(task.stagnated and task.evals < max_evals),
+        "fallback": best_solution is None,
+    }
     if best_solution is None:
         centers_oklab = km_centers.reshape(k, 3)
     else:
         centers_oklab = best_solution.reshape(k, 3)
+    return centers_oklab, stats
+
+def extract_top10_gwo(
+    image_path,
+    k=10,
+    sample_ratio=0.3,
+    pop_size=60,
+    max_evals=20000,
+    max_samples=30000,
+    n_init=3,
+    patience=40,
+    tol=1e-4,
+    return_stats=False,
+    refine=None,
+):
+    """
+    `refine=False` returns the k-means seed without running GWO, None follows `set_gwo_refinement`.
+    `patience=None` disables early stopping ( the full `max_evals` budget is spent ).
+    With `return_stats=True` returns `(colors, stats)`, stats holding the evaluations actually used.
+    """
+    if refine is None:
+        refine = _REFINE
+    img = read_bgr(image_path)
+    if img is None:
+        raise ValueError("Failed to decode image from path.")
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+    # Flatten and sample pixels: increase sampling ratio to 30%,
+    # with an upper limit of 30,000 pixels to avoid excessive computation
+    # ( converted after sampling, the full image stays uint8 )
+    pixels_rgb = img.reshape(-1, 3)
+    n = len(pixels_rgb)
+    sample_n = min(int(n * sample_ratio), max_samples)
+    idx = np.random.choice(n, sample_n, replace=False)
+
+    # Convert sampled pixels to OKLab color space ( in the compute precision )
+    pixels_oklab = rgb8_to_oklab(pixels_rgb[idx])
+
+    # Use k-means++ to obtain a strong initialization, then refine with GWO
+    kmeans = KMeans(n_clusters=k, init="k-means++", n_init=n_init, random_state=42)
+    kmeans.fit(pixels_oklab)
+    km_centers = kmeans.cluster_centers_.flatten()  # shape: (k*3,)
+
+    if refine:
+        centers_oklab, stats = _refine_with_gwo(pixels_oklab, km_centers, k, pop_size, max_evals, patience, tol)
+    else:
+        centers_oklab = km_centers.reshape(k, 3)
+        stats = {"evals": 0, "max_evals": int(max_evals), "iters": 0, "stopped_early": False, "fallback": False}
+    stats["refined"] = bool(refine)
 
     # Sort by lightness ( L channel ) in descending order
     sort_idx = np.argsort(-centers_oklab[:, 0])
@@ -141,6 +231,8 @@ def extract_top10_gwo(image_path, k=10, sample_ratio=0.3, pop_size=60, max_evals
         h = hex_str.lstrip('#')
         results_rgb.append([int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)])
 
+    if return_stats:
+        return np.array(results_rgb), stats
     return np.array(results_rgb)
 
 # test
@@ -5,35 +5,37 @@
 
 from __future__ import annotations
 
-from pathlib import Path
-
 import cv2
 import numpy as np
 from sklearn.cluster import KMeans
 
+from core.colors.precision import compute_dtype
+from core.image_io import ImageInput, read_bgr
+
 
 def extract_top10_kmeans(
-    image_path: str | Path,
+    image_path: ImageInput,
     k: int = 10,
     sample_ratio: float = 0.35,
     max_samples: int = 40000,
     random_state: int = 42,
+    n_init: int = 10,
 ) -> np.ndarray:
-    img_bytes = np.fromfile(image_path, dtype=np.uint8)
-    img_bgr = cv2.imdecode(img_bytes, cv2.IMREAD_COLOR)
+    img_bgr = read_bgr(image_path)
     if img_bgr is None:
         raise ValueError("Failed to decode image from path.")
 
     img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-    pixels_rgb = img_rgb.reshape(-1, 3).astype(np.float64)
+    pixels_rgb = img_rgb.reshape(-1, 3)
 
     n = len(pixels_rgb)
     sample_n = max(k, min(int(n * sample_ratio), max_samples))
     rng = np.random.default_rng(random_state)
     sample_idx = rng.choice(n, sample_n, replace=False)
-    sampled_rgb = pixels_rgb[sample_idx]
+    # Cast the sample only : float64 over the whole image is 24 bytes per pixel
+    sampled_rgb = pixels_rgb[sample_idx].astype(compute_dtype())
 
-    kmeans = KMeans(n_clusters=k, init="k-means++", n_init=10, random_state=random_state)
+    kmeans = KMeans(n_clusters=k, init="k-means++", n_init=n_init, random_state=random_state)
     labels = kmeans.fit_predict(sampled_rgb)
     centers_rgb = np.clip(np.rint(kmeans.cluster_centers_), 0, 255).astype(np.int32)
 
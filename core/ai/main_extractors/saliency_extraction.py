@@ -6,25 +6,13 @@
 
 from __future__ import annotations
 
-from pathlib import Path
-
 import cv2
 import numpy as np
 from sklearn.cluster import KMeans
 
 from core.colors.color_oklab import oklab_to_hex
-from core.colors.color_oklch import _linear_rgb_to_oklab, _srgb_channel_to_linear
-
-
-def _rgb_to_oklab_pixels(rgb_pixels: np.ndarray) -> np.ndarray:
-    rgb_unit = rgb_pixels.astype(np.float64) / 255.0
-    oklab_pixels = np.empty_like(rgb_unit, dtype=np.float64)
-    for i, (r, g, b) in enumerate(rgb_unit):
-        lr = _srgb_channel_to_linear(float(r))
-        lg = _srgb_channel_to_linear(float(g))
-        lb = _srgb_channel_to_linear(float(b))
-        oklab_pixels[i] = _linear_rgb_to_oklab(lr, lg, lb)
-    return oklab_pixels
+from core.colors.color_oklch import rgb8_to_oklab
+from core.image_io import ImageInput, read_bgr
 
 
 def _compute_saliency_weights(image_rgb: np.ndarray) -> np.ndarray:
@@ -55,21 +43,28 @@ def _compute_saliency_weights(image_rgb: np.ndarray) -> np.ndarray:
     return np.clip(mag.reshape(-1), 0.0, 1.0)
 
 
+def compute_saliency_weights(image_bgr: np.ndarray) -> np.ndarray:
+    return _compute_saliency_weights(cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB))
+
+
 def extract_top10_saliency(
-    image_path: str | Path,
+    image_path: ImageInput,
     k: int = 10,
     sample_ratio: float = 0.35,
     max_samples: int = 40000,
     random_state: int = 42,
+    n_init: int = 10,
+    weights: np.ndarray | None = None,
 ) -> np.ndarray:
-    img_bytes = np.fromfile(image_path, dtype=np.uint8)
-    img_bgr = cv2.imdecode(img_bytes, cv2.IMREAD_COLOR)
+    """`weights` : a precomputed per-pixel saliency map ( `compute_saliency_weights` ), flattened."""
+    img_bgr = read_bgr(image_path)
     if img_bgr is None:
         raise ValueError("Failed to decode image from path.")
 
     img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
     pixels_rgb = img_rgb.reshape(-1, 3)
-    weights = _compute_saliency_weights(img_rgb)
+    if weights is None:
+        weights = _compute_saliency_weights(img_rgb)
 
     n = len(pixels_rgb)
     sample_n = max(k, min(int(n * sample_ratio), max_samples))
@@ -78,11 +73,10 @@ def extract_top10_saliency(
 
     sampled_rgb = pixels_rgb[sample_idx]
     sampled_weights = weights[sample_idx]
-    sampled_weights = np.maximum(sampled_weights, 1e-3)
-
-    sampled_oklab = _rgb_to_oklab_pixels(sampled_rgb)
+    sampled_oklab = rgb8_to_oklab(sampled_rgb)
+    sampled_weights = np.maximum(sampled_weights, 1e-3).astype(sampled_oklab.dtype)
 
-    kmeans = KMeans(n_clusters=k, n_init=10, random_state=random_state)
+    kmeans = KMeans(n_clusters=k, n_init=n_init, random_state=random_state)
     kmeans.fit(sampled_oklab, sample_weight=sampled_weights)
     centers_oklab = kmeans.cluster_centers_
 
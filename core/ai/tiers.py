@@ -0,0 +1,95 @@
+"""
+Named speed / quality tiers for the extractors.
+
+A tier sets the search budget of every extractor at once ( GWO population and evaluations,
+k-means restarts, pixel sample caps ). `balanced` is the historical default of each function,
+so the scorer model keeps seeing the feature distribution it was trained on.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class ExtractionTier:
+    name: str
+    gwo_pop_size: int
+    gwo_max_evals: int
+    gwo_max_samples: int
+    gwo_n_init: int
+    gwo_patience: int | None  # stagnant iterations before GWO stops, None = always spend gwo_max_evals
+    kmeans_n_init: int  # k-means / saliency / chroma saliency restarts
+    lightness_n_init: int
+    max_samples: int
+    similar_max_samples: int
+
+    def kwargs_for(self, extractor: str) -> dict[str, Any]:
+        """Keyword arguments for one of the seven extractors ( names as in `core.ai.train.records.RECORD_EXTRACTORS` )."""
+        if extractor == "gwo":
+            return {
+                "pop_size": self.gwo_pop_size,
+                "max_evals": self.gwo_max_evals,
+                "max_samples": self.gwo_max_samples,
+                "n_init": self.gwo_n_init,
+                "patience": self.gwo_patience,
+            }
+        if extractor in {"kmeans", "saliency", "chroma"}:
+            return {"max_samples": self.max_samples, "n_init": self.kmeans_n_init}
+        if extractor == "lightness":
+            return {"max_samples": self.max_samples, "n_init": self.lightness_n_init}
+        if extractor == "similar":
+            return {"max_samples": self.similar_max_samples}
+        if extractor == "area":
+            return {}
+        raise ValueError(f"Unknown extractor: {extractor}")
+
+
+TIERS: dict[str, ExtractionTier] = {
+    "fast": ExtractionTier(
+        name="fast",
+        gwo_pop_size=30,
+        gwo_max_evals=3000,
+        gwo_max_samples=8000,
+        gwo_n_init=1,
+        gwo_patience=20,
+        kmeans_n_init=2,
+        lightness_n_init=1,
+        max_samples=10000,
+        similar_max_samples=10000,
+    ),
+    "balanced": ExtractionTier(
+        name="balanced",
+        gwo_pop_size=60,
+        gwo_max_evals=20000,
+        gwo_max_samples=30000,
+        gwo_n_init=3,
+        gwo_patience=40,
+        kmeans_n_init=10,
+        lightness_n_init=3,
+        max_samples=40000,
+        similar_max_samples=40000,
+    ),
+    "quality": ExtractionTier(
+        name="quality",
+        gwo_pop_size=80,
+        gwo_max_evals=40000,
+        gwo_max_samples=60000,
+        gwo_n_init=5,
+        gwo_patience=None,
+        kmeans_n_init=20,
+        lightness_n_init=5,
+        max_samples=80000,
+        similar_max_samples=80000,
+    ),
+}
+DEFAULT_TIER = "balanced"
+
+
+def get_tier(name: str | None = None) -> ExtractionTier:
+    key = (name or DEFAULT_TIER).strip().lower()
+    tier = TIERS.get(key)
+    if tier is None:
+        raise ValueError(f"Unknown extraction tier: {name}. Expected one of {', '.join(TIERS)}.")
+    return tier
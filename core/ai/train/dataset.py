@@ -19,7 +19,7 @@ class PaletteRankingDataset(Dataset):
 
     def __init__(self, json_path):
         """
-        Parses `training_data.json` into Image Groups.
+        Parses `training_data.json` ( or a `.jsonl` record file ) into Image Groups.
         Each sample from Dataset represents ONE Image containing 30 candidates.
         Allows for Pairwise Ranking Loss and Context-Aware features.
         """
@@ -34,7 +34,11 @@ class PaletteRankingDataset(Dataset):
         """
 
         with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+            if str(json_path).endswith(".jsonl"):
+                # One record per line ( written by scripts.generate_training_records )
+                data = [json.loads(line) for line in f if line.strip()]
+            else:
+                data = json.load(f)
             
         for item in data:
             self._process_image_item(item)
@@ -174,6 +178,45 @@ class PaletteRankingDataset(Dataset):
             "target_labs": [t["lab"] for t in targets] if targets else []
         })
 
+    def to_padded_tensors(self, device=None):
+        """
+        Stack every image group into resident, padded tensors.
+
+        Images may carry different candidate counts ( e.g. a missing source ),
+        so groups are right-padded to the largest count and a boolean mask marks
+        the real candidates. Keeping the whole dataset in a few tensors removes
+        the per-step collate overhead, which dominates for this tiny model.
+
+        Returns :
+            features : (num_images, max_candidates, 19)
+            labels : (num_images, max_candidates, 1)
+            weights : (num_images, max_candidates, 1) - 0.0 on padding
+            mask : (num_images, max_candidates) - True for real candidates
+        """
+
+        num_images = len(self.image_groups)
+        max_candidates = max((len(grp["features"]) for grp in self.image_groups), default=0)
+        feature_dim = self.image_groups[0]["features"].shape[1] if num_images else 19
+
+        features = np.zeros((num_images, max_candidates, feature_dim), dtype=np.float32)
+        labels = np.zeros((num_images, max_candidates, 1), dtype=np.float32)
+        weights = np.zeros((num_images, max_candidates, 1), dtype=np.float32)
+        mask = np.zeros((num_images, max_candidates), dtype=bool)
+
+        for i, grp in enumerate(self.image_groups):
+            n = len(grp["features"])
+            features[i, :n] = grp["features"]
+            labels[i, :n] = grp["labels"]
+            weights[i, :n] = grp["weights"]
+            mask[i, :n] = True
+
+        return (
+            torch.from_numpy(features).to(device),
+            torch.from_numpy(labels).to(device),
+            torch.from_numpy(weights).to(device),
+            torch.from_numpy(mask).to(device),
+        )
+
     def __len__(self):
         return len(self.image_groups)
         
@@ -88,6 +88,91 @@ def calculate_delta_e(lab1, lab2):
 
 # Post-processing : NMS
 
+def pairwise_delta_e(labs):
+    """
+    All pairwise OKLab distances.
+
+    Args :
+        labs: (..., num_candidates, 3)
+
+    Returns :
+        (..., num_candidates, num_candidates) Euclidean distances
+    """
+
+    labs = np.asarray(labs, dtype=np.float64)
+    return np.linalg.norm(labs[..., :, None, :] - labs[..., None, :, :], axis=-1)
+
+def nms_indices(labs, scores, max_colors=10, similarity_threshold=0.03, mask=None):
+    """
+    Array based NMS, for one image or a whole batch.
+
+    Greedy : take the highest scoring available candidate, suppress every candidate closer
+    than `similarity_threshold` to it ( one precomputed distance matrix ), repeat. Slots left
+    empty are then filled with the best unselected candidates, like `apply_nms`.
+
+    Args :
+        labs: (C, 3) or (B, C, 3) candidate OKLab colors
+        scores: (C,) or (B, C) predicted scores
+        max_colors: number of colors to keep
+        similarity_threshold: distance threshold in OKLab space
+        mask: optional (C,) or (B, C), True for real ( non-padded ) candidates
+
+    Returns :
+        (max_colors,) or (B, max_colors) candidate indices, -1 where there are fewer candidates
+    """
+
+    labs = np.asarray(labs, dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float64)
+    single = scores.ndim == 1
+    if single:
+        labs, scores = labs[None], scores[None]
+        mask = None if mask is None else np.asarray(mask)[None]
+    mask = np.ones(scores.shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+
+    batch, num_candidates = scores.shape
+    rows = np.arange(batch)
+    close = pairwise_delta_e(labs) < similarity_threshold
+    ranked = np.where(mask, scores, -np.inf)
+    taken = np.zeros_like(mask)
+    selected = np.full((batch, max_colors), -1, dtype=np.int64)
+
+    if batch == 1:
+        # One image ( the per-request path ) : walking the score order is cheaper than per-slot array ops
+        available = mask[0].copy()
+        picked = []
+        for idx in np.argsort(-ranked[0], kind="stable").tolist():
+            if len(picked) >= max_colors:
+                break
+            if available[idx]:
+                picked.append(idx)
+                available &= ~close[0, idx]
+                available[idx] = False
+        selected[0, :len(picked)] = picked
+        taken[0, picked] = True
+    else:
+        # Scores of still available candidates, -inf once selected / suppressed / padded
+        open_scores = ranked.copy()
+        for slot in range(max_colors):
+            idx = open_scores.argmax(axis=1)
+            has = open_scores[rows, idx] > -np.inf
+            if not has.any():
+                break
+            selected[:, slot] = np.where(has, idx, -1)
+            taken[rows, idx] |= has
+            # Suppress the newly selected color and everything too similar to it
+            open_scores[close[rows, idx] & has[:, None]] = -np.inf
+            open_scores[rows[has], idx[has]] = -np.inf
+
+    # Fallback : slots after the greedy ones get the best free candidates, in score order
+    free = mask & ~taken
+    order = np.argsort(-np.where(free, ranked, -np.inf), axis=1, kind="stable")
+    fill_rank = np.arange(max_colors)[None, :] - (selected >= 0).sum(axis=1, keepdims=True)
+    need = (fill_rank >= 0) & (fill_rank < free.sum(axis=1, keepdims=True))
+    fill = np.take_along_axis(order, np.clip(fill_rank, 0, max(num_candidates - 1, 0)), axis=1) if num_candidates else selected
+    selected = np.where(need, fill, selected)
+
+    return selected[0] if single else selected
+
 def apply_nms(candidates, scores, max_colors=10, similarity_threshold=0.03):
     """
     Non-Maximum Suppression ( NMS ) for color selection.
@@ -95,11 +180,6 @@ def apply_nms(candidates, scores, max_colors=10, similarity_threshold=0.03):
     Purpose :
         Remove visually redundant colors while preserving high-scoring ones.
 
-    Strategy :
-        1. Sort candidates by score ( descending )
-        2. Iteratively select candidates
-        3. Reject candidates too similar to already selected ones
-
     Args :
         candidates: list of color dicts
         scores: predicted scores
@@ -107,38 +187,14 @@ def apply_nms(candidates, scores, max_colors=10, similarity_threshold=0.03):
         similarity_threshold: distance threshold in OKLab space
 
     Returns :
-        List of selected color candidates
+        List of selected color candidates ( see `nms_indices` )
     """
 
-    selected = []
-    sorted_indices = np.argsort(scores)[::-1]
-    
-    for idx in sorted_indices:
-        if len(selected) >= max_colors:
-            break
-            
-        candidate = candidates[idx]
-        lab = [candidate['oklab']['L'], candidate['oklab']['a'], candidate['oklab']['b']]
-        
-        too_similar = False
-        for sel in selected:
-            sel_lab = [sel['oklab']['L'], sel['oklab']['a'], sel['oklab']['b']]
-            if calculate_delta_e(lab, sel_lab) < similarity_threshold:
-                too_similar = True
-                break
-                
-        if not too_similar:
-            selected.append(candidate)
-            
-    # Fallback : ensure enough colors are returned
-    if len(selected) < max_colors:
-        for idx in sorted_indices:
-            if candidates[idx] not in selected:
-                selected.append(candidates[idx])
-                if len(selected) >= max_colors:
-                    break
-                    
-    return selected
+    if len(candidates) == 0:
+        return []
+    labs = np.array([[c['oklab']['L'], c['oklab']['a'], c['oklab']['b']] for c in candidates], dtype=np.float64)
+    indices = nms_indices(labs, scores, max_colors=max_colors, similarity_threshold=similarity_threshold)
+    return [candidates[i] for i in indices if i >= 0]
 
 # Loss Function
 
@@ -159,43 +215,40 @@ class CombinedRankingLoss(nn.Module):
         self.margin = margin
         self.lambda_rank = lambda_rank
         
-    def forward(self, logits, labels, weights):
+    def forward(self, logits, labels, weights, mask=None):
         """
         logits : (batch, num_candidates, 1)
         labels : (batch, num_candidates, 1) - 1.0 or 0.0
         weights : (batch, num_candidates, 1)
+        mask : (batch, num_candidates) - optional, True for real ( non-padded ) candidates
         """
-        # 1. BCE With Logits Loss ( weighted by Rank Importance )
-        bce_loss = F.binary_cross_entropy_with_logits(logits, labels, weight=weights, reduction='mean')
-        
-        # 2. Pairwise Ranking Loss ( Per Image in Batch )
-        rank_loss = 0.0
-        batch_size = logits.size(0)
-        valid_pairs = 0
-        
-        for b in range(batch_size):
-            lgt = logits[b].squeeze()
-            lbl = labels[b].squeeze()
-            
-            pos_indices = torch.where(lbl == 1.0)[0]
-            neg_indices = torch.where(lbl == 0.0)[0]
-            
-            if len(pos_indices) > 0 and len(neg_indices) > 0:
-                # Compare every positive to every negative
-                pos_logits = lgt[pos_indices].unsqueeze(1) # (N_pos, 1)
-                neg_logits = lgt[neg_indices].unsqueeze(0) # (1, N_neg)
-                
-                # We want pos_logits > neg_logits + margin
-                # Margin loss = max(0, margin - (pos - neg))
-                diffs = self.margin - (pos_logits - neg_logits)
-                pair_losses = torch.clamp(diffs, min=0.0)
-                
-                rank_loss += pair_losses.mean()
-                valid_pairs += 1
-                
-        if valid_pairs > 0:
-            rank_loss = rank_loss / valid_pairs
-            
+        if mask is None:
+            mask = torch.ones(logits.shape[:2], dtype=torch.bool, device=logits.device)
+        mask_f = mask.unsqueeze(-1).to(logits.dtype)
+
+        # 1. BCE With Logits Loss ( weighted by Rank Importance, averaged over real candidates )
+        bce = F.binary_cross_entropy_with_logits(logits, labels, weight=weights, reduction='none')
+        bce_loss = (bce * mask_f).sum() / mask_f.sum().clamp(min=1.0)
+
+        # 2. Pairwise Ranking Loss ( Per Image in Batch, vectorized over the whole batch )
+        lgt = logits.squeeze(-1) # (batch, C)
+        lbl = labels.squeeze(-1)
+        pos = (lbl == 1.0) & mask
+        neg = (lbl == 0.0) & mask
+
+        # Compare every positive to every negative : pair_mask[b, i, j] = pos_i & neg_j
+        # We want pos_logits > neg_logits + margin
+        # Margin loss = max(0, margin - (pos - neg))
+        pair_mask = (pos.unsqueeze(2) & neg.unsqueeze(1)).to(logits.dtype)
+        diffs = self.margin - (lgt.unsqueeze(2) - lgt.unsqueeze(1))
+        pair_losses = torch.clamp(diffs, min=0.0) * pair_mask
+
+        pair_counts = pair_mask.sum(dim=(1, 2))
+        valid = (pair_counts > 0).to(logits.dtype)
+        per_image = pair_losses.sum(dim=(1, 2)) / pair_counts.clamp(min=1.0)
+        # Images without positive / negative pairs do not contribute
+        rank_loss = (per_image * valid).sum() / valid.sum().clamp(min=1.0)
+
         return bce_loss + self.lambda_rank * rank_loss
 
 def save_model(model, path):
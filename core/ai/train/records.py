@@ -0,0 +1,121 @@
+from core.ai import (
+    extract_top10_area_ratio_oklab,
+    extract_top10_chroma_saliency_oklab,
+    extract_top10_gwo,
+    extract_top10_kmeans,
+    extract_top10_lightness_ratio_oklab,
+    extract_top10_saliency,
+    extract_top10_similar_area_oklab,
+)
+from core.colors.color_hex import hex_to_rgb
+from core.colors.color_oklch import _linear_rgb_to_oklab, _srgb_channel_to_linear
+
+# Extractors whose outputs make up one training record, in record order.
+RECORD_EXTRACTORS = {
+    "gwo": extract_top10_gwo,
+    "kmeans": extract_top10_kmeans,
+    "saliency": extract_top10_saliency,
+    "area": extract_top10_area_ratio_oklab,
+    "similar": extract_top10_similar_area_oklab,
+    "chroma": extract_top10_chroma_saliency_oklab,
+    "lightness": extract_top10_lightness_ratio_oklab,
+}
+
+
+def build_visual_rankings(area_data: dict) -> dict:
+    base = area_data.get("top_colors", [])
+
+    def _chroma(item: dict) -> float:
+        o = item.get("oklab", {})
+        a = float(o.get("a", 0.0))
+        b = float(o.get("b", 0.0))
+        return (a * a + b * b) ** 0.5
+
+    vivid = sorted(base, key=_chroma, reverse=True)
+    bright = sorted(base, key=lambda x: float(x.get("oklab", {}).get("L", 0.0)), reverse=True)
+
+    return {
+        "dominant_main_color_ranking": [
+            {
+                "rank": idx + 1,
+                "area_ratio": round(float(item.get("area_ratio", 0.0)), 3),
+                "oklab": item.get("oklab", {}),
+            }
+            for idx, item in enumerate(base)
+        ],
+        "vividness_ranking": [
+            {
+                "rank": idx + 1,
+                "chroma": round(_chroma(item), 3),
+                "oklab": item.get("oklab", {}),
+            }
+            for idx, item in enumerate(vivid)
+        ],
+        "brightness_ranking": [
+            {
+                "rank": idx + 1,
+                "lightness": round(float(item.get("oklab", {}).get("L", 0.0)), 3),
+                "oklab": item.get("oklab", {}),
+            }
+            for idx, item in enumerate(bright)
+        ],
+    }
+
+
+def _rgb_row(rank: int, r: int, g: int, b: int) -> dict:
+    lr = _srgb_channel_to_linear(r / 255.0)
+    lg = _srgb_channel_to_linear(g / 255.0)
+    lb = _srgb_channel_to_linear(b / 255.0)
+    L, a, b_lab = _linear_rgb_to_oklab(lr, lg, lb)
+    return {
+        "rank": rank,
+        "oklab": {"L": round(float(L), 3), "a": round(float(a), 3), "b": round(float(b_lab), 3)},
+    }
+
+
+def to_oklab_palette(colors) -> list[dict]:
+    return [_rgb_row(i, int(c[0]), int(c[1]), int(c[2])) for i, c in enumerate(colors, 1)]
+
+
+def to_oklab_user_selected(colors_list) -> list[dict]:
+    if not isinstance(colors_list, list):
+        raise ValueError("selected_colors must be a JSON array")
+
+    rows = []
+    for i, color in enumerate(colors_list, 1):
+        if isinstance(color, str):
+            r, g, b = hex_to_rgb(color)
+        elif isinstance(color, dict) and {"r", "g", "b"}.issubset(color.keys()):
+            r = max(0, min(255, int(color["r"])))
+            g = max(0, min(255, int(color["g"])))
+            b = max(0, min(255, int(color["b"])))
+        else:
+            raise ValueError(f"Invalid selected color payload at index {i - 1}: {color}")
+        rows.append(_rgb_row(i, r, g, b))
+    return rows
+
+
+def assemble_record(image_name: str, user_selected_oklab: list[dict], outputs: dict) -> dict:
+    """Build one `training_data.json` record from the seven extractor outputs ( keyed like RECORD_EXTRACTORS )."""
+    return {
+        "image_name": image_name,
+        "gwo_colors": to_oklab_palette(outputs["gwo"]),
+        "kmeans_colors": to_oklab_palette(outputs["kmeans"]),
+        "saliency_colors": to_oklab_palette(outputs["saliency"]),
+        "user_selected_colors": user_selected_oklab,
+        "visual_dimensions_oklab": {
+            "physical_area_ratio": outputs["area"],
+            "similar_color_area_sum": outputs["similar"],
+            "chroma_saliency": outputs["chroma"],
+            "lightness_ratio": outputs["lightness"],
+        },
+        "visual_rankings": build_visual_rankings(outputs["area"]),
+    }
+
+
+def build_record(image_path, image_name: str, selected_colors) -> dict:
+    """Run every extractor sequentially on one image and assemble its training record."""
+    user_selected_oklab = to_oklab_user_selected(selected_colors)
+    outputs = {name: fn(image_path, 10) for name, fn in RECORD_EXTRACTORS.items()}
+    return assemble_record(image_name, user_selected_oklab, outputs)
+
@@ -1,13 +1,20 @@
 from .color_hex import hex_to_rgb, is_valid_hex, normalize_hex
 from .color_oklab import oklab_to_hex
-from .color_oklch import hex_to_oklch, oklab_to_oklch
+from .color_oklch import hex_to_oklab, hex_to_oklch, oklab_to_oklch, rgb8_to_oklab
+from .precision import compute_dtype, compute_precision, current_precision, set_default_precision
 
 __all__ = [
     "hex_to_rgb",
     "is_valid_hex",
     "normalize_hex",
     "oklab_to_hex",
+    "hex_to_oklab",
     "hex_to_oklch",
     "oklab_to_oklch",
+    "rgb8_to_oklab",
+    "compute_dtype",
+    "compute_precision",
+    "current_precision",
+    "set_default_precision",
 ]
 
@@ -2,6 +2,9 @@ import math
 
 import numpy as np
 
+from .color_hex import normalize_hex
+from .precision import compute_dtype
+
 
 def _srgb_channel_to_linear(c: float) -> float:
     if c <= 0.04045:
@@ -48,6 +51,11 @@ def oklab_to_oklch(L: float, a: float, b: float) -> tuple[float, float, float]:
     return L, C, h
 
 
+def hex_to_oklab(hex_str: str) -> tuple[float, float, float]:
+    r, g, b = _hex_to_linear_rgb(normalize_hex(hex_str))
+    return _linear_rgb_to_oklab(r, g, b)
+
+
 def hex_to_oklch(hex_str: str) -> tuple[float, float, float]:
     r, g, b = _hex_to_linear_rgb(hex_str)
     L, a, b = _linear_rgb_to_oklab(r, g, b)
@@ -55,10 +63,31 @@ def hex_to_oklch(hex_str: str) -> tuple[float, float, float]:
 
 
 def _rgb_to_oklab_vectorized(rgb: np.ndarray) -> np.ndarray:
+    """sRGB in [0, 1] to OKLab, computed in the float dtype of `rgb`."""
     # 1. sRGB to Linear
     mask = rgb <= 0.04045
     linear = np.where(mask, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
-    
+    return _linear_to_oklab_vectorized(linear)
+
+
+# sRGB -> linear for every 8-bit level, per compute dtype
+_SRGB8_UNIT = np.arange(256, dtype=np.float64) / 255.0
+_SRGB8_TO_LINEAR = {
+    np.dtype(dtype): np.where(_SRGB8_UNIT <= 0.04045, _SRGB8_UNIT / 12.92, ((_SRGB8_UNIT + 0.055) / 1.055) ** 2.4).astype(dtype)
+    for dtype in (np.float64, np.float32)
+}
+
+
+def rgb8_to_oklab(pixels: np.ndarray, dtype=None) -> np.ndarray:
+    """
+    8-bit RGB pixels ( n, 3 ) to OKLab in `dtype` ( default : the compute precision ).
+    The sRGB curve is a 256-entry table lookup, same values as `_rgb_to_oklab_vectorized(pixels / 255.0)`.
+    """
+    table = _SRGB8_TO_LINEAR[np.dtype(dtype or compute_dtype())]
+    return _linear_to_oklab_vectorized(table[np.asarray(pixels, dtype=np.uint8)])
+
+
+def _linear_to_oklab_vectorized(linear: np.ndarray) -> np.ndarray:
     # 2. Linear to LMS
     r, g, b = linear[:, 0], linear[:, 1], linear[:, 2]
     l = 0.4122214708 * r + 0.5363325363 * g + 0.0514459929 * b
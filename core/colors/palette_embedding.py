@@ -0,0 +1,54 @@
+"""
+Fixed-size, order-invariant palette descriptor for similarity search.
+
+Each palette color is spread over a fixed grid of OKLab anchors with a Gaussian kernel and the
+contributions are summed, so the vector does not depend on color order or palette length. The
+result is L2-normalized : the dot product of two embeddings is their cosine similarity.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any
+
+import numpy as np
+
+
+EMBEDDING_VERSION = 1
+_L_ANCHORS = np.linspace(0.15, 0.9, 4)
+_AB_ANCHORS = np.linspace(-0.25, 0.25, 6)
+_SIGMA = np.array([0.17, 0.07, 0.07])  # ~ 0.7 of the anchor spacing per axis
+ANCHORS = np.array(
+    [[L, a, b] for L in _L_ANCHORS for a in _AB_ANCHORS for b in _AB_ANCHORS],
+    dtype=np.float64,
+)
+EMBEDDING_DIM = len(ANCHORS)
+
+
+def palette_to_oklab(palette: list[dict[str, Any]]) -> np.ndarray:
+    """Stored palette entries ( `oklch` dicts, hue in degrees ) to an N x 3 OKLab array."""
+    rows: list[tuple[float, float, float]] = []
+    for color in palette:
+        oklch = color.get("oklch") or {}
+        L = float(oklch.get("L", 0.0))
+        c = float(oklch.get("c", 0.0))
+        h = math.radians(float(oklch.get("h", 0.0)))
+        rows.append((L, c * math.cos(h), c * math.sin(h)))
+    return np.array(rows, dtype=np.float64).reshape(-1, 3)
+
+
+def embed_oklab(labs: np.ndarray) -> np.ndarray:
+    """N x 3 OKLab colors to a unit `EMBEDDING_DIM` float32 vector ( zeros for an empty palette )."""
+    labs = np.asarray(labs, dtype=np.float64).reshape(-1, 3)
+    if labs.size == 0:
+        return np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    z = (labs[:, None, :] - ANCHORS[None, :, :]) / _SIGMA
+    vector = np.exp(-0.5 * np.einsum("nkd,nkd->nk", z, z)).sum(axis=0)
+    norm = float(np.linalg.norm(vector))
+    if norm > 0.0:
+        vector /= norm
+    return vector.astype(np.float32)
+
+
+def embed_palette(palette: list[dict[str, Any]]) -> np.ndarray:
+    return embed_oklab(palette_to_oklab(palette))
@@ -0,0 +1,56 @@
+"""
+Floating-point precision of the pixel-heavy stages.
+
+Extractors work on 8-bit pixels, so float64 buys nothing the input can show : `float32` halves
+the memory traffic of the sampled pixel arrays, the OKLab conversion and the clustering
+( sklearn keeps float32 input in float32 ). `float64` stays the default, as the scorer model was
+trained on float64 features; `python -m scripts.validate_precision` measures the palette
+deviation ( ΔE in OKLab ) between both on a corpus before switching.
+
+The process default comes from `set_default_precision` ( the app's `COMPUTE_PRECISION` );
+`compute_precision(...)` overrides it for a block, per context, so worker threads started with
+a copied context follow the caller.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import numpy as np
+
+
+PRECISIONS: dict[str, type[np.floating]] = {"float64": np.float64, "float32": np.float32}
+_default = "float64"
+_CURRENT: ContextVar[str | None] = ContextVar("iris_compute_precision", default=None)
+
+
+def _check(name: str) -> str:
+    key = name.strip().lower()
+    if key not in PRECISIONS:
+        raise ValueError(f"Unknown compute precision: {name}. Expected one of {', '.join(PRECISIONS)}.")
+    return key
+
+
+def set_default_precision(name: str) -> None:
+    global _default
+    _default = _check(name)
+
+
+def current_precision() -> str:
+    return _CURRENT.get() or _default
+
+
+def compute_dtype() -> type[np.floating]:
+    """dtype for sampled pixels, OKLab conversion and clustering."""
+    return PRECISIONS[current_precision()]
+
+
+@contextmanager
+def compute_precision(name: str) -> Iterator[None]:
+    token = _CURRENT.set(_check(name))
+    try:
+        yield
+    finally:
+        _CURRENT.reset(token)
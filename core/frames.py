@@ -0,0 +1,216 @@
+"""
+Streaming frame input for animated images ( GIF, WebP, APNG, AVIF ) and short videos.
+
+`iter_frames` walks the file front to back in one pass and only converts the frames it is asked
+to look at, so memory stays at one frame whatever the length. GIF and videos go through
+`cv2.VideoCapture` ( FFmpeg ), where skipped frames are only grabbed; formats FFmpeg cannot
+demux ( animated WebP, APNG, AVIF sequences ) are read frame by frame with Pillow, whose
+decoders composite each frame onto the previous one as they go.
+
+`is_animated` only reads the file header ( WebP `VP8X` animation flag, PNG `acTL` chunk, AVIF
+`avis` brand, a second GIF image descriptor ), so still uploads cost no decoding.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+VIDEO_EXTENSIONS = {".mp4", ".m4v", ".mov", ".webm"}
+DEFAULT_FRAME_SECONDS = 0.1  # GIFs / animations without timing information
+
+
+@dataclass
+class Frame:
+    index: int
+    start_s: float
+    duration_s: float
+    image: np.ndarray | None  # BGR, None for frames that were skipped without decoding
+
+
+def frame_count(path: str | Path) -> int:
+    """Frames in the file, 0 when unknown ( some containers do not store it )."""
+    path = Path(path)
+    if path.suffix.lower() in VIDEO_EXTENSIONS:
+        cap = cv2.VideoCapture(str(path))
+        try:
+            count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        finally:
+            cap.release()
+        return int(count) if 0 < count < 1e9 else 0
+    try:
+        return int(cv2.imcount(str(path)))
+    except cv2.error:
+        return 0
+
+
+def _png_is_animated(f) -> bool:
+    if f.read(8) != b"\x89PNG\r\n\x1a\n":
+        return False
+    # acTL must come before the first IDAT
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return False
+        length = int.from_bytes(header[:4], "big")
+        kind = header[4:]
+        if kind == b"acTL":
+            return int.from_bytes(f.read(4), "big") > 1
+        if kind in {b"IDAT", b"IEND"}:
+            return False
+        f.seek(length + 4, 1)  # data + CRC
+
+
+def _webp_is_animated(f) -> bool:
+    header = f.read(21)
+    return (
+        len(header) == 21
+        and header[:4] == b"RIFF"
+        and header[8:12] == b"WEBP"
+        and header[12:16] == b"VP8X"
+        and bool(header[20] & 0x02)
+    )
+
+
+def _avif_is_animated(f) -> bool:
+    # Image sequences declare the `avis` brand in the leading ftyp box
+    header = f.read(8)
+    if len(header) < 8 or header[4:8] != b"ftyp":
+        return False
+    size = int.from_bytes(header[:4], "big")
+    brands = f.read(max(0, min(size, 4096) - 8))
+    return any(brands[i : i + 4] == b"avis" for i in range(0, len(brands) - 3, 4))
+
+
+def _skip_gif_sub_blocks(f) -> bool:
+    while True:
+        size = f.read(1)
+        if not size:
+            return False
+        if size[0] == 0:
+            return True
+        f.seek(size[0], 1)
+
+
+def _gif_is_animated(f) -> bool:
+    header = f.read(13)
+    if len(header) < 13 or header[:3] != b"GIF":
+        return False
+    if header[10] & 0x80:
+        f.seek(3 << ((header[10] & 0x07) + 1), 1)  # global color table
+    images = 0
+    while True:
+        introducer = f.read(1)
+        if introducer == b"\x21":  # extension : label, then sub-blocks
+            if not f.read(1) or not _skip_gif_sub_blocks(f):
+                return False
+        elif introducer == b"\x2c":  # image descriptor
+            images += 1
+            if images > 1:
+                return True
+            descriptor = f.read(9)
+            if len(descriptor) < 9:
+                return False
+            if descriptor[8] & 0x80:
+                f.seek(3 << ((descriptor[8] & 0x07) + 1), 1)  # local color table
+            # LZW minimum code size, then the compressed data sub-blocks ( skipped, not decoded )
+            if not f.read(1) or not _skip_gif_sub_blocks(f):
+                return False
+        else:  # trailer or garbage
+            return False
+
+
+_HEADER_CHECKS = {".png": _png_is_animated, ".webp": _webp_is_animated, ".avif": _avif_is_animated, ".gif": _gif_is_animated}
+
+
+def is_animated(path: str | Path) -> bool:
+    """Videos, and images whose header declares more than one frame ( nothing is decoded )."""
+    suffix = Path(path).suffix.lower()
+    if suffix in VIDEO_EXTENSIONS:
+        return True
+    check = _HEADER_CHECKS.get(suffix)
+    if check is None:
+        return False
+    try:
+        with open(path, "rb") as f:
+            return check(f)
+    except OSError:
+        return False
+
+
+def _iter_capture(path: Path, probe_stride: int, max_decoded: int) -> Iterator[Frame]:
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        return
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_s = 1.0 / fps if 0 < fps < 1000 else DEFAULT_FRAME_SECONDS
+        index = 0
+        while index < max_decoded and cap.grab():
+            image = None
+            if index % probe_stride == 0:
+                ok, image = cap.retrieve()
+                if not ok:
+                    image = None
+            yield Frame(index, index * frame_s, frame_s, image)
+            index += 1
+    finally:
+        cap.release()
+
+
+def _iter_sequence(path: Path, probe_stride: int, max_decoded: int) -> Iterator[Frame]:
+    try:
+        sequence = Image.open(path)
+    except (OSError, Image.DecompressionBombError):
+        return
+    with sequence:
+        start_s = 0.0
+        index = 0
+        while index < max_decoded:
+            # Seeking one frame ahead decodes just that frame onto the previous canvas
+            try:
+                sequence.seek(index)
+                sequence.load()
+            except EOFError:
+                return
+            duration_ms = float(sequence.info.get("duration") or 0.0)
+            duration_s = duration_ms / 1000.0 if duration_ms > 0 else DEFAULT_FRAME_SECONDS
+            image = None
+            if index % probe_stride == 0:
+                # Alpha is dropped, as for stills
+                image = cv2.cvtColor(np.asarray(sequence.convert("RGB")), cv2.COLOR_RGB2BGR)
+            yield Frame(index, start_s, duration_s, image)
+            start_s += duration_s
+            index += 1
+
+
+def iter_frames(
+    path: str | Path,
+    *,
+    probe_stride: int = 1,
+    max_decoded: int = 3000,
+) -> Iterator[Frame]:
+    """
+    Args :
+        path : animated image or video file.
+        probe_stride : only every `probe_stride`-th frame carries pixels, the others are skipped.
+        max_decoded : stop after this many frames.
+
+    Returns :
+        frames in display order, with their start time and duration in seconds.
+    """
+    path = Path(path)
+    probe_stride = max(1, int(probe_stride))
+    yielded = False
+    if path.suffix.lower() in VIDEO_EXTENSIONS or path.suffix.lower() == ".gif":
+        for frame in _iter_capture(path, probe_stride, max_decoded):
+            yielded = True
+            yield frame
+    if not yielded and path.suffix.lower() not in VIDEO_EXTENSIONS:
+        yield from _iter_sequence(path, probe_stride, max_decoded)
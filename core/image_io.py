@@ -0,0 +1,40 @@
+"""
+Image input shared by the extractors.
+
+Every extractor takes either a path or an already decoded BGR `uint8` array ( as returned by
+`cv2.imdecode` ), so a pipeline running several of them on one image decodes it once.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from core.timing import span
+
+
+ImageInput = str | Path | np.ndarray
+
+
+def read_bgr(image: ImageInput) -> np.ndarray | None:
+    """
+    Args :
+        image : file path, or a decoded H x W x 3 BGR array ( returned as is ).
+
+    Returns :
+        the BGR array, or None when the file cannot be read or decoded.
+    """
+    if isinstance(image, np.ndarray):
+        if image.ndim != 3 or image.shape[2] != 3 or image.dtype != np.uint8:
+            raise ValueError(f"Expected an H x W x 3 uint8 BGR array, got {image.dtype} {image.shape}")
+        return image
+    with span("decode"):
+        try:
+            data = np.fromfile(Path(image), dtype=np.uint8)
+        except OSError:
+            return None
+        if data.size == 0:
+            return None
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
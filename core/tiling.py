@@ -0,0 +1,281 @@
+"""
+Tiled, memory-bounded reading of very large images.
+
+`scan_tiled` walks an image in horizontal strips and, in one pass, builds
+
+- a proxy image of at most `max_pixels` ( per-strip INTER_AREA downscale ) for the extractors,
+- a uniform reservoir sample of original pixels ( bottom-k on random keys, so per-strip
+  reservoirs merge exactly ),
+- a 16 x 16 x 16 RGB histogram ( pixel count and color sum per bin ).
+
+Strips are independent and run on a thread pool ( OpenCV releases the GIL ).
+
+Where the pixels come from decides the peak memory :
+
+- uncompressed 24 / 32-bit BMP is memory-mapped, so only the strips in flight are resident;
+- JPEG is decoded at 1/2, 1/4 or 1/8 scale in the DCT domain ( `IMREAD_REDUCED_COLOR_*` ),
+  keeping at least `max_pixels`;
+- other formats are decoded whole ( 3 bytes per pixel ), OpenCV cannot stream them, but nothing
+  downstream copies or widens the full array any more.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from core.image_io import ImageInput, read_bgr
+from core.timing import span
+
+
+HIST_BINS = 16
+_REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+def image_dimensions(path: str | Path) -> tuple[int, int] | None:
+    """( width, height ) from the file header, without decoding. None for unknown formats."""
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:2] == b"BM" and len(head) >= 26:
+            width, height = struct.unpack("<ii", head[18:26])
+            return width, abs(height)
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8X":
+                width = int.from_bytes(head[24:27], "little") + 1
+                height = int.from_bytes(head[27:30], "little") + 1
+                return width, height
+            if chunk == b"VP8L":
+                bits = int.from_bytes(head[21:25], "little")
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            return None
+        if head[:2] == b"\xff\xd8":
+            return _jpeg_dimensions(f)
+    return None
+
+
+def _jpeg_dimensions(f) -> tuple[int, int] | None:
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:
+            f.seek(-1, 1)
+            continue
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        (length,) = struct.unpack(">H", length_bytes)
+        # SOF0..SOF15, except DHT ( C4 ), JPG ( C8 ) and DAC ( CC )
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height
+        f.seek(length - 2, 1)
+
+
+class StripReader(ABC):
+    """Row-range access to a BGR image : `read(y0, y1)` returns rows [y0, y1) as H x W x 3 uint8."""
+
+    width: int
+    height: int
+
+    @abstractmethod
+    def read(self, y0: int, y1: int) -> np.ndarray: ...
+
+
+class ArrayStrips(StripReader):
+    def __init__(self, image_bgr: np.ndarray) -> None:
+        self.image = image_bgr
+        self.height, self.width = image_bgr.shape[:2]
+
+    def read(self, y0: int, y1: int) -> np.ndarray:
+        return self.image[y0:y1]
+
+
+class BmpStrips(StripReader):
+    """Uncompressed 24 / 32-bit BMP, memory-mapped : strips are paged in on demand."""
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as f:
+            header = f.read(34)
+        (offset,) = struct.unpack("<I", header[10:14])
+        width, height = struct.unpack("<ii", header[18:26])
+        bpp, compression = struct.unpack("<HI", header[28:34])
+        if bpp not in (24, 32) or compression not in (0, 3) or width <= 0 or height == 0:
+            raise ValueError("Only uncompressed 24 / 32-bit BMP can be memory-mapped")
+        self.width, self.height = width, abs(height)
+        self.channels = bpp // 8
+        self.bottom_up = height > 0
+        stride = ((bpp * width + 31) // 32) * 4
+        self.rows = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(self.height, stride))
+
+    def read(self, y0: int, y1: int) -> np.ndarray:
+        if self.bottom_up:
+            rows = self.rows[self.height - y1 : self.height - y0][::-1]
+        else:
+            rows = self.rows[y0:y1]
+        pixels = rows[:, : self.width * self.channels].reshape(-1, self.width, self.channels)
+        return np.ascontiguousarray(pixels[:, :, :3])
+
+
+def open_strips(image: ImageInput, *, min_pixels: int = 0) -> StripReader | None:
+    """
+    Args :
+        image : path or decoded BGR array.
+        min_pixels : JPEGs may be decoded at a reduced scale, as long as this many pixels remain.
+
+    Returns :
+        a strip reader, or None when the image cannot be decoded.
+    """
+    if isinstance(image, np.ndarray):
+        return ArrayStrips(read_bgr(image))
+    path = Path(image)
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == b"BM":
+        try:
+            return BmpStrips(path)
+        except ValueError:
+            pass
+    dims = image_dimensions(path)
+    if magic == b"\xff\xd8" and dims is not None and min_pixels > 0:
+        for factor, flag in _REDUCED_FLAGS:
+            if (dims[0] // factor) * (dims[1] // factor) >= min_pixels:
+                with span("decode"):
+                    decoded = cv2.imdecode(np.fromfile(path, dtype=np.uint8), flag)
+                return ArrayStrips(decoded) if decoded is not None else None
+    decoded = read_bgr(path)
+    return ArrayStrips(decoded) if decoded is not None else None
+
+
+@dataclass
+class TiledScan:
+    proxy: np.ndarray  # BGR, at most max_pixels
+    sample: np.ndarray  # N x 3 RGB uint8, uniform over the scanned pixels
+    hist_counts: np.ndarray  # HIST_BINS**3 pixel counts
+    hist_sums: np.ndarray  # HIST_BINS**3 x 3 RGB sums
+    width: int
+    height: int
+
+
+def _strip_stats(
+    reader: StripReader,
+    in_rows: tuple[int, int],
+    out_size: tuple[int, int],
+    sample_size: int,
+    seed: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    strip = reader.read(*in_rows)
+    proxy = cv2.resize(strip, out_size, interpolation=cv2.INTER_AREA) if strip.shape[1::-1] != out_size else strip.copy()
+
+    rgb = cv2.cvtColor(strip, cv2.COLOR_BGR2RGB).reshape(-1, 3)
+    q = (rgb >> 4).astype(np.int32)
+    keys = (q[:, 0] * HIST_BINS + q[:, 1]) * HIST_BINS + q[:, 2]
+    counts = np.bincount(keys, minlength=HIST_BINS**3)
+    sums = np.stack([np.bincount(keys, weights=rgb[:, ch], minlength=HIST_BINS**3) for ch in range(3)], axis=1)
+
+    # Bottom-k reservoir : the `sample_size` smallest uniform keys of this strip
+    rng = np.random.default_rng([seed, in_rows[0]])
+    priorities = rng.random(len(rgb))
+    if len(rgb) > sample_size:
+        keep = np.argpartition(priorities, sample_size)[:sample_size]
+    else:
+        keep = np.arange(len(rgb))
+    return proxy, rgb[keep], priorities[keep], counts, sums
+
+
+def scan_tiled(
+    image: ImageInput,
+    *,
+    max_pixels: int,
+    sample_size: int = 40000,
+    tile_pixels: int = 1 << 20,
+    workers: int = 1,
+    seed: int = 42,
+) -> TiledScan | None:
+    """
+    Args :
+        image : path or decoded BGR array.
+        max_pixels : pixel budget of the proxy image.
+        sample_size : reservoir size ( original-resolution pixels ).
+        tile_pixels : input pixels per strip, what one worker holds ( with its temporaries ) at a time.
+        workers : threads processing strips concurrently.
+
+    Returns :
+        TiledScan, or None when the image cannot be decoded.
+    """
+    reader = open_strips(image, min_pixels=max_pixels)
+    if reader is None:
+        return None
+    width, height = reader.width, reader.height
+    scale = min(1.0, math.sqrt(max_pixels / max(width * height, 1)))
+    out_w, out_h = max(1, int(width * scale)), max(1, int(height * scale))
+
+    # Strips cut on proxy rows, so every input row lands in exactly one proxy strip
+    out_rows = max(1, (tile_pixels // max(width, 1)) * out_h // height)
+    jobs = []
+    for oy0 in range(0, out_h, out_rows):
+        oy1 = min(out_h, oy0 + out_rows)
+        iy0 = round(oy0 * height / out_h)
+        iy1 = round(oy1 * height / out_h)
+        jobs.append(((iy0, max(iy1, iy0 + 1)), (out_w, oy1 - oy0)))
+
+    proxy = np.empty((out_h, out_w, 3), dtype=np.uint8)
+    hist_counts = np.zeros(HIST_BINS**3, dtype=np.int64)
+    hist_sums = np.zeros((HIST_BINS**3, 3), dtype=np.float64)
+    sample = np.empty((0, 3), dtype=np.uint8)
+    keys = np.empty(0, dtype=np.float64)
+
+    workers = max(1, workers)
+    with span("tiles"), ThreadPoolExecutor(max_workers=workers) as executor:
+        # At most 2 strips per worker in flight, so memory does not grow with the strip count
+        in_flight: deque = deque()
+        pending_jobs = iter(jobs)
+        oy = 0
+        while True:
+            while len(in_flight) < 2 * workers:
+                job = next(pending_jobs, None)
+                if job is None:
+                    break
+                in_flight.append(executor.submit(_strip_stats, reader, job[0], job[1], sample_size, seed))
+            if not in_flight:
+                break
+            strip_proxy, strip_sample, strip_keys, counts, sums = in_flight.popleft().result()
+            proxy[oy : oy + strip_proxy.shape[0]] = strip_proxy
+            oy += strip_proxy.shape[0]
+            hist_counts += counts
+            hist_sums += sums
+            # Running bottom-k merge of the reservoirs
+            sample = np.concatenate([sample, strip_sample])
+            keys = np.concatenate([keys, strip_keys])
+            if len(keys) > sample_size:
+                keep = np.argpartition(keys, sample_size)[:sample_size]
+                sample, keys = sample[keep], keys[keep]
+
+    return TiledScan(proxy, sample, hist_counts, hist_sums, width, height)
+
+
+def needs_tiling(image: ImageInput, max_pixels: int) -> bool:
+    if isinstance(image, np.ndarray):
+        return image.shape[0] * image.shape[1] > max_pixels
+    dims = image_dimensions(image)
+    return dims is not None and dims[0] * dims[1] > max_pixels
@@ -0,0 +1,183 @@
+"""
+Per-request stage timing.
+
+`span(name)` times a block into the timings collected for the current context
+( set by the app middleware ). With no active collection it returns a shared
+no-op object, so instrumented code pays one ContextVar lookup and nothing else.
+Worker threads started through `run_in_threadpool` inherit the context.
+
+Profiling is single-flight : one cProfile may be active per process ( Python >= 3.12 ) and
+tracemalloc is process-wide, so a profiled call that finds another request profiling runs
+unprofiled and leaves a "skipped" entry in the request's memory report instead.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+
+@dataclass
+class StageTimings:
+    spans: list[tuple[str, float]] = field(default_factory=list)  # (stage, duration ms) in completion order
+    profile: bool = False
+    profiles: list[cProfile.Profile] = field(default_factory=list)
+    memory: list[dict[str, Any]] = field(default_factory=list)
+    tags: dict[str, str] = field(default_factory=dict)  # e.g. extraction method, used as a metrics label
+
+    def record(self, name: str, duration_ms: float) -> None:
+        # list.append is atomic, so spans from concurrent worker threads are safe
+        self.spans.append((name, duration_ms))
+
+    def totals(self) -> dict[str, dict[str, float]]:
+        out: dict[str, dict[str, float]] = {}
+        for name, duration_ms in self.spans:
+            entry = out.setdefault(name, {"ms": 0.0, "count": 0})
+            entry["ms"] += duration_ms
+            entry["count"] += 1
+        return out
+
+    def server_timing(self) -> str:
+        parts = []
+        for name, entry in self.totals().items():
+            part = f"{name};dur={entry['ms']:.1f}"
+            if entry["count"] > 1:
+                part += f';desc="x{entry["count"]}"'
+            parts.append(part)
+        return ", ".join(parts)
+
+
+_CURRENT: ContextVar[StageTimings | None] = ContextVar("iris_stage_timings", default=None)
+
+
+class _Span:
+    __slots__ = ("_timings", "_name", "_start")
+
+    def __init__(self, timings: StageTimings, name: str) -> None:
+        self._timings = timings
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> bool:
+        self._timings.record(self._name, (time.perf_counter() - self._start) * 1000.0)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: object) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str) -> _Span | _NoopSpan:
+    timings = _CURRENT.get()
+    if timings is None:
+        return _NOOP_SPAN
+    return _Span(timings, name)
+
+
+def current_timings() -> StageTimings | None:
+    return _CURRENT.get()
+
+
+def tag(key: str, value: str) -> None:
+    timings = _CURRENT.get()
+    if timings is not None:
+        timings.tags[key] = value
+
+
+def start_timings(*, profile: bool = False) -> tuple[StageTimings, Token]:
+    timings = StageTimings(profile=profile)
+    return timings, _CURRENT.set(timings)
+
+
+def stop_timings(token: Token) -> None:
+    _CURRENT.reset(token)
+
+
+_PROFILER = threading.Condition()
+_profile_owner: StageTimings | None = None  # request holding the profiler
+_profile_users = 0  # its calls running or queued under it
+_profiling = False
+
+
+def _acquire_profiler(timings: StageTimings) -> bool:
+    global _profile_owner, _profile_users, _profiling
+    with _PROFILER:
+        if _profile_owner is None:
+            _profile_owner = timings
+        elif _profile_owner is not timings:
+            return False
+        # Concurrent calls of the owning request ( task graph stages ) are profiled one after another
+        _profile_users += 1
+        while _profiling:
+            _PROFILER.wait()
+        _profiling = True
+        return True
+
+
+def _release_profiler() -> None:
+    global _profile_owner, _profile_users, _profiling
+    with _PROFILER:
+        _profiling = False
+        _profile_users -= 1
+        if _profile_users == 0:
+            _profile_owner = None
+        _PROFILER.notify_all()
+
+
+def profile_call(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Call `fn`, under cProfile + tracemalloc when the current request asked for profiling.
+    Used around the threadpool work, since a profiler only sees its own thread.
+    """
+    return profile_named(getattr(fn, "__name__", repr(fn)), fn, *args, **kwargs)
+
+
+def profile_named(name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """`profile_call`, reported under `name` ( e.g. a task graph stage )."""
+    timings = _CURRENT.get()
+    if timings is None or not timings.profile:
+        return fn(*args, **kwargs)
+    if not _acquire_profiler(timings):
+        timings.memory.append({"function": name, "skipped": "another request is being profiled"})
+        return fn(*args, **kwargs)
+
+    try:
+        owns_tracing = not tracemalloc.is_tracing()
+        if owns_tracing:
+            tracemalloc.start()
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(fn, *args, **kwargs)
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:10]
+            if owns_tracing:
+                tracemalloc.stop()
+            timings.profiles.append(profiler)
+            timings.memory.append(
+                {
+                    "function": name,
+                    "peak_mb": round(peak / (1024 * 1024), 3),
+                    "top_allocations": [str(stat) for stat in top],
+                }
+            )
+    finally:
+        _release_profiler()
@@ -0,0 +1,134 @@
+"""
+Per-image cache of extractor outputs for the labeling app.
+
+A labeler runs one extractor on an image ( `/api/extract` ), then records it ( `/api/record` ),
+which needs all seven. Outputs are cached by the image's SHA-256 and extractor name, so the
+record only computes what is missing, and the recorded GWO / k-means / saliency colors are the
+ones the labeler was shown. Images are kept in an LRU of `max_images`; with `disk_dir` every
+image's outputs are also written as one JSON file, so they survive restarts. A computation
+already running for the same key is awaited instead of started twice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+# Bump when an extractor's output changes : older disk entries are then ignored
+CACHE_VERSION = 1
+# Extractors returning RGB color arrays ( the others return JSON-ready dicts )
+COLOR_EXTRACTORS = frozenset({"gwo", "kmeans", "saliency"})
+
+
+class ExtractionCache:
+    def __init__(self, max_images: int = 256, disk_dir: Path | None = None) -> None:
+        self.max_images = max(1, max_images)
+        self.disk_dir = disk_dir
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._in_flight: dict[tuple[str, str], asyncio.Future] = {}
+        self._disk_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _disk_path(self, sha256: str) -> Path:
+        return self.disk_dir / f"v{CACHE_VERSION}" / sha256[:2] / f"{sha256}.json"
+
+    def _load_disk(self, sha256: str) -> dict[str, Any]:
+        if self.disk_dir is None:
+            return {}
+        path = self._disk_path(sha256)
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable cache entry %s: %s", path, e)
+            return {}
+        return {
+            name: np.asarray(value, dtype=np.int32).reshape(-1, 3) if name in COLOR_EXTRACTORS else value
+            for name, value in stored.items()
+        }
+
+    def _save_disk(self, sha256: str, outputs: dict[str, Any]) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(sha256)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        serializable = {
+            name: value.tolist() if isinstance(value, np.ndarray) else value for name, value in outputs.items()
+        }
+        # Write then rename : a crash never leaves a truncated entry
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(serializable, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _outputs(self, sha256: str) -> dict[str, Any]:
+        outputs = self._entries.get(sha256)
+        if outputs is None:
+            outputs = self._load_disk(sha256)
+            self._entries[sha256] = outputs
+        self._entries.move_to_end(sha256)
+        while len(self._entries) > self.max_images:
+            self._entries.popitem(last=False)
+        return outputs
+
+    def cached(self, sha256: str) -> dict[str, Any]:
+        """Outputs already known for this image ( memory, then disk )."""
+        return dict(self._outputs(sha256))
+
+    async def get(self, sha256: str, name: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached output of extractor `name`, else the result of `compute()` ( then cached )."""
+        outputs = self._outputs(sha256)
+        if name in outputs:
+            self.hits += 1
+            return outputs[name]
+        key = (sha256, name)
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.hits += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The request computing it went away : compute it here
+                return await self.get(sha256, name, compute)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting : do not log "exception never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            del self._in_flight[key]
+
+        outputs = self._outputs(sha256)
+        outputs[name] = value
+        if self.disk_dir is not None:
+            try:
+                # One writer at a time, each with the latest outputs : the file only ever grows
+                async with self._disk_lock:
+                    await asyncio.to_thread(self._save_disk, sha256, dict(outputs))
+            except OSError as e:
+                logger.warning("Could not write cache entry for %s: %s", sha256, e)
+        return value
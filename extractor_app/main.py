@@ -17,22 +17,15 @@ from fastapi.staticfiles import StaticFiles
 import sys
 import json
 import asyncio
+import hashlib
 import numpy as np
 
 # Add project root to sys path so we can import core modules.
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-from core.ai import (
-    extract_top10_area_ratio_oklab,
-    extract_top10_chroma_saliency_oklab,
-    extract_top10_gwo,
-    extract_top10_kmeans,
-    extract_top10_lightness_ratio_oklab,
-    extract_top10_saliency,
-    extract_top10_similar_area_oklab,
-)
-from core.colors.color_oklch import _linear_rgb_to_oklab, _srgb_channel_to_linear
-from core.colors.color_hex import hex_to_rgb
+from core.ai.train.records import RECORD_EXTRACTORS, assemble_record, to_oklab_user_selected
+from core.image_io import read_bgr
+from extractor_app.extraction_cache import ExtractionCache
 
 
 app = FastAPI(title="Palette Extraction App")
@@ -50,6 +43,13 @@ MAGIC_SIGS = [
     (4, b"ftyp"),
 ]
 TRAINING_DATA_LOCK = asyncio.Lock()
+# Extractor outputs per image, shared by /api/extract and /api/record ( EXTRACTOR_CACHE_DIR : also on disk )
+EXTRACTION_CACHE = ExtractionCache(
+    max_images=int(os.environ.get("EXTRACTOR_CACHE_IMAGES", "256")),
+    disk_dir=Path(os.environ["EXTRACTOR_CACHE_DIR"]) if os.environ.get("EXTRACTOR_CACHE_DIR") else None,
+)
+# /api/extract method -> RECORD_EXTRACTORS name
+EXTRACT_METHODS = {"gwo": "gwo", "saliency": "saliency", "k-means": "kmeans"}
 
 @app.get("/", response_class=HTMLResponse)
 def index(request: Request) -> HTMLResponse:
@@ -62,93 +62,6 @@ def index(request: Request) -> HTMLResponse:
     )
 
 
-def _build_visual_rankings(area_data: dict) -> dict:
-    base = area_data.get("top_colors", [])
-
-    def _chroma(item: dict) -> float:
-        o = item.get("oklab", {})
-        a = float(o.get("a", 0.0))
-        b = float(o.get("b", 0.0))
-        return (a * a + b * b) ** 0.5
-
-    vivid = sorted(base, key=_chroma, reverse=True)
-    bright = sorted(base, key=lambda x: float(x.get("oklab", {}).get("L", 0.0)), reverse=True)
-
-    return {
-        "dominant_main_color_ranking": [
-            {
-                "rank": idx + 1,
-                "area_ratio": round(float(item.get("area_ratio", 0.0)), 3),
-                "oklab": item.get("oklab", {}),
-            }
-            for idx, item in enumerate(base)
-        ],
-        "vividness_ranking": [
-            {
-                "rank": idx + 1,
-                "chroma": round(_chroma(item), 3),
-                "oklab": item.get("oklab", {}),
-            }
-            for idx, item in enumerate(vivid)
-        ],
-        "brightness_ranking": [
-            {
-                "rank": idx + 1,
-                "lightness": round(float(item.get("oklab", {}).get("L", 0.0)), 3),
-                "oklab": item.get("oklab", {}),
-            }
-            for idx, item in enumerate(bright)
-        ],
-    }
-
-
-def _to_oklab_palette(colors) -> list[dict]:
-    rows = []
-    for i, c in enumerate(colors, 1):
-        r = int(c[0])
-        g = int(c[1])
-        b = int(c[2])
-        lr = _srgb_channel_to_linear(r / 255.0)
-        lg = _srgb_channel_to_linear(g / 255.0)
-        lb = _srgb_channel_to_linear(b / 255.0)
-        L, a, b_lab = _linear_rgb_to_oklab(lr, lg, lb)
-        rows.append(
-            {
-                "rank": i,
-                "oklab": {"L": round(float(L), 3), "a": round(float(a), 3), "b": round(float(b_lab), 3)},
-            }
-        )
-    return rows
-
-
-def _to_oklab_user_selected(colors_list) -> list[dict]:
-    if not isinstance(colors_list, list):
-        raise ValueError("selected_colors must be a JSON array")
-
-    rows = []
-    for i, color in enumerate(colors_list, 1):
-        if isinstance(color, str):
-            r, g, b = hex_to_rgb(color)
-        elif isinstance(color, dict) and {"r", "g", "b"}.issubset(color.keys()):
-            r = max(0, min(255, int(color["r"])))
-            g = max(0, min(255, int(color["g"])))
-            b = max(0, min(255, int(color["b"])))
-        else:
-            raise ValueError(f"Invalid selected color payload at index {i - 1}: {color}")
-
-        lr = _srgb_channel_to_linear(r / 255.0)
-        lg = _srgb_channel_to_linear(g / 255.0)
-        lb = _srgb_channel_to_linear(b / 255.0)
-        L, a, b_lab = _linear_rgb_to_oklab(lr, lg, lb)
-        rows.append(
-            {
-                "rank": i,
-                "oklab": {"L": round(float(L), 3), "a": round(float(a), 3), "b": round(float(b_lab), 3)},
-            }
-        )
-    return rows
-
-
 def _write_pretty_json_with_inline_oklab(path: Path, data) -> None:
     def _to_json_safe(obj):
         if isinstance(obj, np.generic):
@@ -198,13 +111,15 @@ def _write_pretty_json_with_inline_oklab(path: Path, data) -> None:
         f.write(text + "\n")
 
 
-async def _save_upload_to_temp(image: UploadFile) -> str:
+async def _save_upload_to_temp(image: UploadFile) -> tuple[str, str]:
+    """( temp file path, SHA-256 of the upload ), hashed while it is written."""
     suffix = Path(image.filename or "").suffix.lower() or ".png"
     fd, temp_path = tempfile.mkstemp(suffix=suffix)
     os.close(fd)
 
     total_bytes = 0
     header = b""
+    sha256 = hashlib.sha256()
 
     try:
         await image.seek(0)
@@ -221,6 +136,7 @@ async def _save_upload_to_temp(image: UploadFile) -> str:
                 if total_bytes > MAX_UPLOAD_BYTES:
                     raise ValueError("Uploaded image exceeds 10MB.")
 
+                sha256.update(chunk)
                 await buffer.write(chunk)
 
         if total_bytes == 0:
@@ -230,7 +146,7 @@ async def _save_upload_to_temp(image: UploadFile) -> str:
             raise ValueError("Uploaded file is not a valid image.")
 
         await image.seek(0)
-        return temp_path
+        return temp_path, sha256.hexdigest()
     except Exception:
         if os.path.exists(temp_path):
             os.remove(temp_path)
@@ -248,20 +164,17 @@ async def api_extract(
 
     method = (method or "gwo").strip().lower()
 
-    if method not in {"gwo", "saliency", "k-means"}:
+    if method not in EXTRACT_METHODS:
         return HTMLResponse("<div class='text-red-500'>Invalid extraction method</div>", status_code=400)
 
     temp_path = None
 
     try:
-        temp_path = await _save_upload_to_temp(image)
-
-        if method == "saliency":
-            colors = await run_in_threadpool(extract_top10_saliency, temp_path, 10)
-        elif method == "k-means":
-            colors = await run_in_threadpool(extract_top10_kmeans, temp_path, 10)
-        else:
-            colors = await run_in_threadpool(extract_top10_gwo, temp_path, 10)
+        temp_path, sha256 = await _save_upload_to_temp(image)
+        name = EXTRACT_METHODS[method]
+        colors = await EXTRACTION_CACHE.get(
+            sha256, name, lambda: run_in_threadpool(RECORD_EXTRACTORS[name], temp_path, 10)
+        )
     except ValueError as e:
         return HTMLResponse(f"<div class='text-red-500'>{e}</div>", status_code=400)
 
@@ -309,7 +222,7 @@ async def api_record(
         return JSONResponse({"detail": "Invalid selected_colors payload"}, status_code=400)
 
     try:
-        user_selected_oklab = _to_oklab_user_selected(colors_list)
+        user_selected_oklab = to_oklab_user_selected(colors_list)
     except Exception as e:
         return JSONResponse({"detail": str(e)}, status_code=400)
 
@@ -319,53 +232,24 @@ async def api_record(
     temp_path = None
 
     try:
-        temp_path = await _save_upload_to_temp(image)
-
-        # Run core extraction algorithms and serialize results in Oklab format.
-        gwo_task = run_in_threadpool(extract_top10_gwo, temp_path, 10)
-        kmeans_task = run_in_threadpool(extract_top10_kmeans, temp_path, 10)
-        saliency_task = run_in_threadpool(extract_top10_saliency, temp_path, 10)
-
-        # Run Oklab visual-dimension extractors.
-        area_task = run_in_threadpool(extract_top10_area_ratio_oklab, temp_path, 10)
-        similar_task = run_in_threadpool(extract_top10_similar_area_oklab, temp_path, 10)
-        chroma_task = run_in_threadpool(extract_top10_chroma_saliency_oklab, temp_path, 10)
-        lightness_task = run_in_threadpool(extract_top10_lightness_ratio_oklab, temp_path, 10)
-
-        (
-            gwo_colors,
-            kmeans_colors,
-            saliency_colors,
-            area_data,
-            similar_data,
-            chroma_data,
-            lightness_data,
-        ) = await asyncio.gather(
-            gwo_task,
-            kmeans_task,
-            saliency_task,
-            area_task,
-            similar_task,
-            chroma_task,
-            lightness_task,
+        temp_path, sha256 = await _save_upload_to_temp(image)
+
+        # Only the extractors not cached since /api/extract run, concurrently, on pixels decoded once
+        decoded: asyncio.Task | None = None
+
+        async def _compute(name: str):
+            nonlocal decoded
+            if decoded is None:
+                decoded = asyncio.ensure_future(run_in_threadpool(read_bgr, temp_path))
+            pixels = await decoded
+            if pixels is None:
+                raise ValueError("Failed to decode image from path.")
+            return await run_in_threadpool(RECORD_EXTRACTORS[name], pixels, 10)
+
+        values = await asyncio.gather(
+            *(EXTRACTION_CACHE.get(sha256, name, lambda name=name: _compute(name)) for name in RECORD_EXTRACTORS)
         )
-
-        visual_rankings = _build_visual_rankings(area_data)
-
-        record = {
-            "image_name": image.filename,
-            "gwo_colors": _to_oklab_palette(gwo_colors),
-            "kmeans_colors": _to_oklab_palette(kmeans_colors),
-            "saliency_colors": _to_oklab_palette(saliency_colors),
-            "user_selected_colors": user_selected_oklab,
-            "visual_dimensions_oklab": {
-                "physical_area_ratio": area_data,
-                "similar_color_area_sum": similar_data,
-                "chroma_saliency": chroma_data,
-                "lightness_ratio": lightness_data,
-            },
-            "visual_rankings": visual_rankings,
-        }
+        record = assemble_record(image.filename, user_selected_oklab, dict(zip(RECORD_EXTRACTORS, values)))
 
         data_file = Path(__file__).resolve().parent.parent / "training_data.json"
 
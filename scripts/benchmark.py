@@ -0,0 +1,129 @@
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import tempfile
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.model_registry import model_registry
+from benchmarks.corpus import COMPLEXITIES, DEFAULT_RESOLUTIONS, build_corpus
+from benchmarks.suite import compare, run_suite
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent.parent / "benchmarks" / "baseline.json"
+
+
+def _parse_resolutions(value: str) -> list[tuple[int, int]]:
+    out = []
+    for item in value.split(","):
+        width, height = item.lower().split("x")
+        out.append((int(width), int(height)))
+    return out
+
+
+def _environment() -> dict:
+    import cv2
+    import numpy as np
+    import sklearn
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "scikit_learn": sklearn.__version__,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the extraction hot paths against a stored baseline")
+    parser.add_argument(
+        "--resolutions",
+        default=",".join(f"{w}x{h}" for w, h in DEFAULT_RESOLUTIONS),
+        help="Comma separated WxH list",
+    )
+    parser.add_argument("--complexities", default=",".join(COMPLEXITIES), help="Comma separated subset of flat,gradient,noisy")
+    parser.add_argument("--functions", default="*", help="Comma separated glob patterns of case names ( e.g. 'kmeans,*oklab*' )")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case ( median is reported )")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per case")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed")
+    parser.add_argument("--corpus_dir", default=None, help="Where the synthetic images are written ( default : temp dir )")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON to compare against")
+    parser.add_argument("--save_baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--output", default=None, help="Also write the results JSON here")
+    parser.add_argument("--time_threshold", type=float, default=0.25, help="Allowed relative wall-time growth")
+    parser.add_argument("--memory_threshold", type=float, default=0.25, help="Allowed relative peak-memory growth")
+    args = parser.parse_args()
+
+    # Flat corpus images have fewer distinct colors than clusters; that is expected here.
+    from sklearn.exceptions import ConvergenceWarning
+
+    warnings.filterwarnings("ignore", category=ConvergenceWarning)
+
+    patterns = [p.strip() for p in args.functions.split(",") if p.strip()]
+    corpus_dir = Path(args.corpus_dir) if args.corpus_dir else Path(tempfile.gettempdir()) / "iris_bench_corpus"
+    images = build_corpus(
+        corpus_dir,
+        resolutions=_parse_resolutions(args.resolutions),
+        complexities=[c.strip() for c in args.complexities.split(",") if c.strip()],
+        seed=args.seed,
+    )
+
+    def _progress(key: str, result: dict) -> None:
+        if "error" in result:
+            print(f"{key:<60} ERROR {result['error']}")
+        else:
+            print(
+                f"{key:<60} wall {result['wall_s'] * 1000:9.1f} ms  "
+                f"cpu {result['cpu_s'] * 1000:9.1f} ms  peak {result['peak_mem_mb']:8.1f} MB"
+            )
+
+    # The registry's active version, as served by the app
+    model = model_registry.active()
+    results = run_suite(
+        images,
+        model=model,
+        repeat=args.repeat,
+        warmup=args.warmup,
+        selected=lambda name: any(fnmatch.fnmatch(name, p) for p in patterns),
+        progress=_progress,
+    )
+    report = {"meta": {**_environment(), "seed": args.seed, "repeat": args.repeat, "model_version": model.version}, "results": results}
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Baseline written to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --save_baseline to create one.")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")).get("results", {})
+    regressions = compare(
+        results,
+        baseline,
+        time_threshold=args.time_threshold,
+        memory_threshold=args.memory_threshold,
+    )
+    if not regressions:
+        print(f"No regressions against {baseline_path}.")
+        return 0
+
+    print(f"{len(regressions)} regression(s) against {baseline_path}:")
+    for item in regressions:
+        print(f"  {item['case']:<60} {item['metric']:<12} {item['baseline']:.4g} -> {item['current']:.4g} (x{item['ratio']:.2f})")
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
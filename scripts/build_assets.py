@@ -0,0 +1,68 @@
+import argparse
+import gzip
+import hashlib
+import json
+import shutil
+from pathlib import Path
+
+from app.static_files import BUILD_DIR, MANIFEST_PATH, STATIC_DIR
+
+
+ASSET_SUFFIXES = {".css", ".js", ".svg", ".json", ".txt"}
+FINGERPRINT_LENGTH = 10
+
+
+def _fingerprinted(relative: Path, data: bytes) -> Path:
+    digest = hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]
+    return relative.with_name(f"{relative.stem}.{digest}{relative.suffix}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress app/static into app/static/build")
+    parser.add_argument("--min_bytes", type=int, default=512, help="Files smaller than this are not precompressed")
+    args = parser.parse_args()
+
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("brotli is not installed, writing gzip only")
+
+    if BUILD_DIR.exists():
+        shutil.rmtree(BUILD_DIR)
+
+    manifest: dict[str, str] = {}
+    raw_total = compressed_total = 0
+    for source in sorted(STATIC_DIR.rglob("*")):
+        if not source.is_file() or source.suffix not in ASSET_SUFFIXES:
+            continue
+        relative = source.relative_to(STATIC_DIR)
+        data = source.read_bytes()
+        target = BUILD_DIR / _fingerprinted(relative, data)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        manifest[relative.as_posix()] = target.relative_to(STATIC_DIR).as_posix()
+
+        raw_total += len(data)
+        if len(data) < args.min_bytes:
+            compressed_total += len(data)
+            continue
+        # mtime=0 keeps the gzip bytes reproducible across builds
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        target.with_name(target.name + ".gz").write_bytes(gz)
+        best = len(gz)
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            target.with_name(target.name + ".br").write_bytes(br)
+            best = min(best, len(br))
+        compressed_total += best
+        print(f"{relative.as_posix():<32} -> {manifest[relative.as_posix()]:<48} {len(data):7d} B -> {best:6d} B")
+
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    print(f"\n🪻 |||||| {len(manifest)} assets, {raw_total} B -> {compressed_total} B over the wire |||||| 🪻")
+    print(f"Manifest : {MANIFEST_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+import argparse
+import statistics
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.corpus import COMPLEXITIES, build_corpus
+from benchmarks.quality import matched_delta_e
+from core.ai import TIERS, extract_top10_gwo, get_tier
+from core.colors.color_oklch import _rgb_to_oklab_vectorized
+
+
+def _run(image_path: str, tier: str, patience: int | None, tol: float) -> tuple[float, dict, np.ndarray]:
+    # Same pixel sample for every run, so only the stopping rule differs
+    np.random.seed(0)
+    kwargs = {**get_tier(tier).kwargs_for("gwo"), "patience": patience}
+    start = time.perf_counter()
+    colors, stats = extract_top10_gwo(image_path, 10, tol=tol, return_stats=True, refine=True, **kwargs)
+    return time.perf_counter() - start, stats, _rgb_to_oklab_vectorized(colors / 255.0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="GWO early stopping vs the full evaluation budget on the benchmark corpus")
+    parser.add_argument("--resolutions", default="256x256,1024x768", help="Comma separated WxH list")
+    parser.add_argument("--complexities", default=",".join(COMPLEXITIES))
+    parser.add_argument("--tier", default="balanced", choices=list(TIERS), help="GWO population / budget / sample cap of this tier")
+    parser.add_argument("--patience", default="10,20,40", help="Comma separated patience values to compare")
+    parser.add_argument("--tol", type=float, default=1e-4, help="Relative improvement that resets the patience counter")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from sklearn.exceptions import ConvergenceWarning
+
+    warnings.filterwarnings("ignore", category=ConvergenceWarning)
+
+    resolutions = [tuple(int(v) for v in item.lower().split("x")) for item in args.resolutions.split(",")]
+    patiences = [int(p) for p in args.patience.split(",") if p.strip()]
+    images = build_corpus(
+        Path(tempfile.gettempdir()) / "iris_bench_corpus",
+        resolutions=resolutions,
+        complexities=[c.strip() for c in args.complexities.split(",") if c.strip()],
+        seed=args.seed,
+    )
+
+    summary: dict[int | None, list[tuple[float, int, float]]] = {p: [] for p in [*patiences, None]}
+    for image in images:
+        full_wall, full_stats, reference = _run(str(image.path), args.tier, None, args.tol)
+        summary[None].append((full_wall, full_stats["evals"], 0.0))
+        print(f"{image.name:<24} full      {full_wall:7.2f} s  {full_stats['evals']:6d} evals")
+        for patience in patiences:
+            wall, stats, labs = _run(str(image.path), args.tier, patience, args.tol)
+            delta = matched_delta_e(labs, reference)["mean"]
+            summary[patience].append((wall, stats["evals"], delta))
+            print(f"{image.name:<24} patience {patience:<3} {wall:6.2f} s  {stats['evals']:6d} evals  dE_ok vs full {delta:.4f}")
+
+    print("\n🪻 |||||| Summary ( mean over images ) |||||| 🪻")
+    for patience, rows in summary.items():
+        label = "full" if patience is None else f"patience {patience}"
+        print(
+            f"{label:<12} wall {statistics.mean(r[0] for r in rows):7.2f} s   "
+            f"evals {statistics.mean(r[1] for r in rows):8.0f}   "
+            f"dE_ok vs full {statistics.mean(r[2] for r in rows):.4f} ( max {max(r[2] for r in rows):.4f} )"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,107 @@
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.config import settings
+from app.core.model_extract_colors import extract_dominant_colors_with_model
+from app.model_registry import ActiveModel, model_registry
+from benchmarks.corpus import COMPLEXITIES, build_corpus
+from benchmarks.quality import hex_palette_to_oklab, matched_delta_e
+from core.ai import set_gwo_refinement
+from core.ai.tiers import TIERS
+from core.timing import start_timings, stop_timings
+
+
+def _run_once(image_path: str, tier: str, n_colors: int, model: ActiveModel) -> tuple[float, dict, list[str]]:
+    timings, token = start_timings()
+    try:
+        start = time.perf_counter()
+        palette = extract_dominant_colors_with_model(
+            image_path, n_colors, scorer=model.scorer, tier=tier, skip_stages=model.info.skip_stages
+        )
+        wall = time.perf_counter() - start
+    finally:
+        stop_timings(token)
+    stages = {name: entry["ms"] for name, entry in timings.totals().items()}
+    return wall, stages, [color["hex"] for color in palette]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Latency and palette deltas of the extraction tiers on the benchmark corpus")
+    parser.add_argument("--resolutions", default="256x256,1024x768", help="Comma separated WxH list")
+    parser.add_argument("--complexities", default=",".join(COMPLEXITIES))
+    parser.add_argument("--tiers", default=",".join(TIERS), help="Tiers to compare")
+    parser.add_argument("--reference", default="quality", help="Tier the palettes are compared against")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per image and tier ( median is reported )")
+    parser.add_argument("--n_colors", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gwo_refine", action="store_true", default=settings.gwo_refine, help="Run the GWO refinement ( GWO_REFINE )")
+    parser.add_argument("--output", default=None, help="Also write the per-image results JSON here")
+    args = parser.parse_args()
+
+    from sklearn.exceptions import ConvergenceWarning
+
+    warnings.filterwarnings("ignore", category=ConvergenceWarning)
+    set_gwo_refinement(args.gwo_refine)
+    model = model_registry.active()
+    print(f"🪻 ||||||  Model version : {model.version}  |||||| 🪻")
+
+    resolutions = [tuple(int(v) for v in item.lower().split("x")) for item in args.resolutions.split(",")]
+    tiers = [t.strip() for t in args.tiers.split(",") if t.strip()]
+    if args.reference not in tiers:
+        tiers.append(args.reference)
+    images = build_corpus(
+        Path(tempfile.gettempdir()) / "iris_bench_corpus",
+        resolutions=resolutions,
+        complexities=[c.strip() for c in args.complexities.split(",") if c.strip()],
+        seed=args.seed,
+    )
+
+    # Extraction runs in a worker thread, as it does behind the app's run_in_threadpool
+    results: dict[str, dict[str, dict]] = {}
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        for image in images:
+            per_tier: dict[str, dict] = {}
+            for tier in tiers:
+                runs = [
+                    executor.submit(_run_once, str(image.path), tier, args.n_colors, model).result()
+                    for _ in range(max(1, args.repeat))
+                ]
+                per_tier[tier] = {
+                    "wall_s": statistics.median(run[0] for run in runs),
+                    "stages_ms": runs[-1][1],
+                    "palette": runs[-1][2],
+                }
+            reference = hex_palette_to_oklab(per_tier[args.reference]["palette"])
+            for tier, entry in per_tier.items():
+                entry["delta_e"] = matched_delta_e(hex_palette_to_oklab(entry["palette"]), reference)
+            results[image.name] = per_tier
+            print(
+                f"{image.name:<24} "
+                + "  ".join(
+                    f"{tier} {entry['wall_s'] * 1000:8.1f} ms dE {entry['delta_e']['mean']:.4f}"
+                    for tier, entry in per_tier.items()
+                )
+            )
+
+    print("\n🪻 |||||| Summary ( median over images ) |||||| 🪻")
+    for tier in tiers:
+        walls = [results[name][tier]["wall_s"] for name in results]
+        deltas = [results[name][tier]["delta_e"]["mean"] for name in results]
+        print(
+            f"{tier:<10} wall {statistics.median(walls) * 1000:9.1f} ms   "
+            f"mean dE_ok vs {args.reference} {statistics.median(deltas):.4f}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from app.config import settings
+from app.services.export_service import EXPORT_FORMATS, open_export
+
+
+async def _export(args: argparse.Namespace, fmt: str) -> tuple[str, int]:
+    export = await open_export(Path(args.db), fmt, since=args.since, until=args.until, after_id=args.after_id)
+    written = 0
+    if args.output == "-":
+        out = sys.stdout.buffer
+        async for chunk in export.chunks:
+            out.write(chunk)
+            written += len(chunk)
+        out.flush()
+        return "stdout", written
+
+    # Written next to the target and renamed at the end : an interrupted export leaves no truncated file
+    target = Path(args.output)
+    tmp = target.with_name(f".{target.name}.part")
+    try:
+        with tmp.open("wb") as out:
+            async for chunk in export.chunks:
+                out.write(chunk)
+                written += len(chunk)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    tmp.replace(target)
+    return str(target), written
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export the palette history as CSV, JSONL, Parquet or Arrow")
+    parser.add_argument("--output", default="-", help="Output file ( '-' : stdout ); its extension picks the format")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default=None, help="Default : from --output, else csv")
+    parser.add_argument("--since", default=None, help="ISO date or datetime, inclusive ( UTC when no offset )")
+    parser.add_argument("--until", default=None, help="ISO date or datetime, exclusive")
+    parser.add_argument("--after_id", type=int, default=0, help="Only results with a larger id ( incremental exports )")
+    parser.add_argument("--db", default=str(settings.db_path), help="SQLite history database")
+    args = parser.parse_args()
+
+    fmt = args.format
+    if fmt is None:
+        suffix = Path(args.output).suffix.lower().lstrip(".")
+        by_extension = {extension: name for name, (_, extension) in EXPORT_FORMATS.items()}
+        fmt = by_extension.get(suffix, suffix if suffix in EXPORT_FORMATS else "csv")
+    if not Path(args.db).exists():
+        print(f"History database not found: {args.db}", file=sys.stderr)
+        return 1
+
+    try:
+        destination, written = asyncio.run(_export(args, fmt))
+    except ValueError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    # Progress goes to stderr, stdout may be the export itself
+    print(f"🪻 ||||||  Exported {fmt} to {destination} ( {written / 1e6:.1f} MB )  |||||| 🪻", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
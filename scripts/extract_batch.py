@@ -0,0 +1,267 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from app.config import settings
+from app.services.file_service import ALLOWED_IMAGE_EXTENSIONS
+from core.colors.precision import set_default_precision
+from scripts.jsonl_output import file_sha256, init_worker, prepare_output
+
+
+def _expand_inputs(inputs: list[str], files_from: str | None) -> list[Path]:
+    """Directories ( recursive ), glob patterns and plain files, plus one path per line of `files_from` ( '-' : stdin )."""
+    items = list(inputs)
+    if files_from:
+        source = sys.stdin if files_from == "-" else open(files_from, encoding="utf-8")
+        with source:
+            items.extend(line.strip() for line in source if line.strip())
+
+    paths: list[Path] = []
+    seen: set[Path] = set()
+
+    def _add(path: Path) -> None:
+        resolved = path.resolve()
+        if resolved not in seen and path.suffix.lower() in ALLOWED_IMAGE_EXTENSIONS:
+            seen.add(resolved)
+            paths.append(path)
+
+    for item in items:
+        path = Path(item)
+        if path.is_dir():
+            for child in sorted(p for p in path.rglob("*") if p.is_file()):
+                _add(child)
+        elif path.is_file():
+            _add(path)
+        else:
+            for match in sorted(glob.glob(item, recursive=True)):
+                if Path(match).is_file():
+                    _add(Path(match))
+    return paths
+
+
+def _init_extract_worker(threads_per_worker: int, precision: str, gwo_refine: bool) -> None:
+    import warnings
+
+    from sklearn.exceptions import ConvergenceWarning
+
+    from core.ai import set_gwo_refinement
+
+    init_worker(threads_per_worker)
+    set_default_precision(precision)
+    set_gwo_refinement(gwo_refine)
+    # Flat images have fewer distinct colors than clusters; that is expected here.
+    warnings.filterwarnings("ignore", category=ConvergenceWarning)
+
+
+def _decode(path: str, max_pixels: int):
+    """Decode stage : ( kind, payload ) where kind is 'animated' ( payload None ), 'tiled' ( TiledScan ) or 'still' ( BGR )."""
+    from core.frames import is_animated
+    from core.image_io import read_bgr
+    from core.tiling import needs_tiling, scan_tiled
+
+    if is_animated(path):
+        return "animated", None
+    if needs_tiling(path, max_pixels):
+        return "tiled", scan_tiled(path, max_pixels=max_pixels, tile_pixels=settings.tile_pixels, workers=1)
+    return "still", read_bgr(path)
+
+
+def _extract(path: str, decoded, n_colors: int, method: str, tier: str) -> dict:
+    from app.core.animated_extract_colors import extract_animated_palette
+    from app.core.extract_colors import extract_dominant_colors, extract_dominant_colors_tiled
+    from app.core.model_extract_colors import extract_dominant_colors_with_model
+    from app.model_registry import model_registry
+
+    kind, payload = decoded
+    if kind == "animated":
+        result, _ = extract_animated_palette(
+            path,
+            n_colors,
+            max_frames=settings.animation_max_frames,
+            max_decoded=settings.animation_max_decoded_frames,
+            scene_threshold=settings.animation_scene_threshold,
+        )
+        return result
+    image_bgr = payload.proxy if kind == "tiled" and payload is not None else payload
+    if image_bgr is None:
+        raise ValueError("could not be decoded")
+    if method == "model":
+        # The registry's active version, loaded once per worker process
+        active = model_registry.active()
+        palette = extract_dominant_colors_with_model(
+            image_bgr,
+            n_colors,
+            scorer=active.scorer,
+            similarity_threshold=settings.model_similarity_threshold,
+            tier=tier,
+            skip_stages=active.info.skip_stages,
+        )
+        return {"palette": palette, "model_version": active.version}
+    if kind == "tiled":
+        palette = extract_dominant_colors_tiled(payload, n_colors)
+    else:
+        palette = extract_dominant_colors(image_bgr, n_colors)
+    return {"palette": palette}
+
+
+def _extract_chunk(jobs: list[tuple[int, str, str]], n_colors: int, method: str, tier: str) -> list[tuple[int, dict]]:
+    """
+    Worker : extract a chunk of images, decoding image i + 1 on a helper thread while image i is
+    being extracted ( OpenCV decoding releases the GIL ).
+    """
+    out: list[tuple[int, dict]] = []
+    with ThreadPoolExecutor(max_workers=1) as decoder:
+        upcoming = decoder.submit(_decode, jobs[0][1], settings.max_extract_pixels)
+        for pos, (index, path, sha256) in enumerate(jobs):
+            current = upcoming
+            if pos + 1 < len(jobs):
+                upcoming = decoder.submit(_decode, jobs[pos + 1][1], settings.max_extract_pixels)
+            record = {"path": path, "sha256": sha256, "n_colors": n_colors, "method": method}
+            if method == "model":
+                record["tier"] = tier
+            try:
+                start = time.perf_counter()
+                record.update(_extract(path, current.result(), n_colors, method, tier))
+                record["seconds"] = round(time.perf_counter() - start, 4)
+            except Exception as exc:
+                record["error"] = f"{type(exc).__name__}: {exc}"
+            out.append((index, record))
+    return out
+
+
+def _hashed_jobs(paths: list[Path], done: set[str], hash_workers: int):
+    """( path, sha256 ) of images not processed yet, in input order; files are hashed ahead on threads."""
+    with ThreadPoolExecutor(max_workers=hash_workers) as hasher:
+        for path, sha256 in zip(paths, hasher.map(file_sha256, paths)):
+            if sha256 in done:
+                continue
+            done.add(sha256)  # also dedupes identical images within this run
+            yield str(path), sha256
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Extract palettes from many images in parallel, streaming JSONL")
+    parser.add_argument("inputs", nargs="*", help="Image files, directories ( searched recursively ) or glob patterns")
+    parser.add_argument("--files_from", default=None, help="File with one image path per line ( '-' : stdin )")
+    parser.add_argument("--output", default="palettes.jsonl", help="JSONL output, appended to and resumed from ( '-' : stdout )")
+    parser.add_argument("-n", "--n_colors", type=int, default=5, help="Number of colors per palette")
+    parser.add_argument("--method", choices=["kmeans", "model"], default="kmeans", help="Extraction method")
+    parser.add_argument("--tier", default=settings.extraction_tier, help="Model method tier : fast, balanced or quality")
+    parser.add_argument("--order", choices=["completion", "input"], default="completion", help="Order of the output lines")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--threads_per_worker", type=int, default=1, help="Native BLAS / OpenMP threads per worker")
+    parser.add_argument(
+        "--precision",
+        choices=["float64", "float32"],
+        default=settings.compute_precision,
+        help="Compute precision ( see scripts.validate_precision )",
+    )
+    parser.add_argument("--chunk", type=int, default=8, help="Images per task ( decode and extraction overlap within a task )")
+    args = parser.parse_args()
+
+    from core.ai.tiers import get_tier
+
+    tier = get_tier(args.tier).name
+    n_colors = max(1, min(12, args.n_colors))
+    to_stdout = args.output == "-"
+    log_stream = sys.stderr if to_stdout else sys.stdout
+
+    def log(message: str) -> None:
+        print(message, file=log_stream, flush=True)
+
+    paths = _expand_inputs(args.inputs, args.files_from)
+    if not paths:
+        log("No images found.")
+        return 1
+    output_path = Path(args.output)
+    done = set() if to_stdout else prepare_output(output_path, key="sha256")
+    log(f"🪻 ||||||  {len(paths)} images found, {len(done)} already in {args.output}  |||||| 🪻")
+
+    workers = max(1, args.workers)
+    chunk_size = max(1, args.chunk)
+    jobs = _hashed_jobs(paths, done, hash_workers=min(4, workers))
+
+    def _next_chunk(start_index: int) -> list[tuple[int, str, str]]:
+        chunk = []
+        for offset in range(chunk_size):
+            job = next(jobs, None)
+            if job is None:
+                break
+            chunk.append((start_index + offset, *job))
+        return chunk
+
+    written = 0
+    failed = 0
+    next_index = 0  # next job index to hand out
+    next_to_write = 0  # --order input : lowest index not written yet
+    reorder: dict[int, dict] = {}
+    start = time.perf_counter()
+    out = sys.stdout if to_stdout else output_path.open("a", encoding="utf-8")
+
+    def _write(record: dict) -> None:
+        nonlocal written, failed
+        if "error" in record:
+            # Failures are reported, not recorded, so a rerun retries them
+            failed += 1
+            log(f"[SKIP] {record['path']}: {record['error']}")
+            return
+        out.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        out.flush()
+        written += 1
+        if written % 100 == 0:
+            log(f"{written} palettes ({written / (time.perf_counter() - start):.1f} images/s)")
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_extract_worker,
+            initargs=(max(1, args.threads_per_worker), args.precision, settings.gwo_refine),
+        ) as pool:
+            in_flight = set()
+
+            def _submit_next() -> bool:
+                nonlocal next_index
+                # --order input : bound the reorder buffer behind a slow chunk
+                if args.order == "input" and next_index - next_to_write >= 4 * workers * chunk_size:
+                    return False
+                chunk = _next_chunk(next_index)
+                if not chunk:
+                    return False
+                next_index += len(chunk)
+                in_flight.add(pool.submit(_extract_chunk, chunk, n_colors, args.method, tier))
+                return True
+
+            # Two chunks per worker : one running, one queued, so workers never wait on the parent
+            while len(in_flight) < 2 * workers and _submit_next():
+                pass
+
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    in_flight.discard(future)
+                    for index, record in future.result():
+                        if args.order == "completion":
+                            _write(record)
+                        else:
+                            reorder[index] = record
+                    while next_to_write in reorder:
+                        _write(reorder.pop(next_to_write))
+                        next_to_write += 1
+                while len(in_flight) < 2 * workers and _submit_next():
+                    pass
+    finally:
+        if not to_stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    log(f"🪻 ||||||  Wrote {written} palettes ( {failed} failed ) in {elapsed:.1f}s  |||||| 🪻")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
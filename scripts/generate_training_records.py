@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from scripts.jsonl_output import file_sha256, init_worker, prepare_output
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".avif"}
+
+
+def _load_labels(labels_path: Path) -> dict[str, list]:
+    """
+    Labels file : JSON object mapping an image path ( relative to --images ) or bare
+    file name to its user-selected colors, in rank order. Colors use the same payload
+    as `/api/record` : "#rrggbb" strings or {"r", "g", "b"} objects.
+    """
+    with labels_path.open("r", encoding="utf-8") as f:
+        labels = json.load(f)
+    if not isinstance(labels, dict):
+        raise ValueError("labels file must be a JSON object of image name -> selected colors")
+    return labels
+
+
+def _build_one(image_path: str, image_name: str, sha256: str, selected_colors: list) -> dict:
+    from core.ai.train.records import build_record
+
+    record = build_record(image_path, image_name, selected_colors)
+    record["image_sha256"] = sha256
+    return record
+
+
+def generate():
+    parser = argparse.ArgumentParser(description="Generate palette training records from a directory of labeled images")
+    parser.add_argument("--images", required=True, help="Directory of images ( searched recursively )")
+    parser.add_argument("--labels", required=True, help="JSON object : image name -> user-selected colors")
+    parser.add_argument("--output", default="training_data.jsonl", help="JSONL output, appended to and resumed from")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--threads_per_worker", type=int, default=1, help="Native BLAS / OpenMP threads per worker")
+    args = parser.parse_args()
+
+    image_dir = Path(args.images)
+    output_path = Path(args.output)
+    labels = _load_labels(Path(args.labels))
+    done = prepare_output(output_path)
+
+    jobs = []
+    skipped = 0
+    for path in sorted(p for p in image_dir.rglob("*") if p.suffix.lower() in IMAGE_EXTENSIONS):
+        rel_name = path.relative_to(image_dir).as_posix()
+        selected = labels.get(rel_name, labels.get(path.name))
+        if selected is None:
+            continue
+        sha256 = file_sha256(path)
+        if sha256 in done:
+            skipped += 1
+            continue
+        done.add(sha256)  # also dedupes identical images within this run
+        jobs.append((str(path), rel_name, sha256, selected))
+
+    print(f"🪻 ||||||  {len(jobs)} images to record, {skipped} already recorded or duplicate  |||||| 🪻")
+    if not jobs:
+        return
+
+    written = 0
+    failed = 0
+    start = time.perf_counter()
+    max_in_flight = max(1, args.workers) * 4
+    pending_jobs = iter(jobs)
+
+    with (
+        output_path.open("a", encoding="utf-8") as out,
+        ProcessPoolExecutor(
+            max_workers=max(1, args.workers),
+            initializer=init_worker,
+            initargs=(max(1, args.threads_per_worker),),
+        ) as pool,
+    ):
+        in_flight = {}
+
+        def _submit_next() -> bool:
+            job = next(pending_jobs, None)
+            if job is None:
+                return False
+            in_flight[pool.submit(_build_one, *job)] = job[1]
+            return True
+
+        while len(in_flight) < max_in_flight and _submit_next():
+            pass
+
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                image_name = in_flight.pop(future)
+                try:
+                    record = future.result()
+                except Exception as exc:
+                    failed += 1
+                    print(f"[SKIP] {image_name}: {exc}")
+                else:
+                    # One complete line per record, flushed so an interruption loses at most the in-flight images
+                    out.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                    out.flush()
+                    written += 1
+                _submit_next()
+
+            if written and written % 100 == 0:
+                rate = written / (time.perf_counter() - start)
+                print(f"{written}/{len(jobs)} records ({rate:.1f} images/s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"🪻 ||||||  Wrote {written} records ( {failed} failed ) in {elapsed:.1f}s  |||||| 🪻")
+    print(f"🪻 ||||||  Records appended to {output_path}  |||||| 🪻")
+
+
+if __name__ == "__main__":
+    generate()
@@ -0,0 +1,43 @@
+"""Resumable JSONL output shared by the batch CLIs : one flushed record per line, keyed by image SHA-256."""
+
+import hashlib
+import json
+from pathlib import Path
+
+
+def file_sha256(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def prepare_output(output_path: Path, key: str = "image_sha256") -> set[str]:
+    """
+    Return hashes ( the `key` field ) already recorded in the JSONL output.
+    A trailing partial line left by an interrupted run is truncated so appends stay valid.
+    """
+    done: set[str] = set()
+    if not output_path.exists():
+        return done
+
+    with output_path.open("rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            sha256 = json.loads(line).get(key)
+            if sha256:
+                done.add(sha256)
+    return done
+
+
+def init_worker(threads_per_worker: int) -> None:
+    # Processes already provide the parallelism : keep native BLAS / OpenMP pools small.
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(limits=threads_per_worker)
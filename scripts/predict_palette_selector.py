@@ -1,15 +1,21 @@
 import argparse
-import torch
+import json
+import time
 import numpy as np
 import scipy.optimize as optimize
 from core.ai.train.dataset import PaletteRankingDataset
-from core.ai.train.model import AestheticScorerMLP, apply_nms, load_model, calculate_delta_e
+from core.ai.train.model import AestheticScorerMLP, load_model, nms_indices
+
+SOURCE_NAMES = ["gwo_colors", "kmeans_colors", "saliency_colors"]
+MATCH_THRESHOLD = 0.01 # Delta E under which a prediction counts as a ground-truth hit
 
 def predict_and_evaluate():
     parser = argparse.ArgumentParser(description="Predict top 10 palette colors using AI Scorer")
     parser.add_argument("--data", required=True, help="Path to JSON file containing candidate features")
     parser.add_argument("--model", default="models/palette_scorer.pth", help="Path to trained model")
     parser.add_argument("--sim_threshold", type=float, default=0.02, help="NMS Oklab distance threshold ( Delta E )")
+    parser.add_argument("--top_k", type=int, default=10, help="Number of colors predicted per image")
+    parser.add_argument("--report", default="evaluation_report.json", help="Where to write the JSON metrics report")
     args = parser.parse_args()
 
     model = AestheticScorerMLP(input_dim=19)
@@ -26,68 +32,84 @@ def predict_and_evaluate():
         print("No candidate data found.")
         return
 
-    all_precisions = []
-    all_avg_dists = []
+    start = time.perf_counter()
+    features, _, _, mask = dataset.to_padded_tensors()
+
+    # One padded forward pass over the whole dataset
+    scores = model.predict_proba(features).squeeze(-1).numpy()
+    features = features.numpy()
+    mask = mask.numpy()
+    labs = features[:, :, 4:7] # Oklab columns of the feature vector
+    sources = features[:, :, 0:3].argmax(axis=-1)
+
+    selected = nms_indices(labs, scores, args.top_k, args.sim_threshold, mask=mask)
+    sel_valid = selected >= 0
+    pred_labs = np.take_along_axis(labs, np.maximum(selected, 0)[:, :, None], axis=1)
+
+    # Padded ground truth
+    max_targets = max((len(grp["target_labs"]) for grp in dataset.image_groups), default=0)
+    target_labs = np.zeros((len(dataset), max(max_targets, 1), 3), dtype=np.float32)
+    target_valid = np.zeros((len(dataset), max(max_targets, 1)), dtype=bool)
+    for i, grp in enumerate(dataset.image_groups):
+        n = len(grp["target_labs"])
+        if n:
+            target_labs[i, :n] = grp["target_labs"]
+            target_valid[i, :n] = True
+
+    # (B, K, T) prediction-to-target distances for every image at once
+    cost = np.linalg.norm(pred_labs[:, :, None, :] - target_labs[:, None, :, :], axis=-1)
+    pair_valid = sel_valid[:, :, None] & target_valid[:, None, :]
+    nearest = np.where(pair_valid, cost, np.inf).min(axis=2)
+    matches = ((nearest < MATCH_THRESHOLD) & sel_valid).sum(axis=1)
+    precisions = matches / np.maximum(sel_valid.sum(axis=1), 1)
 
-    for idx in range(len(dataset)):
-        features, labels, _, _ = dataset[idx]
-        grp = dataset.image_groups[idx]
+    per_image = []
+    for b, grp in enumerate(dataset.image_groups):
         meta_list = grp["metadata"]
-        target_labs = grp["target_labs"]
-        image_name = meta_list[0]['image'] if meta_list and meta_list[0]['image'] else f"Image_{idx}"
+        image_name = meta_list[0]['image'] if meta_list and meta_list[0]['image'] else f"Image_{b}"
+        k = int(sel_valid[b].sum())
+        t = int(target_valid[b].sum())
+        entry = {
+            "image": image_name,
+            "palette": [
+                {
+                    "oklab": [round(float(v), 4) for v in pred_labs[b, r]],
+                    "source": SOURCE_NAMES[int(sources[b, selected[b, r]])],
+                    "score": round(float(scores[b, selected[b, r]]), 4),
+                }
+                for r in range(k)
+            ],
+        }
+        if t:
+            # Average distance of the optimal ( Hungarian ) prediction-target assignment
+            row_ind, col_ind = optimize.linear_sum_assignment(cost[b, :k, :t])
+            entry["precision_at_k"] = round(float(precisions[b]), 4)
+            entry["avg_distance"] = round(float(cost[b, row_ind, col_ind].mean()), 4)
+        per_image.append(entry)
 
-        # Predict context-aware batched items
-        scores = model.predict_proba(features.unsqueeze(0)).numpy().flatten()
-        
-        candidates = []
-        for i, meta in enumerate(meta_list):
-            candidates.append({
-                "oklab": {"L": meta["lab"][0], "a": meta["lab"][1], "b": meta["lab"][2]},
-                "source": meta["src"],
-            })
-            
-        print(f"\n🪻 ||||||  Output Palette for Image: {image_name}  |||||| 🪻")
-        top_10 = apply_nms(candidates, scores, max_colors=10, similarity_threshold=args.sim_threshold)
-        
-        # Verify Top 10
-        pred_labs = []
-        for rank, color in enumerate(top_10, 1):
-            L, a, b = color['oklab']['L'], color['oklab']['a'], color['oklab']['b']
-            pred_labs.append([L, a, b])
-            print(f"Rank {rank}: Oklab(L={L:.3f}, a={a:.3f}, b={b:.3f}) | Source: {color['source']}")
+    evaluated = [e for e in per_image if "precision_at_k" in e]
+    summary = {
+        "model": args.model,
+        "data": args.data,
+        "num_images": len(per_image),
+        "num_evaluated": len(evaluated),
+        "top_k": args.top_k,
+        "sim_threshold": args.sim_threshold,
+        "mean_precision_at_k": float(np.mean([e["precision_at_k"] for e in evaluated])) if evaluated else None,
+        # Recall equals precision while K matches the ground-truth count
+        "mean_avg_distance": float(np.mean([e["avg_distance"] for e in evaluated])) if evaluated else None,
+        "seconds": round(time.perf_counter() - start, 4),
+    }
 
-        # Evaluation against target user_selected_colors
-        if target_labs:
-            # 1. Precision@10: Count of predictions matching any target (Delta E < 0.01)
-            matches = 0
-            for plab in pred_labs:
-                if any(calculate_delta_e(plab, tlab) < 0.01 for tlab in target_labs):
-                    matches += 1
-            p10 = matches / len(top_10) if len(top_10) > 0 else 0
-            all_precisions.append(p10)
-            
-            # 2. Average Distance (Hungarian Matching)
-            # Create distance matrix
-            cost_matrix = np.zeros((len(pred_labs), len(target_labs)))
-            for i, p in enumerate(pred_labs):
-                for j, t in enumerate(target_labs):
-                    cost_matrix[i, j] = calculate_delta_e(p, t)
-            
-            # Solve optimal assignment
-            row_ind, col_ind = optimize.linear_sum_assignment(cost_matrix)
-            matched_dists = cost_matrix[row_ind, col_ind]
-            avg_dist = np.mean(matched_dists)
-            all_avg_dists.append(avg_dist)
-            
-            print(f"> Evaluation Metrics:")
-            print(f"  Precision@10: {p10*100:.1f}%")
-            print(f"  Avg Color Distance (Delta E): {avg_dist:.4f}")
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "images": per_image}, f, ensure_ascii=False, indent=2)
 
-    if all_precisions:
-        print("\n🪻 ||||||  OVERALL DATASET EVALUATION  |||||| 🪻")
-        print(f"Mean Precision@10: {np.mean(all_precisions)*100:.2f}%")
-        print(f"Mean Recall@10:    {np.mean(all_precisions)*100:.2f}% (Since K matches Ground Truth count)")
-        print(f"Mean Avg Distance: {np.mean(all_avg_dists):.4f}")
+    print("\n🪻 ||||||  OVERALL DATASET EVALUATION  |||||| 🪻")
+    if evaluated:
+        print(f"Mean Precision@{args.top_k}: {summary['mean_precision_at_k']*100:.2f}%")
+        print(f"Mean Avg Distance: {summary['mean_avg_distance']:.4f}")
+    print(f"Evaluated {summary['num_images']} images in {summary['seconds']:.3f}s")
+    print(f"🪻 ||||||  Report written to {args.report}  |||||| 🪻")
 
 if __name__ == "__main__":
     predict_and_evaluate()
@@ -0,0 +1,50 @@
+import argparse
+import shutil
+from pathlib import Path
+
+from app.config import settings
+from app.model_registry import MANIFEST_NAME, read_manifest, register_version, write_manifest
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Register a trained scorer model in models/registry.json")
+    parser.add_argument("model", nargs="?", help="Trained .pth file ( copied into the models directory )")
+    parser.add_argument("--version", required=True, help="Version name, e.g. 2.0 or 2026-10-19")
+    parser.add_argument("--activate", action="store_true", help="Make it the active version ( workers hot-swap to it )")
+    parser.add_argument("--models_dir", default=str(settings.models_dir), help="Models directory holding the manifest")
+    args = parser.parse_args()
+
+    models_dir = Path(args.models_dir)
+    if args.model is None:
+        # Switch to an already registered version
+        manifest = read_manifest(models_dir)
+        if manifest is None or args.version not in manifest["versions"]:
+            print(f"Version {args.version} is not registered.")
+            return 1
+        manifest["active"] = args.version
+        write_manifest(models_dir, manifest)
+        print(f"🪻 ||||||  Activated model {args.version}  |||||| 🪻")
+        return 0
+
+    source = Path(args.model)
+    # Versioned file name : a registered artifact is never overwritten in place
+    file_name = f"{source.stem}-{args.version}{source.suffix}"
+    target = models_dir / file_name
+    if target.exists():
+        print(f"{target} already exists.")
+        return 1
+    models_dir.mkdir(parents=True, exist_ok=True)
+    legacy = settings.model_path
+    if read_manifest(models_dir) is None and legacy.parent.resolve() == models_dir.resolve() and legacy.exists():
+        # First registration : the model served so far becomes a version of its own and stays active
+        register_version(models_dir, legacy.stem, legacy.name, activate=True)
+    shutil.copy2(source, target)
+    info = register_version(models_dir, args.version, file_name, activate=args.activate)
+    manifest = read_manifest(models_dir)
+    print(f"🪻 ||||||  Registered model {info.version} ( {file_name}, sha256 {info.sha256[:12]} )  |||||| 🪻")
+    print(f"🪻 ||||||  Active version : {manifest['active']} ( {models_dir / MANIFEST_NAME} )  |||||| 🪻")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,15 +1,18 @@
 import argparse
+import time
 import torch
-from torch.utils.data import DataLoader
 from core.ai.train.dataset import PaletteRankingDataset
 from core.ai.train.model import AestheticScorerMLP, CombinedRankingLoss, save_model
 import os
 
 def train():
     parser = argparse.ArgumentParser(description="Train the Aesthetic Color Selector")
-    parser.add_argument("--data", default="training_data.json", help="Path to JSON training data")
+    parser.add_argument("--data", default="training_data.json", help="Path to JSON / JSONL training data")
     parser.add_argument("--epochs", type=int, default=150, help="Number of epochs")
     parser.add_argument("--lr", type=float, default=1e-3, help="Learning rate")
+    parser.add_argument("--batch_size", type=int, default=4, help="Images per step ( 0 = full-batch epochs )")
+    parser.add_argument("--device", default="cpu", help="Torch device for the resident dataset and model")
+    parser.add_argument("--compile", action="store_true", help="Wrap the model with torch.compile")
     parser.add_argument("--save_path", default="models/palette_scorer.pth", help="Model save path")
     args = parser.parse_args()
 
@@ -18,30 +21,53 @@ def train():
         print("No data parsed. Exiting.")
         return
 
-    # Batch size is number of images. Each image contains 30 candidates.
-    dataloader = DataLoader(dataset, batch_size=4, shuffle=True)
+    # The whole dataset lives on the device as padded tensors ( + candidate mask ),
+    # so a step is just an index_select instead of a DataLoader collate.
+    device = torch.device(args.device)
+    features, labels, weights, mask = dataset.to_padded_tensors(device)
+    num_images = features.size(0)
+    batch_size = num_images if args.batch_size <= 0 else min(args.batch_size, num_images)
+    num_batches = (num_images + batch_size - 1) // batch_size
 
-    model = AestheticScorerMLP(input_dim=19)
+    model = AestheticScorerMLP(input_dim=19).to(device)
     criterion = CombinedRankingLoss()
     optimizer = torch.optim.Adam(model.parameters(), lr=args.lr, weight_decay=1e-4)
+    # Keep a handle on the eager module : its state_dict is what gets saved.
+    forward = torch.compile(model) if args.compile else model
 
     model.train()
     print("🪻 ||||||  Starting Training  |||||| 🪻")
-    
+    print(f"Images: {num_images} | Candidates (padded): {features.size(1)} | Batch: {batch_size} | Device: {device}")
+
+    start = time.perf_counter()
+    window_start = start
+    window_samples = 0
+
     for epoch in range(args.epochs):
-        total_loss = 0.0
-        for features, labels, weights, _ in dataloader:
-            optimizer.zero_grad()
-            logits = model(features)
-            
-            loss = criterion(logits, labels, weights)
+        total_loss = torch.zeros((), device=device)
+        order = torch.randperm(num_images, device=device)
+        for step in range(num_batches):
+            idx = order[step * batch_size:(step + 1) * batch_size]
+            optimizer.zero_grad(set_to_none=True)
+            logits = forward(features[idx])
+
+            loss = criterion(logits, labels[idx], weights[idx], mask[idx])
             loss.backward()
             optimizer.step()
-            total_loss += loss.item()
-            
+            # Accumulate on-device to avoid a host sync every step
+            total_loss += loss.detach()
+        window_samples += num_images
+
         if (epoch + 1) % 10 == 0 or epoch == 0:
-            avg_loss = total_loss / len(dataloader)
-            print(f"Epoch {epoch+1:03d}/{args.epochs} - Loss: {avg_loss:.4f}")
+            avg_loss = total_loss.item() / num_batches
+            now = time.perf_counter()
+            samples_per_sec = window_samples / max(now - window_start, 1e-9)
+            print(f"Epoch {epoch+1:03d}/{args.epochs} - Loss: {avg_loss:.4f} - {samples_per_sec:,.0f} samples/s")
+            window_start = now
+            window_samples = 0
+
+    elapsed = time.perf_counter() - start
+    print(f"Trained {args.epochs} epochs in {elapsed:.2f}s ({args.epochs * num_images / max(elapsed, 1e-9):,.0f} samples/s)")
 
     os.makedirs(os.path.dirname(args.save_path), exist_ok=True)
     save_model(model, args.save_path)
@@ -0,0 +1,138 @@
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from app.core.extract_colors import extract_dominant_colors
+from benchmarks.corpus import COMPLEXITIES, build_corpus
+from benchmarks.quality import hex_palette_to_oklab, matched_delta_e
+from core.ai import (
+    extract_top10_area_ratio_oklab,
+    extract_top10_chroma_saliency_oklab,
+    extract_top10_gwo,
+    extract_top10_kmeans,
+    extract_top10_lightness_ratio_oklab,
+    extract_top10_saliency,
+    extract_top10_similar_area_oklab,
+    get_tier,
+)
+from core.colors.color_oklch import rgb8_to_oklab
+from core.colors.precision import compute_precision
+from core.image_io import read_bgr
+from scripts.extract_batch import _expand_inputs
+
+
+def _dimension_oklab(data: dict) -> np.ndarray:
+    rows = [[c["oklab"]["L"], c["oklab"]["a"], c["oklab"]["b"]] for c in data["top_colors"]]
+    return np.array(rows, dtype=np.float64).reshape(-1, 3)
+
+
+def _extractors(tier: str) -> dict:
+    """Name -> callable( image ) returning the palette as OKLab rows ( float64 )."""
+    budget = get_tier(tier)
+    rgb = lambda colors: rgb8_to_oklab(colors, np.float64)  # noqa: E731
+    return {
+        "gwo": lambda image: rgb(extract_top10_gwo(image, 10, **budget.kwargs_for("gwo"))),
+        "kmeans": lambda image: rgb(extract_top10_kmeans(image, 10, **budget.kwargs_for("kmeans"))),
+        "saliency": lambda image: rgb(extract_top10_saliency(image, 10, **budget.kwargs_for("saliency"))),
+        "area": lambda image: _dimension_oklab(extract_top10_area_ratio_oklab(image, 10, **budget.kwargs_for("area"))),
+        "similar": lambda image: _dimension_oklab(extract_top10_similar_area_oklab(image, 10, **budget.kwargs_for("similar"))),
+        "chroma": lambda image: _dimension_oklab(extract_top10_chroma_saliency_oklab(image, 10, **budget.kwargs_for("chroma"))),
+        "lightness": lambda image: _dimension_oklab(extract_top10_lightness_ratio_oklab(image, 10, **budget.kwargs_for("lightness"))),
+        "palette_kmeans": lambda image: hex_palette_to_oklab([c["hex"] for c in extract_dominant_colors(image, 5)]),
+    }
+
+
+def _run(extractor, image: np.ndarray, precision: str, seed: int) -> tuple[float, np.ndarray]:
+    # Same pixel sample under both precisions ( GWO samples with the global RNG )
+    np.random.seed(seed)
+    with compute_precision(precision):
+        start = time.perf_counter()
+        labs = extractor(image)
+        return time.perf_counter() - start, labs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Palette deviation ( ΔE_ok ) and speed of the float32 compute precision against float64")
+    parser.add_argument("images", nargs="*", help="Image files, directories or glob patterns; the synthetic benchmark corpus when empty")
+    parser.add_argument("--resolutions", default="256x256,1024x768", help="Comma separated WxH list ( synthetic corpus )")
+    parser.add_argument("--complexities", default=",".join(COMPLEXITIES))
+    parser.add_argument("--extractors", default="", help="Comma separated subset, default : all")
+    parser.add_argument("--tier", default="balanced", help="Extraction tier")
+    parser.add_argument("--max_delta_e", type=float, default=0.02, help="Bound on the mean matched ΔE_ok per palette, exit 1 above it")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Also write the per-image results JSON here")
+    args = parser.parse_args()
+
+    from sklearn.exceptions import ConvergenceWarning
+
+    warnings.filterwarnings("ignore", category=ConvergenceWarning)
+
+    if args.images:
+        paths = _expand_inputs(args.images, None)
+    else:
+        resolutions = [tuple(int(v) for v in item.lower().split("x")) for item in args.resolutions.split(",")]
+        corpus = build_corpus(
+            Path(tempfile.gettempdir()) / "iris_bench_corpus",
+            resolutions=resolutions,
+            complexities=[c.strip() for c in args.complexities.split(",") if c.strip()],
+            seed=args.seed,
+        )
+        paths = [image.path for image in corpus]
+    extractors = _extractors(args.tier)
+    if args.extractors:
+        extractors = {name: extractors[name.strip()] for name in args.extractors.split(",") if name.strip()}
+
+    results: dict[str, dict[str, dict]] = {}
+    for path in paths:
+        image = read_bgr(str(path))
+        if image is None:
+            print(f"{path.name:<24} skipped : cannot decode")
+            continue
+        per_extractor: dict[str, dict] = {}
+        for name, extractor in extractors.items():
+            wall64, reference = _run(extractor, image, "float64", args.seed)
+            wall32, labs = _run(extractor, image, "float32", args.seed)
+            per_extractor[name] = {
+                "float64_s": wall64,
+                "float32_s": wall32,
+                "delta_e": matched_delta_e(labs, reference),
+            }
+        results[str(path)] = per_extractor
+        print(
+            f"{path.name:<24} "
+            + "  ".join(f"{name} dE {entry['delta_e']['mean']:.4f}" for name, entry in per_extractor.items())
+        )
+
+    print("\n🪻 |||||| Summary : float32 vs float64 |||||| 🪻")
+    failed = []
+    for name in extractors:
+        rows = [entry[name] for entry in results.values()]
+        if not rows:
+            continue
+        means = [row["delta_e"]["mean"] for row in rows]
+        worst = max(means)
+        speedup = statistics.median(row["float64_s"] / max(row["float32_s"], 1e-9) for row in rows)
+        status = "ok" if worst <= args.max_delta_e else "OVER"
+        if status != "ok":
+            failed.append(name)
+        print(
+            f"{name:<16} mean dE_ok {statistics.mean(means):.4f}  worst {worst:.4f}  "
+            f"max pair {max(row['delta_e']['max'] for row in rows):.4f}  speedup x{speedup:.2f}  {status}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if failed:
+        print(f"ΔE bound {args.max_delta_e} exceeded by : {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())